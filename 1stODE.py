@@ -1,23 +1,69 @@
+import functools
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import solve_ivp
+from DenseOutput import DenseSolution
+from LTIPropagator import check_grid_output, detect_lti
+from StiffSolver import solve_ivp_auto
+from Streaming import stream_solution
+from SolutionIO import write_solution
+from SystemSpec import ODESystem
 
 
 # Define function to solve the differential equation
-def solve_single_first_order(eq_func, x0, y0, x_span, num_points=100):
+# method may be any solve_ivp method, or 'auto' to pick an implicit method with a symbolic Jacobian when stiff
+# backend='compiled' runs 'RK45' or 'rk4' in compiled code instead (Numba when installed); dense output uses scipy
+# stream=True returns a generator of (x_chunk, y_chunk) pieces of the same result, computed as they are consumed
+def solve_single_first_order(eq_func, x0, y0, x_span, num_points=100, dense=False, method='RK45', backend='scipy',
+                             stream=False):
+    if stream:
+        return ((x_chunk, y_chunk[0]) for x_chunk, y_chunk in stream_solution(eq_func, x_span, [y0], num_points,
+                                                                              method=method))
+    if dense:
+        # Solve once and return a solution that can be evaluated anywhere in x_span
+        solution = solve_ivp_auto(eq_func, x_span, [y0], method=method, dense_output=True)
+        return DenseSolution(solution.sol, x_span, squeeze=True)
+
     # Solve the first-order differential equation using solve_ivp
     x_eval = np.linspace(x_span[0], x_span[1], num_points)
-    solution = solve_ivp(eq_func, x_span, [y0], t_eval=x_eval)
+    if backend == 'compiled':
+        from CompiledIntegrators import solve_compiled
+        x_vals, y_vals = solve_compiled(eq_func, x_span, [y0], x_eval, method=method)
+        return x_vals, y_vals[0]
+    solution = solve_ivp_auto(eq_func, x_span, [y0], method=method, t_eval=x_eval)
 
     # Return solution for further customization
     return solution.t, solution.y[0]
 
 
 # Define function to solve a system of first-order ODEs
-def solve_system_first_order(eq_func, x0, y0, x_span, num_points=100):
+# eq_func may also be an ODESystem, which is evaluated in place without allocating a list per call
+# method='expm' is for linear constant-coefficient systems (checked by probing eq_func): y0 may then be a block
+# (n_ics, n) of initial values, all propagated exactly together, giving y_vals of shape (n_ics, n, num_points)
+# stream=True returns a generator of (x_chunk, y_chunk) pieces of the result, computed as they are consumed
+def solve_system_first_order(eq_func, x0, y0, x_span, num_points=100, dense=False, method='RK45', backend='scipy',
+                             stream=False):
+    if method == 'expm':
+        check_grid_output(dense, stream)
+    if stream:
+        if isinstance(eq_func, ODESystem):
+            return eq_func.stream(x_span, y0, num_points, method=method)
+        return stream_solution(eq_func, x_span, y0, num_points, method=method)
+    if method == 'expm':
+        y0 = np.asarray(y0, dtype=float)
+        system = detect_lti(eq_func, y0.shape[-1], t_span=x_span)
+        if system is None:
+            raise ValueError("method='expm' needs a linear system with constant coefficients and forcing")
+        return system.solve(x_span, y0, num_points)
+    solver = eq_func.solve if isinstance(eq_func, ODESystem) else functools.partial(solve_ivp_auto, eq_func)
+    if dense:
+        solution = solver(x_span, y0, method=method, dense_output=True)
+        return DenseSolution(solution.sol, x_span)
+
     # Solve the system of first-order differential equations using solve_ivp
     x_eval = np.linspace(x_span[0], x_span[1], num_points)
-    solution = solve_ivp(eq_func, x_span, y0, t_eval=x_eval)
+    if backend == 'compiled':
+        from CompiledIntegrators import solve_compiled
+        return solve_compiled(eq_func, x_span, y0, x_eval, method=method)
+    solution = solver(x_span, y0, method=method, t_eval=x_eval)
 
     # Return solution for further customization
     return solution.t, solution.y
@@ -37,8 +83,21 @@ def system_of_equations(x, vars):
     return [dy1_dx, dy2_dx]
 
 
+# The same system written in place, for one state (2,) or a batch of states (2, m)
+def system_of_equations_into(x, vars, params, out):
+    out[0] = vars[1]
+    out[1] = -vars[0]
+
+
+system_of_equations_system = ODESystem(system_of_equations_into, 2)
+
+
 # Function to plot single solution
-def plot_single_solution(x_vals, y_vals, title="First-Order ODE Solution"):
+def plot_single_solution(x_vals, y_vals, title="First-Order ODE Solution", filename=None):
+    if filename is not None:
+        from FastPlot import render_solution
+        return render_solution(x_vals, y_vals, filename, style='single_first_order', title=title)
+    import matplotlib.pyplot as plt
     plt.plot(x_vals, y_vals, label="y(x)", color='b')
     plt.title(title)
     plt.xlabel('x')
@@ -49,7 +108,12 @@ def plot_single_solution(x_vals, y_vals, title="First-Order ODE Solution"):
 
 
 # Function to plot system solution
-def plot_system_solution(x_vals, y_vals, labels=["y1(x)", "y2(x)"], title="System of First-Order ODEs Solution"):
+def plot_system_solution(x_vals, y_vals, labels=["y1(x)", "y2(x)"], title="System of First-Order ODEs Solution",
+                         filename=None):
+    if filename is not None:
+        from FastPlot import render_solution
+        return render_solution(x_vals, y_vals, filename, style='system_first_order', title=title, labels=labels)
+    import matplotlib.pyplot as plt
     for i, y in enumerate(y_vals):
         plt.plot(x_vals, y, label=labels[i])
     plt.title(title)
@@ -60,11 +124,10 @@ def plot_system_solution(x_vals, y_vals, labels=["y1(x)", "y2(x)"], title="Syste
     plt.show()
 
 
-# Function to save solution to a file
+# Function to save solution to a file; the format (.txt/.csv, .npy, .bin, .npz, .parquet) follows the extension
+# y_vals may be a single component or the (n_components, n_points) array of a system
 def save_solution_to_file(x_vals, y_vals, filename="solution.txt"):
-    with open(filename, 'w') as file:
-        for i in range(len(x_vals)):
-            file.write(f"{x_vals[i]}, {y_vals[i]}\n")
+    write_solution(filename, x_vals, y_vals)
     print(f"Solution saved to {filename}")
 
 
@@ -108,8 +171,7 @@ def main():
 
         # Plot and save the solution
         plot_system_solution(x_vals, y_vals, labels=["y1(x)", "y2(x)"], title="System of First-Order ODEs Solution")
-        for i, y_var in enumerate(y_vals):
-            save_solution_to_file(x_vals, y_var, filename=f"solution_y{i + 1}.txt")
+        save_solution_to_file(x_vals, y_vals)
 
     else:
         print("Invalid choice. Please restart the program and choose 1 or 2.")
@@ -1,6 +1,7 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import solve_ivp
+from DenseOutput import DenseSolution
+from LTIPropagator import LTISystem, check_grid_output
+from SystemSpec import ODESystem
 
 
 # Define the system of first-order ODEs
@@ -11,22 +12,61 @@ def second_order_ode_system(x, vars):
     return [dydx, dzdx]
 
 
+# The same system written in place, for one state (2,) or a batch of states (2, m)
+def second_order_ode_into(x, vars, params, out):
+    out[0] = vars[1]
+    out[1] = np.sin(x) - 2 * vars[1] - 3 * vars[0]
+
+
+second_order_system = ODESystem(second_order_ode_into, 2, state_names=('y', 'z'))
+# The same system as y' = A y + sin(x) e2, for exact propagation with method='expm'
+second_order_lti = LTISystem([[0.0, 1.0], [-3.0, -2.0]], sinusoids=[(1.0, [0.0, 1.0], [0.0, 0.0])])
+
+
 # Function to solve the second-order ODE
-def solve_second_order_ode(x_span, y0, z0, num_points=100):
+# backend='compiled' runs method 'RK45' or 'rk4' in compiled code (Numba when installed) instead of solve_ivp
+# method='expm' propagates the exact step matrix; y0 and z0 may then be arrays of initial values, giving y_vals of
+# shape (n_ics, 2, num_points)
+# stream=True returns a generator of (x_chunk, y_chunk) pieces of the result, computed as they are consumed
+def solve_second_order_ode(x_span, y0, z0, num_points=100, dense=False, method='RK45', backend='scipy',
+                           stream=False):
     # Define the initial conditions
     initial_conditions = [y0, z0]  # [y(x0), dy/dx(x0)]
+    if method == 'expm':
+        check_grid_output(dense, stream)
+
+    if stream:
+        return second_order_system.stream(x_span, initial_conditions, num_points, method=method)
+
+    if dense:
+        # Solve once and return a solution that can be evaluated anywhere in x_span
+        solution = second_order_system.solve(x_span, initial_conditions, method=method, dense_output=True)
+        return DenseSolution(solution.sol, x_span)
+
+    if method == 'expm':
+        initial_conditions = np.stack(np.broadcast_arrays(np.asarray(y0, dtype=float), np.asarray(z0, dtype=float)),
+                                      axis=-1)
+        return second_order_lti.solve(x_span, initial_conditions, num_points)
 
     # Define the range of x values to solve over
     x_eval = np.linspace(x_span[0], x_span[1], num_points)
 
+    if backend == 'compiled':
+        from CompiledIntegrators import solve_compiled
+        return solve_compiled(second_order_ode_system, x_span, initial_conditions, x_eval, method=method)
+
     # Solve the system of ODEs using solve_ivp
-    solution = solve_ivp(second_order_ode_system, x_span, initial_conditions, t_eval=x_eval)
+    solution = second_order_system.solve(x_span, initial_conditions, method=method, t_eval=x_eval)
 
     return solution.t, solution.y
 
 
 # Function to plot the solution
-def plot_solution(x_vals, y_vals, title="Second-Order ODE Solution"):
+def plot_solution(x_vals, y_vals, title="Second-Order ODE Solution", filename=None):
+    if filename is not None:
+        from FastPlot import render_solution
+        return render_solution(x_vals, y_vals, filename, style='second_order', title=title)
+    import matplotlib.pyplot as plt
     plt.plot(x_vals, y_vals[0], label='y(x)', color='b')
     plt.plot(x_vals, y_vals[1], label="dy/dx (z)", color='r', linestyle='--')
     plt.title(title)
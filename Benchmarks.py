@@ -0,0 +1,229 @@
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from unittest import mock
+import numpy as np
+import scipy
+import sympy
+
+# Problem sizes (output points) and stiffness levels every numeric entry point is run at
+SIZES = (100, 10000)
+OSCILLATOR_STIFFNESS = {'nonstiff': (2.0, 0.1), 'stiff': (1.0, 200.0)}  # (omega0, zeta)
+# A metric counts as regressed when it grows by more than this fraction over the baseline
+DEFAULT_THRESHOLD = 0.2
+METRICS = ('wall_time', 'peak_memory', 'nfev')
+
+# Answers fed to input() by the interactive symbolic solvers
+SYMBOLIC_INPUTS = {
+    'solve_first_order_linear_ode': ['2*x', 'sin(x)', '0', '1'],
+    'solve_separable_ode': ['y', 'sin(x)', '0', '1'],
+    'solve_exact_ode': ['2*x*y + y**2', 'x**2 + 2*x*y', '1', '1'],
+    'solve_second_order_linear_ode': ['1', '2', '1', '0', '1', '0'],
+    'solve_second_order_nonhomogeneous_ode': ['1', '2', '1', 'sin(x)', '0', '1', '0'],
+}
+
+
+# A benchmark case: run() does the work once; reset() (optional) runs untimed before every repeat
+class Case:
+    def __init__(self, name, run, reset=None):
+        self.name = name
+        self.run = run
+        self.reset = reset
+
+
+def _numeric_cases():
+    first = importlib.import_module('1stODE')
+    second = importlib.import_module('2ndODE')
+    oscillator = importlib.import_module('HarmonicOscillatorODE')
+    cooling = importlib.import_module('NewtonCoolingLaw')
+    beam = importlib.import_module('BoundaryValueProblem')
+
+    cases = []
+    for n in SIZES:
+        cases += [
+            Case(f'solve_single_first_order[n={n}]',
+                 lambda n=n: first.solve_single_first_order(first.equation1, 0, 1, (0, 10), n)),
+            Case(f'solve_system_first_order[n={n}]',
+                 lambda n=n: first.solve_system_first_order(first.system_of_equations, 0, [1, 0], (0, 10), n)),
+            Case(f'solve_second_order_ode[n={n}]', lambda n=n: second.solve_second_order_ode((0, 10), 1, 0, n)),
+        ]
+        for level, (omega0, zeta) in OSCILLATOR_STIFFNESS.items():
+            for method in ('RK45', 'auto'):
+                cases.append(Case(f'solve_harmonic_oscillator[{level},{method},n={n}]',
+                                  lambda n=n, omega0=omega0, zeta=zeta, method=method:
+                                  oscillator.solve_harmonic_oscillator(1, 0, omega0, zeta, (0, 10), n,
+                                                                       method=method)))
+        for method in ('exact', 'numeric'):
+            cases.append(Case(f'solve_newtons_cooling[{method},n={n}]',
+                              lambda n=n, method=method: cooling.solve_newtons_cooling(90, 20, 0.1, (0, 60), n,
+                                                                                      method=method)))
+    for load_type in beam.LOAD_TYPES:
+        for method in ('exact', 'numeric'):
+            cases.append(Case(f'solve_beam_bvp[{load_type},{method}]',
+                              lambda load_type=load_type, method=method: beam.solve_beam_bvp(10, load_type,
+                                                                                            method=method)))
+    return cases
+
+
+# The interactive symbolic solvers, with input() answered from SYMBOLIC_INPUTS and output discarded.
+# Every repeat starts cold: the in-memory caches are cleared and the disk dsolve cache is bypassed.
+def _symbolic_cases():
+    solver = importlib.import_module('EnhancedDiffEqSolver')
+
+    def reset():
+        solver._general_solution.cache_clear()
+        solver._compiled_solution.cache_clear()
+
+    def interactive(name, compiled):
+        def run():
+            options = {'compiled': True} if compiled else {}
+            with mock.patch('builtins.input', side_effect=SYMBOLIC_INPUTS[name]), \
+                    mock.patch('DsolveCache.get_dsolve_cache', return_value=None), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                return getattr(solver, name)(**options)
+        return run
+
+    cases = []
+    for name in SYMBOLIC_INPUTS:
+        cases.append(Case(f'{name}', interactive(name, False), reset))
+        cases.append(Case(f'{name}[compiled]', interactive(name, True), reset))
+    return cases
+
+
+def all_cases():
+    return _numeric_cases() + _symbolic_cases()
+
+
+# Count right-hand side evaluations by wrapping the fun handed to solve_ivp / solve_bvp in every module
+@contextlib.contextmanager
+def _count_rhs_calls():
+    counter = [0]
+
+    def counting(solver):
+        def wrapper(fun, *args, **kwargs):
+            def counted(*fun_args):
+                counter[0] += 1
+                return fun(*fun_args)
+            return solver(counted, *args, **kwargs)
+        return wrapper
+
+    targets = [('StiffSolver', 'solve_ivp'), ('NewtonCoolingLaw', 'solve_ivp'),
+               ('HarmonicOscillatorODE', 'solve_ivp'), ('BoundaryValueProblem', 'solve_bvp')]
+    with contextlib.ExitStack() as stack:
+        for module_name, attribute in targets:
+            module = importlib.import_module(module_name)
+            stack.enter_context(mock.patch.object(module, attribute, counting(getattr(module, attribute))))
+        yield counter
+
+
+# Median wall time over repeat runs (after one warm-up), peak traced memory of one run and nfev of one run
+def measure(case, repeat=5):
+    if case.reset:
+        case.reset()
+    case.run()  # Warm-up: imports, lambdify, Numba compilation
+
+    times = []
+    for _ in range(repeat):
+        if case.reset:
+            case.reset()
+        start = time.perf_counter()
+        case.run()
+        times.append(time.perf_counter() - start)
+
+    if case.reset:
+        case.reset()
+    tracemalloc.start()
+    try:
+        case.run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    if case.reset:
+        case.reset()
+    with _count_rhs_calls() as counter:
+        case.run()
+    return {'wall_time': statistics.median(times), 'wall_time_min': min(times), 'peak_memory': peak_memory,
+            'nfev': counter[0]}
+
+
+def run_benchmarks(repeat=5, select=None, progress=None):
+    results = {}
+    for case in all_cases():
+        if select and select not in case.name:
+            continue
+        results[case.name] = measure(case, repeat)
+        if progress:
+            progress(case.name, results[case.name])
+    return {'meta': {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+                     'python': platform.python_version(), 'platform': platform.platform(),
+                     'numpy': np.__version__, 'scipy': scipy.__version__, 'sympy': sympy.__version__,
+                     'repeat': repeat},
+            'results': results}
+
+
+# Metrics that grew by more than threshold (a fraction) relative to the baseline, as
+# (case, metric, baseline, current, relative change) tuples. Cases missing from either run are skipped.
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    regressions = []
+    for name, old in baseline['results'].items():
+        new = current['results'].get(name)
+        if new is None:
+            continue
+        for metric in METRICS:
+            before, after = old.get(metric), new.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else (float('inf') if after > 0 else 0.0)
+            if change > threshold:
+                regressions.append((name, metric, before, after, change))
+    return regressions
+
+
+def _print_result(name, result):
+    print(f"{name:60s} {result['wall_time'] * 1e3:10.3f} ms {result['peak_memory'] / 1024:10.1f} KiB "
+          f"{result['nfev']:8d} nfev")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solver entry points")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="Run the benchmarks and write the results as JSON")
+    run_parser.add_argument('--output', default='benchmarks.json')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--select', help="Only run cases whose name contains this string")
+    compare_parser = commands.add_parser('compare', help="Flag regressions of current against baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_benchmarks(args.repeat, args.select, progress=_print_result)
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    regressions = compare_results(baseline, current, args.threshold)
+    for name, metric, before, after, change in regressions:
+        print(f"REGRESSION {name} {metric}: {before:.6g} -> {after:.6g} (+{change:.0%})")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
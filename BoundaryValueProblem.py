@@ -1,44 +1,257 @@
+import functools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import solve_bvp
+from Instrumentation import solve_bvp
+
+# Vectorized load functions q(x); each returns an array shaped like x
+def constant_load(x):
+    return np.ones_like(x, dtype=float)
+
+
+def triangular_load(x):
+    return np.array(x, dtype=float)
+
+
+# Load defined by samples (x_data, q_data), linearly interpolated
+class TabulatedLoad:
+    def __init__(self, x_data, q_data):
+        self.x_data = np.asarray(x_data, dtype=float)
+        self.q_data = np.asarray(q_data, dtype=float)
+
+    def __call__(self, x):
+        return np.interp(x, self.x_data, self.q_data)
+
+
+# Load made of pieces: loads[i] applies before breakpoints[i], the last one after the final breakpoint.
+# Each piece is a number or a vectorized function of x.
+class PiecewiseLoad:
+    def __init__(self, breakpoints, loads):
+        if len(loads) != len(breakpoints) + 1:
+            raise ValueError("loads must have exactly one more entry than breakpoints")
+        self.breakpoints = np.asarray(breakpoints, dtype=float)
+        self.loads = list(loads)
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        piece = np.searchsorted(self.breakpoints, x, side='right')
+        q_x = np.empty_like(x)
+        for i, load in enumerate(self.loads):
+            mask = piece == i
+            q_x[mask] = load(x[mask]) if callable(load) else load
+        return q_x
+
+
+# Registry of named loads
+LOADS = {
+    'sin': np.sin,  # Sinusoidal load
+    'constant': constant_load,  # Constant load
+    'triangular': triangular_load,  # Triangular load
+}
+LOAD_TYPES = ('sin', 'constant', 'triangular')
+
+# Loads with an elementary closed form, as functions building the sympy expression for q(x)
+SYMBOLIC_LOADS = {
+    'sin': lambda x: _sympy().sin(x),
+    'constant': lambda x: _sympy().Integer(1),
+    'triangular': lambda x: x,
+}
+
+
+# sympy is only needed for the closed-form solver, so it is imported on first use
+def _sympy():
+    import sympy
+    return sympy
+
+
+# Register a named load; pass symbolic (x -> sympy expression) to enable the closed-form solver for it
+def register_load(name, load, symbolic=None):
+    LOADS[name] = load
+    SYMBOLIC_LOADS.pop(name, None)
+    if symbolic is not None:
+        SYMBOLIC_LOADS[name] = symbolic
+    _exact_beam_deflection.cache_clear()
+
+
+# Turn a load name or a callable q(x) into a vectorized load function
+def resolve_load(load_type):
+    if callable(load_type):
+        return load_type
+    if load_type not in LOADS:
+        raise ValueError(f"Invalid load type. Choose one of {sorted(LOADS)} or pass a function q(x)")
+    return LOADS[load_type]
 
 
 # Define the differential equation for beam deflection under various loads
+# A clamped beam has four boundary conditions, so the state is [y, dy/dx, d2y/dx2, d3y/dx3] with d4y/dx4 = -q(x)
 def beam_deflection(x, y, load_type):
-    if load_type == 'sin':
-        q_x = np.sin(x)  # Sinusoidal load
-    elif load_type == 'constant':
-        q_x = 1.0  # Constant load
-    elif load_type == 'triangular':
-        q_x = x  # Triangular load
-    else:
-        raise ValueError("Invalid load type. Choose 'sin', 'constant', or 'triangular'")
+    return np.vstack((y[1:], -resolve_load(load_type)(x)))
 
-    return [y[1], -q_x]  # d^2y/dx^2 = -q(x)
+
+# Right-hand side and its analytic Jacobian with the load resolved once, for use inside solve_bvp
+def make_beam_functions(load_type):
+    q = resolve_load(load_type)
+    shift = np.eye(4, k=1)  # The derivative of the state is shift @ state, minus q(x) in the last row
+    jacobians = {}
+
+    def fun(x, y):
+        return np.vstack((y[1:], -q(x)))
+
+    def fun_jac(x, y):
+        if x.size not in jacobians:
+            jacobians.clear()
+            jacobians[x.size] = np.repeat(shift[:, :, np.newaxis], x.size, axis=2)
+        return jacobians[x.size]
+
+    return fun, fun_jac
 
 
 # Define boundary conditions for clamped beam (y(0) = 0, dy/dx(0) = 0, y(L) = 0, dy/dx(L) = 0)
 def clamped_boundary_conditions(ya, yb):
-    return [ya[0], ya[1], yb[0], yb[1]]  # Clamped at both ends
+    return np.array([ya[0], ya[1], yb[0], yb[1]])  # Clamped at both ends
+
+
+# Derivatives of the clamped boundary conditions with respect to y(0) and y(L)
+def clamped_boundary_jacobian(ya, yb):
+    dbc_dya = np.array([[1.0, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]])
+    dbc_dyb = np.array([[0.0, 0, 0, 0], [0, 0, 0, 0], [1, 0, 0, 0], [0, 1, 0, 0]])
+    return dbc_dya, dbc_dyb
+
+
+# Run solve_bvp from a given mesh and initial guess, raising if it does not converge
+def _solve_beam(load_type, x_mesh, initial_guess, tol=1e-3, max_nodes=1000):
+    fun, fun_jac = make_beam_functions(load_type)
+    solution = solve_bvp(fun, clamped_boundary_conditions, x_mesh, initial_guess, tol=tol, max_nodes=max_nodes,
+                         fun_jac=fun_jac, bc_jac=clamped_boundary_jacobian)
+    if not solution.success:
+        raise RuntimeError("Boundary value problem solver failed to converge")
+    return solution
+
+
+# Closed-form clamped-beam deflection y(x, L) for a load with a symbolic form: integrate -q(x) four times
+# and fix the four integration constants from the boundary conditions. Built once per load, then cached.
+@functools.lru_cache(maxsize=None)
+def _exact_beam_deflection(load_type):
+    sp = _sympy()
+    x, s, L = sp.symbols('x s L', positive=True)
+    c = sp.symbols('c0:4')
+
+    # Repeated integration from 0 keeps the constants as the polynomial c0 + c1 x + c2 x^2 + c3 x^3
+    y = -SYMBOLIC_LOADS[load_type](s)
+    for _ in range(4):
+        y = sp.integrate(y, (s, 0, x)).subs(x, s)
+    y = y.subs(s, x) + c[0] + c[1] * x + c[2] * x ** 2 + c[3] * x ** 3
+
+    dy = sp.diff(y, x)
+    constants = sp.solve([y.subs(x, 0), dy.subs(x, 0), y.subs(x, L), dy.subs(x, L)], c, dict=True)[0]
+    deflection = sp.lambdify((x, L), sp.simplify(y.subs(constants)), 'numpy')
+
+    def evaluate(x_vals, L_val):
+        x_vals = np.asarray(x_vals, dtype=float)
+        return np.broadcast_to(deflection(x_vals, L_val), x_vals.shape).astype(float)
+
+    return evaluate
+
+
+# Closed-form deflection on any grid of x values in [0, L]
+def exact_beam_deflection(x_vals, L, load_type):
+    if load_type not in SYMBOLIC_LOADS:
+        raise ValueError(f"No closed form for load '{load_type}'. Choose one of {sorted(SYMBOLIC_LOADS)}")
+    return _exact_beam_deflection(load_type)(x_vals, L)
 
 
 # Function to solve the BVP
-def solve_beam_bvp(L, load_type, num_points=100):
+# method='auto' uses the closed form when the load has one and solve_bvp otherwise; 'exact' or 'numeric' force one
+def solve_beam_bvp(L, load_type, num_points=100, method='auto'):
     x_vals = np.linspace(0, L, num_points)
-    initial_guess = np.zeros((2, x_vals.size))  # Initial guess for [y, dy/dx]
+    has_closed_form = isinstance(load_type, str) and load_type in SYMBOLIC_LOADS
+    if method == 'exact' or (method == 'auto' and has_closed_form):
+        return x_vals, exact_beam_deflection(x_vals, L, load_type)
+    elif method not in ('auto', 'numeric'):
+        raise ValueError("Invalid method. Choose 'auto', 'exact' or 'numeric'")
+
+    initial_guess = np.zeros((4, x_vals.size))  # Initial guess for y and its first three derivatives
 
     # Solve using solve_bvp
-    solution = solve_bvp(lambda x, y: beam_deflection(x, y, load_type), clamped_boundary_conditions, x_vals,
-                         initial_guess)
+    solution = _solve_beam(load_type, x_vals, initial_guess)
+    return solution.x, solution.y[0]
 
-    if solution.success:
-        return solution.x, solution.y[0]
+
+# Accuracy of the numeric path against the closed form on a common grid
+def compare_beam_solvers(L, load_type, num_points=100, tol=1e-3, max_nodes=1000):
+    x_vals = np.linspace(0, L, num_points)
+    exact = exact_beam_deflection(x_vals, L, load_type)
+    numeric = _solve_beam(load_type, x_vals, np.zeros((4, num_points)), tol, max_nodes).sol(x_vals)[0]
+    max_error = np.abs(numeric - exact).max()
+    return {'max_abs_error': max_error, 'max_rel_error': max_error / np.abs(exact).max()}
+
+
+# Solve one load type over an increasing run of lengths. Each solve starts from the previous converged
+# mesh and solution stretched to the new length (x scaled by r = L/L_prev, the k-th derivative by r^(4-k)),
+# which is exact for the constant load and close for the others
+def _beam_length_run(load_type, lengths, num_points, continuation, tol, max_nodes):
+    y_vals = np.empty((len(lengths), num_points))
+    niter = np.empty(len(lengths), dtype=int)
+    wall_time = np.empty(len(lengths))
+    previous = None
+    for i, L in enumerate(lengths):
+        if continuation and previous is not None:
+            ratio = L / previous.x[-1]
+            x_mesh = previous.x * ratio
+            initial_guess = previous.y * ratio ** np.arange(4, 0, -1)[:, np.newaxis]
+        else:
+            x_mesh = np.linspace(0, L, num_points)
+            initial_guess = np.zeros((4, num_points))
+
+        start = time.perf_counter()
+        previous = _solve_beam(load_type, x_mesh, initial_guess, tol, max_nodes)
+        wall_time[i] = time.perf_counter() - start
+        niter[i] = previous.niter
+        y_vals[i] = previous.sol(np.linspace(0, L, num_points))[0]
+    return y_vals, niter, wall_time
+
+
+# Solve every (load type, length) pair, spreading contiguous runs of sorted lengths over a process pool.
+# Returns x of shape (n_lengths, num_points) and y, niter, wall_time indexed [load, length]
+def solve_beam_sweep(lengths, load_types=LOAD_TYPES, num_points=100, processes=None, continuation=True,
+                     tol=1e-3, max_nodes=1000):
+    lengths = np.asarray(lengths, dtype=float)
+    order = np.argsort(lengths)
+    processes = processes or os.cpu_count() or 1
+
+    # Split each load type's sorted lengths into enough runs to keep every worker busy
+    n_runs = max(1, min(len(lengths), -(-processes // len(load_types))))
+    runs = [(load_index, chunk) for load_index in range(len(load_types))
+            for chunk in np.array_split(order, n_runs) if chunk.size]
+    jobs = [(load_types[load_index], lengths[chunk], num_points, continuation, tol, max_nodes)
+            for load_index, chunk in runs]
+
+    if processes == 1:
+        results = [_beam_length_run(*job) for job in jobs]
     else:
-        raise RuntimeError("Boundary value problem solver failed to converge")
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_beam_length_run, *zip(*jobs)))
+
+    y_vals = np.empty((len(load_types), len(lengths), num_points))
+    niter = np.empty((len(load_types), len(lengths)), dtype=int)
+    wall_time = np.empty((len(load_types), len(lengths)))
+    for (load_index, chunk), (run_y, run_niter, run_time) in zip(runs, results):
+        y_vals[load_index, chunk] = run_y
+        niter[load_index, chunk] = run_niter
+        wall_time[load_index, chunk] = run_time
+
+    x_vals = np.linspace(0, 1, num_points) * lengths[:, np.newaxis]
+    return {'load_types': tuple(load_types), 'lengths': lengths, 'x': x_vals, 'y': y_vals, 'niter': niter,
+            'wall_time': wall_time}
 
 
 # Function to plot the solution
-def plot_beam_deflection(x_vals, y_vals, title="Beam Deflection under Load"):
+def plot_beam_deflection(x_vals, y_vals, title="Beam Deflection under Load", filename=None):
+    if filename is not None:
+        from FastPlot import render_solution
+        return render_solution(x_vals, y_vals, filename, style='beam_deflection', title=title)
+    import matplotlib.pyplot as plt
     plt.plot(x_vals, y_vals, label='Deflection (y)', color='b')
     plt.title(title)
     plt.xlabel('x')
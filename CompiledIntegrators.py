@@ -0,0 +1,228 @@
+import time
+import numpy as np
+import Instrumentation
+from SystemSpec import ODESystem
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Dormand-Prince 5(4) coefficients (the pair used by scipy's RK45)
+C = np.array([0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0])
+A = np.array([
+    [0.0, 0.0, 0.0, 0.0, 0.0],
+    [1 / 5, 0.0, 0.0, 0.0, 0.0],
+    [3 / 40, 9 / 40, 0.0, 0.0, 0.0],
+    [44 / 45, -56 / 15, 32 / 9, 0.0, 0.0],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729, 0.0],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+])
+B = np.array([35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])
+E = np.array([71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+EPS = np.finfo(np.float64).eps
+# Attempted steps after which the adaptive integration gives up
+MAX_STEPS = 1000000
+# Messages for the kernels' status codes, worded as solve_ivp's
+MESSAGES = {0: "The solver successfully reached the end of the integration interval.",
+            -1: "Required step size is less than spacing between numbers.",
+            -2: "Maximum number of steps exceeded."}
+
+
+# Adaptive Dormand-Prince integration over t_eval, writing states into the preallocated out array.
+# Output points inside an accepted step are filled by cubic Hermite interpolation. A step whose error is not
+# finite is rejected; the integration fails once the step falls below the spacing of floats at t (status -1)
+# or after MAX_STEPS attempts (status -2). Returns (nfev, status, number of output points filled).
+def _dopri5(rhs, t_eval, y0, args, rtol, atol, out, C, A, B, E):
+    n = y0.size
+    K = np.empty((7, n))
+    y = y0.copy()
+    t = t_eval[0]
+    t_end = t_eval[-1]
+    direction = 1.0 if t_end >= t else -1.0
+    out[0] = y
+    K[0] = rhs(t, y, args)
+    nfev = 1
+
+    # Initial step from the size of the state and its derivative
+    scale = atol + rtol * np.abs(y)
+    d0 = np.sqrt(np.mean((y / scale) ** 2))
+    d1 = np.sqrt(np.mean((K[0] / scale) ** 2))
+    h = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+    h = min(h, abs(t_end - t))
+
+    k = 1
+    status = 0
+    n_steps = 0
+    while k < t_eval.size:
+        if n_steps >= MAX_STEPS:
+            status = -2
+            break
+        n_steps += 1
+        h = min(h, abs(t_end - t))
+        step = h * direction
+        for s in range(1, 6):
+            dy = np.zeros(n)
+            for j in range(s):
+                dy += A[s, j] * K[j]
+            K[s] = rhs(t + C[s] * step, y + step * dy, args)
+        y_new = y.copy()
+        for j in range(6):
+            y_new += step * B[j] * K[j]
+        K[6] = rhs(t + step, y_new, args)
+        nfev += 6
+
+        err = np.zeros(n)
+        for j in range(7):
+            err += step * E[j] * K[j]
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err_norm = np.sqrt(np.mean((err / scale) ** 2))
+
+        if err_norm <= 1.0:
+            t_new = t_end if abs(t_end - (t + step)) < 1e-12 * max(1.0, abs(t_end)) else t + step
+            # Fill every requested output time inside (t, t_new]
+            while k < t_eval.size and (t_eval[k] - t_new) * direction <= 0:
+                theta = (t_eval[k] - t) / step
+                h00 = (1 + 2 * theta) * (1 - theta) ** 2
+                h10 = theta * (1 - theta) ** 2
+                h01 = theta ** 2 * (3 - 2 * theta)
+                h11 = theta ** 2 * (theta - 1)
+                out[k] = h00 * y + h10 * step * K[0] + h01 * y_new + h11 * step * K[6]
+                k += 1
+            t = t_new
+            y = y_new
+            K[0] = K[6]
+            factor = 10.0 if err_norm == 0 else min(10.0, 0.9 * err_norm ** -0.2)
+        else:
+            factor = max(0.2, 0.9 * err_norm ** -0.2) if np.isfinite(err_norm) else 0.2
+            if h * factor <= 10 * EPS * abs(t):
+                status = -1
+                break
+        h = h * factor
+    return nfev, status, k
+
+
+# Classic RK4 with a fixed number of substeps between consecutive output times. Returns (nfev, 0, t_eval.size)
+# like _dopri5.
+def _rk4(rhs, t_eval, y0, args, substeps, out):
+    y = y0.copy()
+    out[0] = y
+    for i in range(1, t_eval.size):
+        h = (t_eval[i] - t_eval[i - 1]) / substeps
+        t = t_eval[i - 1]
+        for _ in range(substeps):
+            k1 = rhs(t, y, args)
+            k2 = rhs(t + h / 2, y + h / 2 * k1, args)
+            k3 = rhs(t + h / 2, y + h / 2 * k2, args)
+            k4 = rhs(t + h, y + h * k3, args)
+            y = y + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+            t += h
+        out[i] = y
+    return 4 * substeps * (t_eval.size - 1), 0, t_eval.size
+
+
+# With Numba the steppers and the RHS run entirely in compiled code; without it they run as plain NumPy
+if numba is not None:
+    _compiled_kernels = {'RK45': numba.njit(_dopri5), 'rk4': numba.njit(_rk4)}
+else:
+    _compiled_kernels = {}
+_python_kernels = {'RK45': _dopri5, 'rk4': _rk4}
+_rhs_cache = {}
+_uncompilable = set()
+
+
+# Compiled right-hand sides are cached per function. Plain functions are keyed by their code object, so a lambda
+# re-created with the same source (e.g. on every call of a wrapper) reuses its compiled version instead of paying
+# the Numba compile again. Closures and functions with defaults are keyed by the object, since the same code may
+# then compute different things.
+def _cache_key(fun):
+    code = getattr(fun, '__code__', None)
+    if code is None or fun.__closure__ or fun.__defaults__ or fun.__kwdefaults__:
+        return fun
+    return code
+
+
+# Adapt fun(t, y, *args) returning a list or array into rhs(t, y, args) returning a float array
+def _python_rhs(fun):
+    def rhs(t, y, args):
+        return np.asarray(fun(t, y, *args), dtype=np.float64)
+    return rhs
+
+
+# An ODESystem's in-place rhs_into(t, y, params, out) as rhs(t, y, args)
+def _python_rhs_into(rhs_into):
+    def rhs(t, y, args):
+        out = np.empty_like(y)
+        rhs_into(t, y, args, out)
+        return out
+    return rhs
+
+
+# into=True compiles an in-place rhs_into(t, y, params, out) instead of fun(t, y, *args)
+def compile_rhs(fun, into=False):
+    key = (_cache_key(fun), into)
+    if key not in _rhs_cache:
+        if into:
+            _rhs_cache[key] = _python_rhs_into(fun) if numba is None else numba.njit(_python_rhs_into(numba.njit(fun)))
+        elif numba is None:
+            _rhs_cache[key] = _python_rhs(fun)
+        else:
+            jitted = numba.njit(fun)
+
+            def rhs(t, y, args):
+                return np.asarray(jitted(t, y, *args), dtype=np.float64)
+
+            _rhs_cache[key] = numba.njit(rhs)
+    return _rhs_cache[key]
+
+
+# Drop-in for the solve_ivp calls in the wrappers: returns (t_eval, y) with y of shape (n_states, len(t_eval)).
+# method is 'RK45' (adaptive Dormand-Prince) or 'rk4' (fixed step). If Numba cannot compile fun, the
+# pure-NumPy steppers are used instead. fun may also be an ODESystem, whose rhs_into is compiled and
+# whose own params are used as args. If the integration fails, the output up to the failure is returned, as
+# solve_ivp does; full_output=True also returns solve_ivp's status (0 or -1) and message.
+def solve_compiled(fun, t_span, y0, t_eval=None, args=(), method='RK45', rtol=1e-3, atol=1e-6, substeps=10,
+                   full_output=False):
+    if method not in _python_kernels:
+        raise ValueError("The compiled backend supports method='RK45' or 'rk4'")
+    into = isinstance(fun, ODESystem)
+    if into:
+        fun, args = fun.rhs_into, fun.params
+    y0 = np.atleast_1d(np.asarray(y0, dtype=np.float64))
+    t0, t1 = float(t_span[0]), float(t_span[1])
+    t_eval = np.asarray([t0, t1] if t_eval is None else t_eval, dtype=np.float64)
+    if np.any((t_eval - t0) * (t_eval - t1) > 0):
+        raise ValueError("Values in t_eval are not within t_span")
+    # y0 holds at t_span[0]; when t_eval starts later, integrate from there and drop that first row
+    offset = int(t_eval[0] != t0)
+    grid = np.concatenate([[t0], t_eval]) if offset else t_eval
+    args = tuple(float(a) for a in args)
+    out = np.empty((grid.size, y0.size))
+    extra = (rtol, atol, out, C, A, B, E) if method == 'RK45' else (int(substeps), out)
+
+    start = time.perf_counter()
+    key = _cache_key(fun)
+    result = None
+    if method in _compiled_kernels and key not in _uncompilable:
+        try:
+            result = _compiled_kernels[method](compile_rhs(fun, into), grid, y0, args, *extra)
+        except Exception:  # Numba's typing and lowering errors, and the plain exceptions some features raise
+            # while compiling; a genuine error in fun is raised again by the Python stepper below
+            _uncompilable.add(key)
+    if result is None:
+        python_rhs = _python_rhs_into(fun) if into else _python_rhs(fun)
+        with np.errstate(all='ignore'):  # Non-finite values are handled by the step control, as in compiled code
+            result = _python_kernels[method](python_rhs, grid, y0, args, *extra)
+    nfev, status, filled = result
+    filled = max(filled - offset, 0)
+    out = out[offset:]
+    status = -1 if status else 0  # solve_ivp reports every failure as -1
+    message = MESSAGES[result[1]]
+    if Instrumentation.enabled():
+        Instrumentation.emit({'solver': 'solve_compiled', 'method': method, 'n_states': y0.size,
+                              't_span': (float(t_span[0]), float(t_span[1])), 'nfev': int(nfev), 'status': status,
+                              'message': message, 'compiled': key not in _uncompilable and method in _compiled_kernels,
+                              'wall_time': time.perf_counter() - start})
+    if full_output:
+        return t_eval[:filled], out[:filled].T, status, message
+    return t_eval[:filled], out[:filled].T
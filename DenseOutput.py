@@ -0,0 +1,41 @@
+from collections import OrderedDict
+import numpy as np
+
+
+# Lightweight handle on a solve that was run once with dense_output=True.
+# Evaluating at new times uses the stored interpolant instead of re-integrating, and resampled
+# grids are kept in a small LRU cache so repeated zoom/resample queries are free.
+class DenseSolution:
+    def __init__(self, sol, t_span, squeeze=False, cache_size=32):
+        self.sol = sol  # Callable t -> (n_components, len(t)), e.g. the OdeSolution from solve_ivp
+        self.t_span = (float(t_span[0]), float(t_span[1]))
+        self.squeeze = squeeze  # Return 1-D values for single-component problems
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    # Evaluate at arbitrary times in one vectorized call
+    def __call__(self, t_vals):
+        t_vals = np.asarray(t_vals, dtype=float)
+        lo, hi = min(self.t_span), max(self.t_span)
+        if t_vals.size and (t_vals.min() < lo or t_vals.max() > hi):
+            raise ValueError(f"Requested times fall outside the solved span {self.t_span}")
+        y_vals = np.asarray(self.sol(t_vals))
+        return y_vals[0] if self.squeeze and y_vals.ndim > t_vals.ndim else y_vals
+
+    # Uniform grid over [start, stop] (the whole span by default), cached per (start, stop, num_points)
+    def resample(self, num_points=100, start=None, stop=None):
+        start = self.t_span[0] if start is None else float(start)
+        stop = self.t_span[1] if stop is None else float(stop)
+        key = (start, stop, int(num_points))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        t_vals = np.linspace(start, stop, num_points)
+        result = (t_vals, self(t_vals))
+        for array in result:
+            array.setflags(write=False)  # Cached results are shared between callers
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
@@ -0,0 +1,166 @@
+import functools
+import importlib
+
+
+# Headless entry points for every solver module. Nothing here prompts, prints or plots, and the solver
+# modules themselves (with numpy/scipy/sympy) are only imported the first time one of them is needed.
+@functools.lru_cache(maxsize=None)
+def _module(name):
+    return importlib.import_module(name)
+
+
+# Right-hand sides that specs may name as strings, per module, so specs stay plain data. Only these names
+# resolve: a spec must not reach arbitrary module attributes such as the interactive main().
+NAMED_FUNCTIONS = {
+    '1stODE': ('equation1', 'system_of_equations', 'system_of_equations_system'),
+}
+
+
+def _resolve_function(module_name, eq_func):
+    if isinstance(eq_func, str):
+        if eq_func not in NAMED_FUNCTIONS.get(module_name, ()):
+            raise ValueError(f"Unknown function '{eq_func}'. Choose one of {list(NAMED_FUNCTIONS[module_name])}")
+        return getattr(_module(module_name), eq_func)
+    return eq_func
+
+
+# First-order ODEs (1stODE.py)
+def solve_single_first_order(eq_func, y0, x_span, num_points=100, **options):
+    eq_func = _resolve_function('1stODE', eq_func)
+    return _module('1stODE').solve_single_first_order(eq_func, x_span[0], y0, x_span, num_points, **options)
+
+
+def solve_system_first_order(eq_func, y0, x_span, num_points=100, **options):
+    eq_func = _resolve_function('1stODE', eq_func)
+    return _module('1stODE').solve_system_first_order(eq_func, x_span[0], y0, x_span, num_points, **options)
+
+
+# Second-order ODE (2ndODE.py)
+def solve_second_order_ode(x_span, y0, z0, num_points=100, **options):
+    return _module('2ndODE').solve_second_order_ode(x_span, y0, z0, num_points, **options)
+
+
+# Damped harmonic oscillator (HarmonicOscillatorODE.py)
+def solve_harmonic_oscillator(x0, v0, omega0, zeta, t_span, num_points=100, **options):
+    return _module('HarmonicOscillatorODE').solve_harmonic_oscillator(x0, v0, omega0, zeta, t_span, num_points,
+                                                                      **options)
+
+
+def solve_harmonic_oscillator_batch(x0, v0, omega0, zeta, t_span, num_points=100, **options):
+    return _module('HarmonicOscillatorODE').solve_harmonic_oscillator_batch(x0, v0, omega0, zeta, t_span,
+                                                                            num_points, **options)
+
+
+def solve_harmonic_oscillator_until(x0, v0, omega0, zeta, t_span, num_points=100, **options):
+    return _module('HarmonicOscillatorODE').solve_harmonic_oscillator_until(x0, v0, omega0, zeta, t_span,
+                                                                            num_points=num_points, **options)
+
+
+# Newton's law of cooling (NewtonCoolingLaw.py)
+def solve_newtons_cooling(T0, T_ambient, k, t_span, num_points=100, **options):
+    return _module('NewtonCoolingLaw').solve_newtons_cooling(T0, T_ambient, k, t_span, num_points, **options)
+
+
+def solve_newtons_cooling_until(T0, T_ambient, k, t_span, num_points=100, **options):
+    return _module('NewtonCoolingLaw').solve_newtons_cooling_until(T0, T_ambient, k, t_span, num_points=num_points,
+                                                                   **options)
+
+
+# Clamped beam boundary value problem (BoundaryValueProblem.py)
+def solve_beam_bvp(L, load_type, num_points=100, **options):
+    return _module('BoundaryValueProblem').solve_beam_bvp(L, load_type, num_points, **options)
+
+
+# Symbolic solvers (EnhancedDiffEqSolver.py); kind is one of EnhancedDiffEqSolver.ODE_BUILDERS
+def solve_symbolic(kind, coefficients, x0=None, y0=None, dy0=None):
+    solver = _module('EnhancedDiffEqSolver')
+    if y0 is None:
+        return solver.general_solution(kind, *coefficients)
+    return solver.particular_solution(kind, coefficients, x0, y0, dy0)
+
+
+def compile_symbolic(kind, coefficients, x0, y0, dy0=None):
+    return _module('EnhancedDiffEqSolver').compile_solution(kind, coefficients, x0, y0, dy0)
+
+
+# Symbolic solve with a time budget in seconds and a numeric fallback; kind may also be 'separable' or 'exact'.
+# Returns a report saying which path produced the solution and how long each took.
+def solve_symbolic_with_budget(kind, coefficients, x0, y0, dy0=None, budget=None, **options):
+    solver = _module('EnhancedDiffEqSolver')
+    budget = solver.SYMBOLIC_BUDGET if budget is None else budget
+    return solver.solve_with_budget(kind, coefficients, x0, y0, dy0, budget, **options)
+
+
+def solve_separable(g_y, h_x):
+    return _module('EnhancedDiffEqSolver').separable_solution(g_y, h_x)
+
+
+def solve_exact(M_x_y, N_x_y):
+    return _module('EnhancedDiffEqSolver').exact_solution(M_x_y, N_x_y)
+
+
+# Implicit solutions (ImplicitSolutions.py): kind is 'separable' (coefficients g(y), h(x)) or 'exact' (M, N).
+# Returns x_vals, y on the branch through (x0, y0) (NaN where it does not reach) and where that branch ended.
+def solve_implicit(kind, coefficients, x0, y0, x_span, num_points=100, **options):
+    implicit = _module('ImplicitSolutions')
+    x_vals = _module('numpy').linspace(x_span[0], x_span[1], num_points)
+    y_vals, branch_ends = implicit.solve_implicit(implicit.implicit_relation(kind, coefficients), x0, y0, x_vals,
+                                                  **options)
+    return x_vals, y_vals, branch_ends
+
+
+# Any ODE given as an expression in y(x) (DiffEqIdentifier.py): classified, then routed to the cheapest solver
+def classify_ode(expr):
+    return _module('DiffEqIdentifier').get_ode_type(expr)
+
+
+def solve_ode(expr, x_span=None, y0=None, num_points=100, **options):
+    return _module('DiffEqIdentifier').solve_ode(expr, x_span, y0, num_points, **options)
+
+
+# Monte Carlo ensembles (Ensemble.py): model is 'newtons_cooling' or 'harmonic_oscillator', parameters map each
+# model parameter to a value or a distribution such as ('normal', 20, 2)
+def run_ensemble(model, parameters, n_samples, t_span, num_points=100, **options):
+    t_vals = _module('numpy').linspace(t_span[0], t_span[1], num_points)
+    return _module('Ensemble').run_ensemble(model, parameters, n_samples, t_vals, **options)
+
+
+# Parameter fits to measured traces with exact sensitivities (ParameterFitting.py); a 2-D data array fits many
+# traces sharing t_data at once
+def fit_newtons_cooling(t_data, T_data, k, T_ambient, **options):
+    return _module('ParameterFitting').fit_newtons_cooling(t_data, T_data, k, T_ambient, **options)
+
+
+def fit_harmonic_oscillator(t_data, x_data, omega0, zeta, **options):
+    return _module('ParameterFitting').fit_harmonic_oscillator(t_data, x_data, omega0, zeta, **options)
+
+
+# Problem specs are dicts such as {'problem': 'harmonic_oscillator', 'x0': 1, 'v0': 0, ...}
+PROBLEMS = {
+    'single_first_order': solve_single_first_order,
+    'system_first_order': solve_system_first_order,
+    'second_order': solve_second_order_ode,
+    'harmonic_oscillator': solve_harmonic_oscillator,
+    'harmonic_oscillator_batch': solve_harmonic_oscillator_batch,
+    'harmonic_oscillator_until': solve_harmonic_oscillator_until,
+    'newtons_cooling': solve_newtons_cooling,
+    'newtons_cooling_until': solve_newtons_cooling_until,
+    'beam_bvp': solve_beam_bvp,
+    'symbolic': solve_symbolic,
+    'symbolic_budgeted': solve_symbolic_with_budget,
+    'separable': solve_separable,
+    'exact': solve_exact,
+    'implicit': solve_implicit,
+    'ode': solve_ode,
+    'ensemble': run_ensemble,
+    'fit_newtons_cooling': fit_newtons_cooling,
+    'fit_harmonic_oscillator': fit_harmonic_oscillator,
+}
+
+
+def solve(spec):
+    spec = dict(spec)
+    problem = spec.pop('problem', None)
+    if problem not in PROBLEMS:
+        raise ValueError(f"Unknown problem '{problem}'. Choose one of {sorted(PROBLEMS)}")
+    return PROBLEMS[problem](**spec)
@@ -1,4 +1,135 @@
-def get_ode_type():
+import functools
+import numpy as np
+import sympy as sp
+from DsolveCache import cached_dsolve
+from EnhancedDiffEqSolver import (ODE_BUILDERS, exact_solution, general_solution, particular_solution,
+                                  separable_solution)
+from StiffSolver import solve_ivp_auto
+
+# dsolve hints that map onto the structural types below, most specific first. 'constant_coefficient' is
+# reported as 'second_order_constant' for second-order equations.
+HINT_TYPES = (('separable', 'separable'), ('1st_exact', 'exact'), ('1st_linear', 'first_order_linear'),
+              ('1st_homogeneous_coeff_subs_dep_div_indep', 'homogeneous'),
+              ('nth_linear_constant_coeff_homogeneous', 'constant_coefficient'),
+              ('nth_linear_constant_coeff_undetermined_coefficients', 'constant_coefficient'),
+              ('nth_linear_constant_coeff_variation_of_parameters', 'constant_coefficient'))
+# Hints that only give truncated series or run slow heuristic searches; the numeric path is preferred over them
+AVOIDED_HINTS = ('1st_power_series', '2nd_power_series_ordinary', '2nd_power_series_regular', 'lie_group',
+                 'nth_algebraic')
+
+
+# Parse an ODE given as a sympy expression (= 0), an Eq, or a string in y(x), e.g. "y(x).diff(x) + 2*x*y(x)"
+def _ode_expression(expr):
+    x = sp.symbols('x')
+    if isinstance(expr, str):
+        expr = sp.sympify(expr, locals={'x': x, 'y': sp.Function('y')})
+    if isinstance(expr, sp.Equality):
+        expr = expr.lhs - expr.rhs
+    return sp.sympify(expr)
+
+
+# Plain symbols for y, dy/dx, ... so the equation can be treated as an algebraic expression.
+# Order 1 uses y (as the separable and exact solvers expect), order 2 uses y and z = dy/dx like 2ndODE.py.
+def _state_symbols(order):
+    if order <= 2:
+        return sp.symbols('y z')[:order]
+    return sp.symbols(f'y0:{order}')
+
+
+# Classification of F(x, y, y', ...) = 0: the structural checks run first and classify_ode only when
+# none of them applies. Memoized per expression, since sympy expressions hash by structure.
+@functools.lru_cache(maxsize=256)
+def _classify(F):
+    x = sp.symbols('x')
+    y = sp.Function('y')(x)
+    order = sp.ode_order(F, y)
+    info = {'order': order, 'type': 'nonlinear', 'types': (), 'route': 'numeric', 'coefficients': (),
+            'hint': None, 'derivative': None}
+    if order == 0:
+        raise ValueError("The expression does not contain a derivative of y(x)")
+
+    # Replace y, y', ... by symbols and D by the highest derivative, highest first
+    state = _state_symbols(order)
+    D = sp.Symbol('D')
+    G = F.subs(sp.Derivative(y, (x, order)), D)
+    for k in range(order - 1, 0, -1):
+        G = G.subs(sp.Derivative(y, (x, k)), state[k])
+    G = G.subs(y, state[0])
+
+    # Solve for the highest derivative; the cheap case is an equation linear in it
+    A = sp.diff(G, D)
+    if not A.has(D):
+        derivative = sp.simplify(-G.subs(D, 0) / A)
+    else:
+        roots = sp.solve(G, D)
+        derivative = roots[0] if len(roots) == 1 else None
+    info['derivative'] = derivative
+
+    types = []
+    routes = []
+    if order == 1 and derivative is not None:
+        Y = state[0]
+        # Linear first: its closed form is explicit and it also gives particular solutions
+        slope = sp.diff(derivative, Y)
+        if not slope.has(Y):
+            types.append('first_order_linear')
+            routes.append(('first_order_linear', (-slope, sp.simplify(derivative.subs(Y, 0))), None))
+        separated = sp.separatevars(derivative, symbols=(x, Y), dict=True)
+        if separated is not None:
+            types.append('separable')
+            routes.append(('separable', (separated['coeff'] * separated[Y], separated[x]), None))
+        if not A.has(D):
+            M, N = G.subs(D, 0), A
+            if sp.simplify(sp.diff(M, Y) - sp.diff(N, x)) == 0:
+                types.append('exact')
+                routes.append(('exact', (M, N), None))
+        t = sp.Symbol('t', positive=True)
+        if sp.simplify(derivative.subs({x: t * x, Y: t * Y}, simultaneous=True) - derivative) == 0:
+            types.append('homogeneous')
+            # The substitution v = y/x; sympy's '1st_homogeneous_coeff_best' can recurse without end
+            routes.append(('dsolve', (), '1st_homogeneous_coeff_subs_dep_div_indep'))
+    elif order == 2 and not A.has(D):
+        Y, Z = state
+        a, b, c = A, sp.diff(G, Z), sp.diff(G, Y)
+        if not any(coefficient.has(Y, Z, D) for coefficient in (a, b, c)):
+            f = sp.simplify(-G.subs({D: 0, Z: 0, Y: 0}))
+            if not any(coefficient.has(x) for coefficient in (a, b, c)):
+                types.append('second_order_constant')
+                if f == 0:
+                    routes.append(('second_order_linear', (a, b, c), None))
+                else:
+                    routes.append(('second_order_nonhomogeneous', (a, b, c, f), None))
+            else:
+                types.append('second_order_linear')
+
+    if not routes:
+        # Nothing structural applies: ask sympy, and keep the numeric path if it has no method either
+        hints = [hint for hint in sp.classify_ode(sp.Eq(F, 0), y)
+                 if not hint.endswith('_Integral') and hint not in AVOIDED_HINTS]
+        for hint, name in HINT_TYPES:
+            if name == 'constant_coefficient' and order == 2:
+                name = 'second_order_constant'
+            if hint in hints and name not in types:
+                types.append(name)
+        if hints:
+            routes.append(('dsolve', (), hints[0]))
+    if types:
+        info['type'] = types[0]
+    info['types'] = tuple(types)
+    if routes:
+        info['route'], info['coefficients'], info['hint'] = routes[0]
+    return info
+
+
+# Classify an ODE. Without an expression this runs the interactive guide. Given one (see _ode_expression), it
+# returns a dict with the order, the primary type and every type that applies (separable, exact,
+# first_order_linear, homogeneous, second_order_constant, second_order_linear, constant_coefficient for higher
+# orders, nonlinear), and the cheapest
+# route to solve it: an EnhancedDiffEqSolver core with its coefficients, 'dsolve' with a hint, or 'numeric'.
+def get_ode_type(expr=None):
+    if expr is not None:
+        return dict(_classify(_ode_expression(expr)))
+
     print("Welcome to the ODE Solver Guide!")
     print("Let's start by identifying the type of your ODE.\n")
 
@@ -89,6 +220,51 @@ def solve_second_order():
         return None
 
 
+# Right-hand side fun(x, state) of the equivalent first-order system, built once per equation
+@functools.lru_cache(maxsize=256)
+def _numeric_rhs(F):
+    info = _classify(F)
+    if info['derivative'] is None:
+        raise ValueError("Cannot solve the equation for its highest derivative")
+    x = sp.symbols('x')
+    state = _state_symbols(info['order'])
+    highest = sp.lambdify((x, state), info['derivative'], 'numpy')
+
+    def fun(x_val, values):
+        return np.append(values[1:], highest(x_val, values))
+
+    return fun
+
+
+# Solve an ODE along the route get_ode_type picks.
+# Without initial values the symbolic routes return the general (or implicit) sympy solution.
+# With x_span and y0 = [y(x0), y'(x0), ...] the linear kinds return their particular solution; every other
+# equation, or any equation when numeric=True, is integrated numerically and returns (x_vals, y_vals).
+def solve_ode(expr, x_span=None, y0=None, num_points=100, method='RK45', numeric=False):
+    F = _ode_expression(expr)
+    info = _classify(F)
+    route, coefficients = info['route'], info['coefficients']
+    has_initial_values = x_span is not None and y0 is not None
+
+    if route in ODE_BUILDERS and has_initial_values and not numeric:
+        y0 = np.atleast_1d(np.asarray(y0, dtype=float))
+        return particular_solution(route, coefficients, x_span[0], y0[0], y0[1] if y0.size > 1 else None)
+    if numeric or route == 'numeric' or has_initial_values:
+        if not has_initial_values:
+            raise ValueError("The numeric path needs x_span and initial values y0")
+        x_eval = np.linspace(x_span[0], x_span[1], num_points)
+        solution = solve_ivp_auto(_numeric_rhs(F), x_span, y0, method=method, t_eval=x_eval)
+        return solution.t, solution.y
+    if route == 'separable':
+        return separable_solution(*coefficients)
+    if route == 'exact':
+        return exact_solution(*coefficients)
+    if route in ODE_BUILDERS:
+        return general_solution(route, *coefficients)
+    x = sp.symbols('x')
+    return cached_dsolve(sp.Eq(F, 0), sp.Function('y')(x), hint=info['hint'])
+
+
 # Main function to guide through solving ODE
 def main():
     print("This is an interactive guide to help you determine how to solve your ODE.")
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+import sympy as sp
+
+# Lookups between two writes of the batched access times and counters
+FLUSH_EVERY = 64
+
+
+# Persistent, content-addressed cache of dsolve results shared by every process using the same directory.
+# Pickled solutions live in one SQLite file; WAL mode and IMMEDIATE transactions make concurrent workers safe.
+# Lookups only read, so they never wait on each other: access times and hit/miss counts are kept in memory and
+# written in batches.
+class DsolveCache:
+    def __init__(self, directory, max_bytes=64 * 2 ** 20):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "dsolve_cache.sqlite")
+        self.max_bytes = max_bytes
+        self.hits = 0  # Counters for this process; totals across processes are kept in the database
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+        self._accessed = {}  # key -> last access time not yet written
+        self._pending = {"hits": 0, "misses": 0}
+
+    # One connection per process, reopened after a fork
+    def _connect(self):
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS entries "
+                               "(key TEXT PRIMARY KEY, solution BLOB, size INTEGER, last_access REAL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+            connection.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+            self._connection = connection
+            self._pid = os.getpid()
+            self._accessed = {}
+            self._pending = {"hits": 0, "misses": 0}
+        return self._connection
+
+    # Key from the canonical srepr of the ODE moved to one side, the unknown function and the hint
+    @staticmethod
+    def key(ode, func, hint="default"):
+        expr = sp.expand(ode.lhs - ode.rhs) if isinstance(ode, sp.Eq) else sp.expand(ode)
+        text = "|".join([sp.srepr(expr), sp.srepr(func), hint])
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key):
+        connection = self._connect()
+        row = connection.execute("SELECT solution FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            self._pending["misses"] += 1
+        else:
+            self.hits += 1
+            self._pending["hits"] += 1
+            self._accessed[key] = time.time()
+        if sum(self._pending.values()) >= FLUSH_EVERY:
+            self._try_flush(connection)
+        return None if row is None else pickle.loads(row[0])
+
+    # Write the batched access times and counters inside the caller's write transaction
+    def _flush(self, connection):
+        connection.executemany("UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                               [(accessed, key) for key, accessed in self._accessed.items()])
+        connection.executemany("UPDATE counters SET value = value + ? WHERE name = ?",
+                               [(count, name) for name, count in self._pending.items() if count])
+        self._accessed = {}
+        self._pending = {"hits": 0, "misses": 0}
+
+    # Best-effort flush from a lookup: if another process holds the write lock the batch is kept for later
+    def _try_flush(self, connection):
+        try:
+            connection.execute("PRAGMA busy_timeout = 0")
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                self._flush(connection)
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute("PRAGMA busy_timeout = 30000")
+
+    def put(self, key, solution):
+        blob = pickle.dumps(solution)
+        connection = self._connect()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                               (key, blob, len(blob), time.time()))
+            self._flush(connection)  # Eviction needs the recent access times
+            self._evict(connection)
+
+    # Drop least recently used entries until the total size fits in max_bytes
+    def _evict(self, connection):
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in connection.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def dsolve(self, ode, func, hint="default"):
+        key = self.key(ode, func, hint)
+        solution = self.get(key)
+        if solution is None:
+            solution = sp.dsolve(ode, func, hint=hint)
+            self.put(key, solution)
+        return solution
+
+    def stats(self):
+        connection = self._connect()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            self._flush(connection)
+        counters = dict(connection.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "total_hits": counters["hits"],
+                "total_misses": counters["misses"], "entries": entries, "bytes": size}
+
+    def clear(self):
+        connection = self._connect()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("DELETE FROM entries")
+            connection.execute("UPDATE counters SET value = 0")
+            self._accessed = {}
+            self._pending = {"hits": 0, "misses": 0}
+
+
+# Process-wide cache, enabled by configure_dsolve_cache or the DIFFEQ_DSOLVE_CACHE_DIR environment variable
+_cache = None
+
+
+def configure_dsolve_cache(directory, max_bytes=64 * 2 ** 20):
+    global _cache
+    _cache = DsolveCache(directory, max_bytes) if directory else None
+    return _cache
+
+
+def get_dsolve_cache():
+    global _cache
+    if _cache is None and os.environ.get("DIFFEQ_DSOLVE_CACHE_DIR"):
+        _cache = DsolveCache(os.environ["DIFFEQ_DSOLVE_CACHE_DIR"])
+    return _cache
+
+
+# Drop-in replacement for sp.dsolve that goes through the disk cache when one is configured
+def cached_dsolve(ode, func, hint="default"):
+    cache = get_dsolve_cache()
+    if cache is None:
+        return sp.dsolve(ode, func, hint=hint)
+    return cache.dsolve(ode, func, hint)
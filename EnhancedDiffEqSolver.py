@@ -1,10 +1,260 @@
+import ast
+import functools
+import re
+import time
 import numpy as np
 import sympy as sp
-import matplotlib.pyplot as plt
-from scipy.integrate import solve_ivp
+from DsolveCache import cached_dsolve
+from ImplicitSolutions import ImplicitCurve
+from Streaming import stream_solution
+from SymbolicPool import get_pool
 
 
-def solve_first_order_linear_ode():
+# Builders for the ODE kinds solved with dsolve, keyed by kind name
+ODE_BUILDERS = {
+    'first_order_linear': lambda x, y, P_x, Q_x: sp.Eq(sp.Derivative(y, x) + P_x * y, Q_x),
+    'second_order_linear': lambda x, y, a, b, c: sp.Eq(
+        a * sp.Derivative(y, x, 2) + b * sp.Derivative(y, x) + c * y, 0),
+    'second_order_nonhomogeneous': lambda x, y, a, b, c, f_x: sp.Eq(
+        a * sp.Derivative(y, x, 2) + b * sp.Derivative(y, x) + c * y, f_x),
+}
+
+
+# dsolve hints per kind, so linear equations always come back in explicit form
+ODE_HINTS = {'first_order_linear': '1st_linear'}
+
+
+# Coefficients are converted to exact rationals so 1 and 1.0 give the same equation
+def _canonical(coefficient):
+    return sp.nsimplify(sp.sympify(coefficient), rational=True)
+
+
+# Canonical key for an equation: its kind plus the srepr of every coefficient (P, Q, a, b, c, f)
+def ode_key(kind, *coefficients):
+    if kind not in ODE_BUILDERS:
+        raise ValueError(f"Unknown ODE kind '{kind}'. Choose one of {sorted(ODE_BUILDERS)}")
+    return (kind,) + tuple(sp.srepr(_canonical(c)) for c in coefficients)
+
+
+# Build the sympy ODE for a given kind and coefficients
+def build_ode(kind, *coefficients):
+    x = sp.symbols('x')
+    y = sp.Function('y')(x)
+    return ODE_BUILDERS[kind](x, y, *(_canonical(c) for c in coefficients))
+
+
+# General solution via dsolve, memoized per canonical equation in memory and, when configured, on disk
+@functools.lru_cache(maxsize=128)
+def _general_solution(key):
+    x = sp.symbols('x')
+    return cached_dsolve(build_ode(*key), sp.Function('y')(x), hint=ODE_HINTS.get(key[0], 'default'))
+
+
+def general_solution(kind, *coefficients):
+    return _general_solution(ode_key(kind, *coefficients))
+
+
+# Evaluate an expression at x = x0, where definite integrals starting at x0 vanish
+def _value_at(expr, x, x0):
+    return expr.subs(x, x0).replace(
+        lambda e: isinstance(e, sp.Integral) and e.limits[0][1] == e.limits[0][2], lambda e: sp.S.Zero)
+
+
+# Apply the initial conditions to the general solution and solve for the constants
+def particular_solution(kind, coefficients, x0, y0, dy0=None):
+    x, s = sp.symbols('x s')
+    solution = general_solution(kind, *coefficients)
+    constants = sorted((c for c in solution.rhs.free_symbols if re.fullmatch(r'C\d+', c.name)),
+                       key=lambda c: c.name)
+
+    # Integrals dsolve could not do are rewritten as definite integrals from x0, absorbed into the constants
+    rhs = solution.rhs.replace(
+        lambda e: isinstance(e, sp.Integral) and len(e.limits) == 1 and len(e.limits[0]) == 1,
+        lambda e: sp.Integral(e.function.subs(x, s), (s, x0, x)))
+
+    conditions = [sp.Eq(_value_at(rhs, x, x0), y0)]
+    if dy0 is not None:
+        conditions.append(sp.Eq(_value_at(sp.diff(rhs, x), x, x0), dy0))
+
+    values = sp.solve(conditions, constants, dict=True)
+    if not values:
+        raise ValueError("Could not determine the constants from the initial conditions")
+    return sp.Eq(solution.lhs, rhs.subs(values[0]))
+
+
+# Compiled NumPy callable y(x) for the particular solution, memoized per equation and initial conditions
+@functools.lru_cache(maxsize=128)
+def _compiled_solution(key, x0, y0, dy0):
+    kind, *coefficients = key
+    solution = particular_solution(kind, coefficients, x0, y0, dy0)
+    func = sp.lambdify(sp.symbols('x'), solution.rhs, ['scipy', 'numpy'])
+    if solution.rhs.has(sp.Integral):
+        # Remaining integrals are evaluated point by point with scipy's quad
+        func = np.vectorize(func, otypes=[float])
+
+    def evaluate(x_vals):
+        x_vals = np.asarray(x_vals, dtype=float)
+        return np.broadcast_to(np.real_if_close(func(x_vals)), x_vals.shape).astype(float)
+
+    return evaluate
+
+
+def compile_solution(kind, coefficients, x0, y0, dy0=None):
+    return _compiled_solution(ode_key(kind, *coefficients), float(x0), float(y0),
+                              None if dy0 is None else float(dy0))
+
+
+# Implicit general solution of dy/dx = g(y)*h(x): integral of 1/g(y) dy = integral of h(x) dx
+def separable_solution(g_y, h_x):
+    x, y = sp.symbols('x y')
+    return sp.Eq(sp.integrate(1 / sp.sympify(g_y), y), sp.integrate(sp.sympify(h_x), x))
+
+
+# Implicit general solution Psi(x, y) = 0 of M(x, y)dx + N(x, y)dy = 0, or None if the equation is not exact
+def exact_solution(M_x_y, N_x_y):
+    x, y = sp.symbols('x y')
+    M_expr = sp.sympify(M_x_y)
+    N_expr = sp.sympify(N_x_y)
+
+    # Check if the equation is exact: dM/dy == dN/dx
+    if sp.simplify(sp.diff(M_expr, y) - sp.diff(N_expr, x)) != 0:
+        return None
+
+    # Psi = integral of M dx + integral of (N - d/dy integral of M dx) dy
+    M_integral = sp.integrate(M_expr, x)
+    Psi = M_integral + sp.integrate(sp.simplify(N_expr - sp.diff(M_integral, y)), y)
+    return sp.Eq(Psi, 0)
+
+
+# Seconds a budgeted symbolic solve may run before its worker is killed and the numeric fallback is used
+SYMBOLIC_BUDGET = 10.0
+# Length of the x interval the numeric fallback covers when no end point is given
+NUMERIC_SPAN = 10.0
+
+# Highest derivative per kind from x, y, z = dy/dx and the coefficient values, for the numeric fallback
+FALLBACK_DERIVATIVES = {
+    'separable': lambda x, y, z, g_y, h_x: g_y * h_x,
+    'exact': lambda x, y, z, M, N: -M / N,
+    'first_order_linear': lambda x, y, z, P_x, Q_x: Q_x - P_x * y,
+    'second_order_linear': lambda x, y, z, a, b, c: -(b * z + c * y) / a,
+    'second_order_nonhomogeneous': lambda x, y, z, a, b, c, f_x: (f_x - b * z - c * y) / a,
+}
+# Functions available to user expressions in the numeric fallback, under their sympy and NumPy names
+NUMERIC_NAMESPACE = {'__builtins__': {}, 'pi': np.pi, 'E': np.e, 'e': np.e, 'Abs': np.abs, 'abs': np.abs,
+                     'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
+                     **{name: getattr(np, name) for name in ('sin', 'cos', 'tan', 'exp', 'log', 'sqrt', 'sinh', 'cosh',
+                                                             'tanh', 'arcsin', 'arccos', 'arctan')}}
+
+
+# Compile a user expression for plain floating-point evaluation, without sympy. Integer literals become
+# floats, so input such as 9**9**9**9 overflows at once instead of stalling on exact arithmetic.
+def _numeric_expression(expression):
+    tree = ast.parse(str(expression).replace('^', '**'), mode='eval')
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            node.value = float(node.value)
+    return compile(tree, '<input>', 'eval')
+
+
+# Raised by the numeric fallback's right-hand side to stop the integration where the derivative breaks down
+class _Breakdown(Exception):
+    pass
+
+
+# Numeric solution (x_vals, y_vals) of any kind in FALLBACK_DERIVATIVES from the initial conditions at x0.
+# If the integration breaks down (e.g. at a singularity or an overflow) the values up to that point are returned;
+# full_output=True also returns the reason, or None when x_end was reached.
+def numeric_solution(kind, coefficients, x0, y0, dy0=None, x_end=None, num_points=100, method='RK45',
+                     full_output=False):
+    codes = [_numeric_expression(c) for c in coefficients]
+    derivative = FALLBACK_DERIVATIVES[kind]
+
+    def highest(x, y, z):
+        try:
+            with np.errstate(all='ignore'):  # Python float arithmetic raises instead, e.g. OverflowError
+                value = derivative(x, y, z, *(eval(code, NUMERIC_NAMESPACE, {'x': x, 'y': y}) for code in codes))
+        except (ArithmeticError, ValueError) as exc:
+            raise _Breakdown(f"The derivative cannot be evaluated at x = {x:g}, y = {y:g}: {exc}") from None
+        if not np.isfinite(value):  # solve_ivp would keep shrinking the step forever on NaN
+            raise _Breakdown(f"The derivative is not finite at x = {x:g}, y = {y:g}")
+        return value
+
+    if kind.startswith('second_order'):
+        fun, initial_conditions = (lambda t, s: [s[1], highest(t, s[0], s[1])]), [y0, dy0]
+    else:
+        fun, initial_conditions = (lambda t, s: [highest(t, s[0], 0.0)]), [y0]
+
+    # Streamed one grid point at a time, so every point computed before a breakdown is kept
+    x_end = x0 + NUMERIC_SPAN if x_end is None else x_end
+    x_vals, y_vals, message = [float(x0)], [float(y0)], None
+    try:
+        for x_chunk, y_chunk in stream_solution(fun, (x0, x_end), initial_conditions, num_points, chunk_size=1,
+                                                method=method):
+            if x_chunk[0] != x0:
+                x_vals.append(x_chunk[0])
+                y_vals.append(y_chunk[0, 0])
+    except (_Breakdown, RuntimeError) as exc:  # RuntimeError: the step size collapsed
+        message = str(exc)
+    if full_output:
+        return np.array(x_vals), np.array(y_vals), message
+    return np.array(x_vals), np.array(y_vals)
+
+
+# The symbolic solve for a kind, run inside a pool worker
+def _symbolic_task(kind, coefficients, x0, y0, dy0):
+    if kind == 'separable':
+        return separable_solution(*coefficients)
+    if kind == 'exact':
+        return exact_solution(*coefficients)
+    return particular_solution(kind, coefficients, x0, y0, dy0)
+
+
+# Symbolic solve in a killable worker with a time budget in seconds. When it overruns, fails, or finds the
+# equation is not exact, the numeric fallback runs from the same initial conditions instead; if that breaks down
+# too, its reason is added to 'error' and the solution holds the values up to the breakdown (or is None).
+# Returns {'path': 'symbolic' or 'numeric', 'solution', 'symbolic_time', 'numeric_time', 'error'}.
+def solve_with_budget(kind, coefficients, x0, y0, dy0=None, budget=SYMBOLIC_BUDGET, x_end=None, num_points=100):
+    report = {'path': 'symbolic', 'solution': None, 'symbolic_time': None, 'numeric_time': None, 'error': None}
+    start = time.perf_counter()
+    try:
+        report['solution'] = get_pool().run(_symbolic_task, (kind, tuple(coefficients), x0, y0, dy0), budget)
+        if report['solution'] is None:
+            report['error'] = "The equation is not exact"
+    except TimeoutError:
+        report['error'] = f"Symbolic solve exceeded the {budget} s budget"
+    except Exception as exc:
+        report['error'] = f"Symbolic solve failed: {exc!r}"
+    report['symbolic_time'] = time.perf_counter() - start
+
+    if report['error'] is not None:
+        start = time.perf_counter()
+        report['path'] = 'numeric'
+        report['solution'] = None
+        try:
+            x_vals, y_vals, failure = numeric_solution(kind, coefficients, x0, y0, dy0, x_end, num_points,
+                                                       full_output=True)
+            report['solution'] = (x_vals, y_vals)
+        except Exception as exc:  # e.g. an expression that does not parse
+            failure = repr(exc)
+        if failure is not None:
+            report['error'] += f"; the numeric solve stopped: {failure}"
+        report['numeric_time'] = time.perf_counter() - start
+    return report
+
+
+def _print_report(report):
+    if report['path'] == 'numeric':
+        print(f"\n{report['error']} after {report['symbolic_time']:.2f} s; "
+              f"solved numerically in {report['numeric_time']:.3f} s instead.")
+        if report['solution'] is not None:
+            x_vals, y_vals = report['solution']
+            print(f"y({x_vals[-1]:g}) = {y_vals[-1]:.6g}")
+    else:
+        print(f"\nSolved symbolically in {report['symbolic_time']:.2f} s:")
+        sp.pprint(report['solution'])
+
+
+def solve_first_order_linear_ode(compiled=False):
     print("Let's solve a first-order linear ODE of the form:")
     print("dy/dx + P(x)y = Q(x)")
 
@@ -16,23 +266,22 @@ def solve_first_order_linear_ode():
     x0 = float(input("Enter the initial value of x (e.g., 0): "))
     y0 = float(input(f"Enter the initial value of y at x = {x0} (e.g., 1): "))
 
-    # Define symbols
-    x = sp.symbols('x')
-    y = sp.Function('y')(x)
-
-    # Convert P(x) and Q(x) to sympy expressions
-    P_x_expr = sp.sympify(P_x)
-    Q_x_expr = sp.sympify(Q_x)
-
     # Formulate the equation
-    ode = sp.Eq(sp.Derivative(y, x) + P_x_expr * y, Q_x_expr)
+    ode = build_ode('first_order_linear', P_x, Q_x)
 
     # Display the equation
     print("\nYour equation is:")
     sp.pprint(ode)
 
+    if compiled:
+        # Apply the initial condition and compile the result to a NumPy function
+        solution = particular_solution('first_order_linear', (P_x, Q_x), x0, y0)
+        print("\nThe particular solution is:")
+        sp.pprint(solution)
+        return solution, compile_solution('first_order_linear', (P_x, Q_x), x0, y0)
+
     # Solve the ODE
-    solution = sp.dsolve(ode, y)
+    solution = general_solution('first_order_linear', P_x, Q_x)
 
     # Display the solution
     print("\nThe general solution is:")
@@ -41,7 +290,23 @@ def solve_first_order_linear_ode():
     return solution
 
 
-def solve_separable_ode():
+# With a budget (seconds) the symbolic solve runs in a killable worker and falls back to a numeric
+# solution from the initial conditions; the report from solve_with_budget is returned
+# Fix the constant of an implicit general solution from the initial condition and print the particular solution.
+# The returned ImplicitCurve evaluates y on any x grid; None when (x0, y0) does not fix a branch.
+def _particular_curve(relation, x0, y0):
+    try:
+        curve = ImplicitCurve(relation, x0, y0)
+    except ValueError as error:
+        print(f"\nThe initial condition does not fix a solution: {error}")
+        return None
+    print(f"\nThe solution through ({x0}, {y0}) is:")
+    sp.pprint(curve.relation)
+    return curve
+
+
+# With compiled=True the general solution is returned together with its ImplicitCurve through (x0, y0)
+def solve_separable_ode(budget=None, compiled=False):
     print("Let's solve a separable ODE of the form:")
     print("dy/dx = g(y)*h(x)")
 
@@ -53,30 +318,37 @@ def solve_separable_ode():
     x0 = float(input("Enter the initial value of x (e.g., 0): "))
     y0 = float(input(f"Enter the initial value of y at x = {x0} (e.g., 1): "))
 
+    if budget is not None:
+        # The input is only parsed inside the worker, where a pathological expression can be killed
+        print(f"\nYour equation is:\ndy/dx = ({g_y})*({h_x})")
+        report = solve_with_budget('separable', (g_y, h_x), x0, y0, budget=budget)
+        _print_report(report)
+        return report
+
     # Define symbols
     x, y = sp.symbols('x y')
 
-    # Convert g(y) and h(x) to sympy expressions
-    g_y_expr = sp.sympify(g_y)
-    h_x_expr = sp.sympify(h_x)
-
     # Solve using separation of variables
-    ode = sp.Eq(sp.Derivative(y, x), g_y_expr * h_x_expr)
+    ode = sp.Eq(sp.Derivative(y, x), sp.sympify(g_y) * sp.sympify(h_x))
 
     print("\nYour equation is:")
     sp.pprint(ode)
 
     # Solve for y
-    separated_ode = sp.Eq(sp.integrate(1 / g_y_expr, y), sp.integrate(h_x_expr, x))
+    separated_ode = separable_solution(g_y, h_x)
 
     # Display the solution
     print("\nThe general solution is:")
     sp.pprint(separated_ode)
 
+    curve = _particular_curve(separated_ode, x0, y0)
+    if compiled:
+        return separated_ode, curve
     return separated_ode
 
 
-def solve_exact_ode():
+# Budget and compiled work as in solve_separable_ode
+def solve_exact_ode(budget=None, compiled=False):
     print("Let's solve an exact ODE of the form:")
     print("M(x, y)dx + N(x, y)dy = 0")
 
@@ -84,31 +356,32 @@ def solve_exact_ode():
     M_x_y = input("Enter M(x, y) (e.g., '2*x*y + y^2'): ")
     N_x_y = input("Enter N(x, y) (e.g., 'x^2 + 2*x*y'): ")
 
-    # Define symbols
-    x, y = sp.symbols('x y')
+    # Get initial conditions
+    x0 = float(input("Enter the initial value of x (e.g., 1): "))
+    y0 = float(input(f"Enter the initial value of y at x = {x0} (e.g., 1): "))
 
-    # Convert M(x, y) and N(x, y) to sympy expressions
-    M_expr = sp.sympify(M_x_y)
-    N_expr = sp.sympify(N_x_y)
+    if budget is not None:
+        report = solve_with_budget('exact', (M_x_y, N_x_y), x0, y0, budget=budget)
+        _print_report(report)
+        return report
 
-    # Check if the equation is exact: dM/dy == dN/dx
-    dM_dy = sp.diff(M_expr, y)
-    dN_dx = sp.diff(N_expr, x)
+    solution = exact_solution(M_x_y, N_x_y)
 
-    if dM_dy == dN_dx:
+    if solution is not None:
         print("\nThe equation is exact. Proceeding with the solution.")
-        Psi = sp.integrate(M_expr, x) + sp.integrate(N_expr - sp.diff(M_expr, y), y)
-        solution = sp.Eq(Psi, 0)
-
         print("\nThe general solution is:")
         sp.pprint(solution)
+        curve = _particular_curve(solution, x0, y0)
     else:
         print("\nThe equation is not exact.")
+        curve = None
 
+    if compiled:
+        return solution, curve
     return solution
 
 
-def solve_second_order_linear_ode():
+def solve_second_order_linear_ode(compiled=False):
     print("Let's solve a second-order linear homogeneous ODE of the form:")
     print("a*d²y/dx² + b*dy/dx + c*y = 0")
 
@@ -122,19 +395,22 @@ def solve_second_order_linear_ode():
     y0 = float(input(f"Enter the initial value of y at x = {x0} (e.g., 1): "))
     dy0 = float(input(f"Enter the initial value of dy/dx at x = {x0} (e.g., 0): "))
 
-    # Define symbols
-    x = sp.symbols('x')
-    y = sp.Function('y')(x)
-
     # Define the second-order ODE
-    ode = sp.Eq(a * sp.Derivative(y, x, 2) + b * sp.Derivative(y, x) + c * y, 0)
+    ode = build_ode('second_order_linear', a, b, c)
 
     # Display the ODE
     print("\nYour equation is:")
     sp.pprint(ode)
 
+    if compiled:
+        # Apply the initial conditions and compile the result to a NumPy function
+        solution = particular_solution('second_order_linear', (a, b, c), x0, y0, dy0)
+        print("\nThe particular solution is:")
+        sp.pprint(solution)
+        return solution, compile_solution('second_order_linear', (a, b, c), x0, y0, dy0)
+
     # Solve the ODE using sympy's dsolve function
-    solution = sp.dsolve(ode, y)
+    solution = general_solution('second_order_linear', a, b, c)
 
     # Display the general solution
     print("\nThe general solution is:")
@@ -143,7 +419,8 @@ def solve_second_order_linear_ode():
     return solution
 
 
-def solve_second_order_nonhomogeneous_ode():
+# With a budget the particular solution is found in a killable worker (see solve_separable_ode)
+def solve_second_order_nonhomogeneous_ode(compiled=False, budget=None):
     print("Let's solve a second-order linear non-homogeneous ODE of the form:")
     print("a*d²y/dx² + b*dy/dx + c*y = f(x)")
 
@@ -158,20 +435,28 @@ def solve_second_order_nonhomogeneous_ode():
     y0 = float(input(f"Enter the initial value of y at x = {x0} (e.g., 1): "))
     dy0 = float(input(f"Enter the initial value of dy/dx at x = {x0} (e.g., 0): "))
 
-    # Define symbols
-    x = sp.symbols('x')
-    y = sp.Function('y')(x)
+    if budget is not None:
+        print(f"\nYour equation is:\n{a:g}*y'' + {b:g}*y' + {c:g}*y = {f_x}")
+        report = solve_with_budget('second_order_nonhomogeneous', (a, b, c, f_x), x0, y0, dy0, budget=budget)
+        _print_report(report)
+        return report
 
     # Define the non-homogeneous ODE
-    f_x_expr = sp.sympify(f_x)
-    ode = sp.Eq(a * sp.Derivative(y, x, 2) + b * sp.Derivative(y, x) + c * y, f_x_expr)
+    ode = build_ode('second_order_nonhomogeneous', a, b, c, f_x)
 
     # Display the ODE
     print("\nYour equation is:")
     sp.pprint(ode)
 
+    if compiled:
+        # Apply the initial conditions and compile the result to a NumPy function
+        solution = particular_solution('second_order_nonhomogeneous', (a, b, c, f_x), x0, y0, dy0)
+        print("\nThe particular solution is:")
+        sp.pprint(solution)
+        return solution, compile_solution('second_order_nonhomogeneous', (a, b, c, f_x), x0, y0, dy0)
+
     # Solve the ODE using sympy's dsolve function
-    solution = sp.dsolve(ode, y)
+    solution = general_solution('second_order_nonhomogeneous', a, b, c, f_x)
 
     # Display the general solution
     print("\nThe general solution is:")
@@ -0,0 +1,244 @@
+import concurrent.futures
+import os
+import time
+import numpy as np
+from scipy import stats
+from scipy.stats import qmc
+
+# Monte Carlo uncertainty propagation. Parameters are drawn in the parent (seeded, plain or Sobol), each batch
+# is evaluated with a vectorized closed form in a worker, and only per-batch summaries come back: running
+# moments and a quantile sketch per output point. Memory is O(n_times) whatever the number of samples.
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+DEFAULT_COMPRESSION = 100
+
+
+# Uncertain parameters are given as ('uniform', low, high), ('normal', mean, std) or ('lognormal', median, sigma);
+# anything else is a fixed value. Uniform draws in [0, 1) are mapped through the inverse CDF, so the plain and
+# Sobol samplers share one path.
+def _inverse_cdf(spec, u):
+    kind = spec[0]
+    if kind == 'uniform':
+        return spec[1] + (spec[2] - spec[1]) * u
+    if kind == 'normal':
+        return stats.norm.ppf(u, loc=spec[1], scale=spec[2])
+    if kind == 'lognormal':
+        return spec[1] * np.exp(spec[2] * stats.norm.ppf(u))
+    raise ValueError(f"Unknown distribution '{kind}'. Choose 'uniform', 'normal' or 'lognormal'")
+
+
+def _is_uncertain(spec):
+    return isinstance(spec, (tuple, list)) and len(spec) == 3 and isinstance(spec[0], str)
+
+
+def _cooling_batch(t_vals, T0, T_ambient, k):
+    from NewtonCoolingLaw import newtons_cooling_exact
+    return newtons_cooling_exact(T0, T_ambient, k, t_vals)
+
+
+def _oscillator_batch(t_vals, x0, v0, omega0, zeta):
+    from HarmonicOscillatorODE import damped_oscillator_exact
+    return damped_oscillator_exact(t_vals, x0, v0, omega0, zeta)
+
+
+# Vectorized models: parameter names in call order, and f(t_vals, *params) -> (batch, *output_shape)
+MODELS = {
+    'newtons_cooling': (('T0', 'T_ambient', 'k'), _cooling_batch),
+    'harmonic_oscillator': (('x0', 'v0', 'omega0', 'zeta'), _oscillator_batch),
+}
+
+
+# Per-point count, mean and M2 (Welford), updated a whole batch at a time and merged with Chan's formula
+class RunningStats:
+    def __init__(self, shape):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        batch = RunningStats(self.mean.shape)
+        batch.count = values.shape[0]
+        batch.mean = values.mean(axis=0)
+        batch.m2 = ((values - batch.mean) ** 2).sum(axis=0)
+        batch.min = values.min(axis=0)
+        batch.max = values.max(axis=0)
+        self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / count)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.count * other.count / count)
+        self.count = count
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    def variance(self, ddof=1):
+        return self.m2 / max(self.count - ddof, 1)
+
+
+# Per-point quantile sketch in the manner of a t-digest: at most `compression` weighted centroids per point,
+# sized by the arcsine scale so the tails keep more resolution than the middle. Every point is handled at once:
+# centroids are rows of a (n_points, compression) array.
+class QuantileSketch:
+    def __init__(self, shape, compression=DEFAULT_COMPRESSION):
+        self.shape = tuple(shape)
+        self.compression = compression
+        n_points = int(np.prod(self.shape))
+        self.means = np.zeros((n_points, 0))
+        self.weights = np.zeros((n_points, 0))
+        self.min = np.full(n_points, np.inf)
+        self.max = np.full(n_points, -np.inf)
+
+    # A raw batch has unit weights, so a plain sort orders it; it is compressed on its own before merging
+    def update(self, values):
+        values = np.ascontiguousarray(np.asarray(values, dtype=float).reshape(values.shape[0], -1).T)
+        values.sort(axis=1)
+        batch = QuantileSketch(self.shape, self.compression)
+        batch.means, batch.weights = batch._compress(values, np.ones_like(values))
+        batch.min, batch.max = values[:, 0], values[:, -1]
+        self.merge(batch)
+
+    def merge(self, other):
+        means = np.concatenate([self.means, other.means], axis=1)
+        weights = np.concatenate([self.weights, other.weights], axis=1)
+        order = np.argsort(means, axis=1, kind='stable')
+        self.means, self.weights = self._compress(np.take_along_axis(means, order, axis=1),
+                                                  np.take_along_axis(weights, order, axis=1))
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    # Pool sorted centroids into at most `compression` per point, bucketed by the arcsine scale of their
+    # cumulative weight
+    def _compress(self, means, weights):
+        if means.shape[1] <= self.compression:
+            return means, weights
+        total = weights.sum(axis=1, keepdims=True)
+        q = (np.cumsum(weights, axis=1) - 0.5 * weights) / total
+        bucket = np.minimum((self.compression * (np.arcsin(2 * q - 1) / np.pi + 0.5)).astype(int),
+                            self.compression - 1)
+        flat = (bucket + self.compression * np.arange(means.shape[0])[:, None]).ravel()
+        size = means.shape[0] * self.compression
+        pooled = np.bincount(flat, weights.ravel(), size).reshape(-1, self.compression)
+        sums = np.bincount(flat, (weights * means).ravel(), size).reshape(-1, self.compression)
+        with np.errstate(invalid='ignore'):
+            means = np.where(pooled > 0, sums / pooled, 0.0)
+        return means, pooled  # Empty buckets keep weight 0 and drop out of every later sum
+
+    # Interpolated quantiles, shape (len(qs), *shape); centroid masses are centred on their means and the
+    # ends are pinned to the exact minimum and maximum
+    def quantile(self, qs):
+        weights = self.weights
+        total = weights.sum(axis=1, keepdims=True)
+        centres = np.cumsum(weights, axis=1) - 0.5 * weights
+        positions = np.concatenate([np.zeros_like(total), centres, total], axis=1)
+        values = np.concatenate([self.min[:, None], self.means, self.max[:, None]], axis=1)
+        keep = np.concatenate([np.ones_like(total, dtype=bool), weights > 0, np.ones_like(total, dtype=bool)], axis=1)
+        results = []
+        for q in np.atleast_1d(qs):
+            target = q * total[:, 0]
+            row = np.empty(len(total))
+            for i in range(len(total)):
+                row[i] = np.interp(target[i], positions[i, keep[i]], values[i, keep[i]])
+            results.append(row.reshape(self.shape))
+        return np.array(results)
+
+
+# Runs in a worker: evaluate one batch and summarise it
+def _summarise_batch(model, t_vals, params, compression):
+    values = MODELS[model][1](t_vals, *params)
+    moments = RunningStats(values.shape[1:])
+    moments.update(values)
+    sketch = QuantileSketch(values.shape[1:], compression)
+    sketch.update(values)
+    return moments, sketch
+
+
+# Parameter batches of at most batch_size samples: every parameter of the model in call order, uncertain ones
+# drawn from their distributions. 'sobol' uses a scrambled Sobol sequence, with batch_size rounded up to a power
+# of two so every batch keeps the sequence's balance.
+def sample_batches(model, parameters, n_samples, batch_size=1024, seed=0, sampler='random'):
+    names = MODELS[model][0]
+    missing = [name for name in names if name not in parameters]
+    if missing:
+        raise ValueError(f"Missing parameters for {model}: {missing}")
+    uncertain = [name for name in names if _is_uncertain(parameters[name])]
+    dim = len(uncertain) or 1
+    if sampler == 'sobol':
+        batch_size = 1 << int(np.ceil(np.log2(max(batch_size, 1))))
+        sobol = qmc.Sobol(dim, scramble=True, seed=seed)
+        draw = lambda size: sobol.random(batch_size)[:size]
+    elif sampler == 'random':
+        rng = np.random.default_rng(seed)
+        draw = lambda size: rng.random((size, dim))
+    else:
+        raise ValueError("sampler must be 'random' or 'sobol'")
+
+    produced = 0
+    while produced < n_samples:
+        size = min(batch_size, n_samples - produced)
+        u = draw(size)
+        columns = {name: _inverse_cdf(parameters[name], u[:, j]) for j, name in enumerate(uncertain)}
+        yield tuple(columns[name] if name in columns else np.full(size, float(parameters[name])) for name in names)
+        produced += size
+
+
+# Monte Carlo ensemble of a model (a key of MODELS) over t_vals. parameters maps every model parameter to a
+# value or a distribution (see _inverse_cdf), e.g. {'T0': 100, 'T_ambient': ('normal', 20, 2),
+# 'k': ('uniform', 0.05, 0.15)}. Batches run on `processes` workers (0 evaluates here) with at most two
+# batches per worker in flight. Returns a dict with t, n_samples, mean, std, min, max, the requested quantiles
+# (shape (len(quantiles), *output_shape)), elapsed time and samples_per_second.
+def run_ensemble(model, parameters, n_samples, t_vals, batch_size=1024, processes=None, seed=0, sampler='random',
+                 quantiles=DEFAULT_QUANTILES, compression=DEFAULT_COMPRESSION):
+    t_vals = np.asarray(t_vals, dtype=float)
+    batches = sample_batches(model, parameters, n_samples, batch_size, seed, sampler)
+    moments = sketch = None
+    start = time.perf_counter()
+
+    def absorb(summary):
+        nonlocal moments, sketch
+        if moments is None:
+            moments, sketch = summary
+        else:
+            moments.merge(summary[0])
+            sketch.merge(summary[1])
+
+    if processes == 0:
+        for params in batches:
+            absorb(_summarise_batch(model, t_vals, params, compression))
+    else:
+        processes = processes or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+            pending = []
+            for params in batches:
+                pending.append(pool.submit(_summarise_batch, model, t_vals, params, compression))
+                if len(pending) >= 2 * processes:
+                    absorb(pending.pop(0).result())  # Merged in submission order, so results do not depend on timing
+            for future in pending:
+                absorb(future.result())
+
+    elapsed = time.perf_counter() - start
+    if moments is None:
+        raise ValueError("n_samples must be positive")
+    return {'t': t_vals, 'n_samples': moments.count, 'mean': moments.mean, 'std': np.sqrt(moments.variance()),
+            'min': moments.min, 'max': moments.max, 'quantile_levels': tuple(quantiles),
+            'quantiles': sketch.quantile(quantiles), 'elapsed': elapsed, 'samples_per_second': moments.count / elapsed}
+
+
+# Samples per second of an oscillator ensemble for each worker count
+def benchmark_scaling(n_samples=200000, num_points=500, process_counts=None, batch_size=4096):
+    process_counts = process_counts or sorted({0, 1, 2, os.cpu_count() or 1})
+    parameters = {'x0': 1.0, 'v0': 0.0, 'omega0': ('normal', 2.0, 0.1), 'zeta': ('uniform', 0.05, 0.2)}
+    t_vals = np.linspace(0, 20, num_points)
+    return {processes: run_ensemble('harmonic_oscillator', parameters, n_samples, t_vals, batch_size,
+                                    processes)['samples_per_second'] for processes in process_counts}
+
+
+if __name__ == "__main__":
+    print(f"{os.cpu_count()} CPU(s)")
+    for processes, rate in benchmark_scaling().items():
+        print(f"processes={processes}: {rate:,.0f} samples/s")
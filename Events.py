@@ -0,0 +1,36 @@
+import numpy as np
+
+# Event functions for solve_ivp's events= option. Each is called as event(t, y, *args) and stops the
+# integration when it crosses zero in the given direction (terminal events stop at the first crossing).
+
+
+def terminal(event, direction=0):
+    event.terminal = True
+    event.direction = direction
+    return event
+
+
+# y[index] crosses value (direction -1: from above, +1: from below, 0: either way)
+def threshold_event(index, value, direction=0):
+    return terminal(lambda t, y, *args: y[index] - value, direction)
+
+
+# The norm of the selected components (all by default) falls below tol
+def norm_below_event(tol, indices=None):
+    def event(t, y, *args):
+        y = np.asarray(y, dtype=float)
+        return np.linalg.norm(y if indices is None else y[list(indices)]) - tol
+    return terminal(event, -1)
+
+
+# Steady state: the norm of dy/dt = fun(t, y, *args) falls below tol
+def derivative_norm_event(fun, tol):
+    def event(t, y, *args):
+        return np.linalg.norm(np.asarray(fun(t, np.asarray(y, dtype=float), *args), dtype=float)) - tol
+    return terminal(event, -1)
+
+
+# Time of the first terminal event in a solve_ivp result, or None if no event fired
+def first_event_time(solution):
+    times = [t_events[0] for t_events in (solution.t_events or []) if len(t_events)]
+    return min(times) if times else None
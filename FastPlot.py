@@ -0,0 +1,200 @@
+import concurrent.futures
+import io
+import os
+import tempfile
+import time
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Headless rendering of solutions to PNG. A FastPlotter owns one Agg figure and keeps its Line2D objects,
+# so each new plot only swaps the data instead of building a figure through pyplot. Long series are reduced
+# to the min and max of every pixel column before drawing, which looks the same at the output resolution.
+
+# Axis labels, series labels, colors and line styles of the plot_* functions in the solver modules
+STYLES = {
+    'single_first_order': {'xlabel': 'x', 'ylabel': 'y(x)', 'labels': ('y(x)',), 'colors': ('b',),
+                           'title': "First-Order ODE Solution"},
+    'system_first_order': {'xlabel': 'x', 'ylabel': 'Solution Variables', 'labels': ('y1(x)', 'y2(x)'),
+                           'title': "System of First-Order ODEs Solution"},
+    'second_order': {'xlabel': 'x', 'ylabel': 'Solution', 'labels': ('y(x)', 'dy/dx (z)'), 'colors': ('b', 'r'),
+                     'linestyles': ('-', '--'), 'title': "Second-Order ODE Solution"},
+    'newtons_cooling': {'xlabel': 'Time (t)', 'ylabel': 'Temperature (T)', 'labels': ('Temperature (T)',),
+                        'colors': ('b',), 'title': "Newton's Law of Cooling"},
+    'harmonic_oscillator': {'xlabel': 'Time (t)', 'ylabel': 'Solution',
+                            'labels': ('Displacement (x)', 'Velocity (v)'), 'colors': ('b', 'r'),
+                            'linestyles': ('-', '--'), 'title': "Damped Harmonic Oscillator"},
+    'beam_deflection': {'xlabel': 'x', 'ylabel': 'Deflection (y)', 'labels': ('Deflection (y)',), 'colors': ('b',),
+                        'title': "Beam Deflection under Load"},
+}
+DEFAULT_FIGSIZE = (6.4, 4.8)
+DEFAULT_DPI = 100
+# zlib level for the PNGs: encoding at matplotlib's default of 6 costs about a quarter of a render
+PNG_COMPRESS_LEVEL = 1
+
+
+# Keep the first and last point and, in each of `buckets` equal runs of points, the minimum and the maximum
+# (in their original order). A line through them covers the same pixels as the full series.
+def decimate(x_vals, y_vals, buckets):
+    x = np.asarray(x_vals, dtype=float)
+    y = np.asarray(y_vals, dtype=float)
+    n = y.size
+    if buckets < 1 or n <= 2 * buckets:
+        return x, y
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    blocks = np.concatenate([y, np.full(buckets * size - n, y[-1])]).reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    extremes = np.sort(np.stack([blocks.argmin(axis=1), blocks.argmax(axis=1)], axis=1), axis=1) + offsets[:, None]
+    index = np.unique(np.concatenate([[0], np.minimum(extremes.ravel(), n - 1), [n - 1]]))
+    return x[index], y[index]
+
+
+class FastPlotter:
+    def __init__(self, figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI, decimate=True):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.axes.grid(True)
+        self.decimate = decimate
+        self.lines = []
+        self._legend_labels = None
+
+    def _line(self, i):
+        while len(self.lines) <= i:
+            self.lines.append(self.axes.plot([], [])[0])
+        return self.lines[i]
+
+    # Put a solution on the axes: y_vals is one series (n,) or several (n_series, n) sharing x_vals.
+    # style is a key of STYLES; title and labels override the style's.
+    def draw(self, x_vals, y_vals, style='single_first_order', title=None, labels=None):
+        style = STYLES[style]
+        labels = labels or style['labels']
+        colors = style.get('colors', ())
+        linestyles = style.get('linestyles', ())
+        y = np.asarray(y_vals, dtype=float)
+        series = y.reshape(-1, y.shape[-1])
+        buckets = int(self.axes.bbox.width)
+
+        for i, y_series in enumerate(series):
+            line = self._line(i)
+            line.set_data(*(decimate(x_vals, y_series, buckets) if self.decimate else (x_vals, y_series)))
+            line.set_label(labels[i] if i < len(labels) else f"y{i + 1}")
+            line.set_color(colors[i] if i < len(colors) else f"C{i}")
+            line.set_linestyle(linestyles[i] if i < len(linestyles) else '-')
+            line.set_visible(True)
+        for line in self.lines[len(series):]:
+            line.set_visible(False)
+            line.set_label('_hidden')  # Underscore labels stay out of the legend
+
+        self.axes.relim(visible_only=True)
+        self.axes.autoscale_view()
+        self.axes.set_title(title or style['title'])
+        self.axes.set_xlabel(style['xlabel'])
+        self.axes.set_ylabel(style['ylabel'])
+        legend_labels = tuple(line.get_label() for line in self.lines)
+        if legend_labels != self._legend_labels:
+            self.axes.legend(handles=self.lines[:len(series)])
+            self._legend_labels = legend_labels
+
+    # Write the current figure as PNG to filename, or return the PNG bytes when filename is None
+    def save(self, filename=None):
+        if filename is None:
+            buffer = io.BytesIO()
+            self.canvas.print_png(buffer, pil_kwargs={'compress_level': PNG_COMPRESS_LEVEL})
+            return buffer.getvalue()
+        self.canvas.print_png(filename, pil_kwargs={'compress_level': PNG_COMPRESS_LEVEL})
+        return filename
+
+    def render(self, x_vals, y_vals, filename=None, **options):
+        self.draw(x_vals, y_vals, **options)
+        return self.save(filename)
+
+
+_plotter = None
+
+
+# Render one solution with a shared per-process FastPlotter (used by the plot_* functions when given a filename)
+def render_solution(x_vals, y_vals, filename=None, style='single_first_order', title=None, labels=None):
+    global _plotter
+    if _plotter is None:
+        _plotter = FastPlotter()
+    return _plotter.render(x_vals, y_vals, filename, style=style, title=title, labels=labels)
+
+
+def _init_worker(figsize, dpi):
+    global _plotter
+    _plotter = FastPlotter(figsize, dpi)
+
+
+def _render_job(job):
+    job = dict(job)
+    return _plotter.render(job.pop('x_vals'), job.pop('y_vals'), job.pop('filename'), **job)
+
+
+def _render_chunk(jobs):
+    return [_render_job(job) for job in jobs]
+
+
+# Render many solutions to PNG files. Each job is a dict with x_vals, y_vals, filename and optionally
+# style, title and labels. Jobs are split over `processes` worker processes (processes=0 renders here),
+# each with its own reused figure. Returns the filenames, or with wait=False returns at once with one future
+# per chunk of jobs, each resolving to that chunk's filenames.
+def render_batch(jobs, processes=None, figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI, chunksize=None, wait=True):
+    jobs = list(jobs)
+    if processes == 0:
+        _init_worker(figsize, dpi)
+        return [_render_job(job) for job in jobs]
+
+    processes = processes or os.cpu_count() or 1
+    chunksize = chunksize or max(1, len(jobs) // (4 * processes))
+    pool = concurrent.futures.ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(figsize, dpi))
+    futures = [pool.submit(_render_chunk, jobs[start:start + chunksize]) for start in range(0, len(jobs), chunksize)]
+    pool.shutdown(wait=False)  # Queued chunks still run; the workers exit once they are done
+    if not wait:
+        return futures
+    return [filename for future in futures for filename in future.result()]
+
+
+# Time rendering n_plots oscillator solutions of n_points each: a new pyplot figure per plot (what the
+# plot_* functions do, minus show), one reused FastPlotter, and render_batch over a process pool
+def benchmark_rendering(n_plots=1000, n_points=20000, processes=None):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from HarmonicOscillatorODE import damped_oscillator_exact
+
+    t_vals = np.linspace(0, 50, n_points)
+    zetas = np.linspace(0.01, 0.5, n_plots)
+    y_batch = damped_oscillator_exact(t_vals, 1.0, 0.0, 1.0, zetas)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for i in range(n_plots):
+            plt.figure()
+            plt.plot(t_vals, y_batch[i, 0], label='Displacement (x)', color='b')
+            plt.plot(t_vals, y_batch[i, 1], label='Velocity (v)', color='r', linestyle='--')
+            plt.title("Damped Harmonic Oscillator")
+            plt.xlabel('Time (t)')
+            plt.ylabel('Solution')
+            plt.grid(True)
+            plt.legend()
+            plt.savefig(os.path.join(tmp, f"pyplot_{i}.png"))
+            plt.close()
+        results['pyplot_s'] = time.perf_counter() - start
+
+        jobs = [{'x_vals': t_vals, 'y_vals': y_batch[i], 'filename': os.path.join(tmp, f"fast_{i}.png"),
+                 'style': 'harmonic_oscillator'} for i in range(n_plots)]
+        start = time.perf_counter()
+        render_batch(jobs, processes=0)
+        results['reused_figure_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        render_batch(jobs, processes=processes)
+        results['process_pool_s'] = time.perf_counter() - start
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in benchmark_rendering().items():
+        print(f"{name}: {value:.2f}")
@@ -1,6 +1,9 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import solve_ivp
+from Instrumentation import solve_ivp
+from DenseOutput import DenseSolution
+from Events import derivative_norm_event, first_event_time, terminal
+from LTIPropagator import LTISystem, check_grid_output
+from SystemSpec import ODESystem
 
 
 # Define the system of first-order ODEs
@@ -11,20 +14,199 @@ def harmonic_oscillator(t, vars, omega0, zeta):
     return [dxdt, dvdt]
 
 
+# The same system written in place, for one state (2,) or a batch of states (2, m)
+def harmonic_oscillator_into(t, vars, params, out):
+    omega0, zeta = params
+    out[0] = vars[1]
+    out[1] = -2 * zeta * omega0 * vars[1] - omega0 ** 2 * vars[0]
+
+
+harmonic_oscillator_system = ODESystem(harmonic_oscillator_into, 2, params=(1.0, 0.0), state_names=('x', 'v'),
+                                       param_names=('omega0', 'zeta'))
+
+
+# The same system as y' = A y, for exact propagation with method='expm'
+def harmonic_oscillator_lti(omega0, zeta):
+    return LTISystem([[0.0, 1.0], [-omega0 ** 2, -2 * zeta * omega0]])
+
+
 # Function to solve the second-order ODE
-def solve_harmonic_oscillator(x0, v0, omega0, zeta, t_span, num_points=100):
+# method may be any solve_ivp method, or 'auto' to switch to an implicit method when heavily damped or stiff
+# backend='compiled' runs 'RK45' or 'rk4' in compiled code instead (Numba when installed)
+# method='expm' propagates the exact step matrix over the uniform output grid
+# stream=True returns a generator of (t_chunk, y_chunk) pieces of the result, computed as they are consumed
+def solve_harmonic_oscillator(x0, v0, omega0, zeta, t_span, num_points=100, dense=False, method='RK45',
+                              backend='scipy', stream=False):
     # Initial conditions [x(0), dx/dt(0)]
     initial_conditions = [x0, v0]
+    system = harmonic_oscillator_system.with_params(omega0, zeta)
+    if method == 'expm':
+        check_grid_output(dense, stream)
+
+    if stream:
+        return system.stream(t_span, initial_conditions, num_points, method=method)
+
+    if dense:
+        # Solve once and return a solution that can be evaluated anywhere in t_span
+        solution = system.solve(t_span, initial_conditions, method=method, dense_output=True)
+        return DenseSolution(solution.sol, t_span)
+
+    if method == 'expm':
+        return harmonic_oscillator_lti(omega0, zeta).solve(t_span, initial_conditions, num_points)
 
     # Solve using solve_ivp
     t_eval = np.linspace(t_span[0], t_span[1], num_points)
-    solution = solve_ivp(harmonic_oscillator, t_span, initial_conditions, args=(omega0, zeta), t_eval=t_eval)
+    if backend == 'compiled':
+        from CompiledIntegrators import solve_compiled
+        return solve_compiled(harmonic_oscillator, t_span, initial_conditions, t_eval, args=(omega0, zeta),
+                              method=method)
+    solution = system.solve(t_span, initial_conditions, method=method, t_eval=t_eval)
 
     return solution.t, solution.y
 
 
+# Vectorized right-hand side for a stacked batch of oscillators
+def harmonic_oscillator_batch(t, states, omega0, zeta):
+    # states has shape (batch, 2); omega0 and zeta have shape (batch,)
+    x, v = states[:, 0], states[:, 1]
+    derivs = np.empty_like(states)
+    derivs[:, 0] = v
+    derivs[:, 1] = -2 * zeta * omega0 * v - omega0 ** 2 * x
+    return derivs
+
+
+# Closed-form solution of the damped oscillator, evaluated for every (batch, time) pair
+# The initial conditions hold at t0, which defaults to the first time in t_vals
+def damped_oscillator_exact(t_vals, x0, v0, omega0, zeta, t0=None):
+    t = np.asarray(t_vals, dtype=float)[np.newaxis, :]
+    x0, v0, omega0, zeta = (np.asarray(p, dtype=float).reshape(-1, 1) for p in (x0, v0, omega0, zeta))
+    t = t - (t[:, :1] if t0 is None else t0)
+
+    # Write x(t) = x0*C(t) + (v0 + a*x0)*S(t) with C = e^(-at)cos(wd t), S = e^(-at)sin(wd t)/wd
+    a = zeta * omega0
+    wd_sq = omega0 ** 2 * (1 - zeta ** 2)
+    wd = np.sqrt(np.abs(wd_sq))
+    oscillating = wd_sq >= 0
+
+    with np.errstate(all='ignore'):
+        # Under- and critically damped: trig form, sinc keeps wd -> 0 finite
+        decay = np.exp(-a * t)
+        C_trig = decay * np.cos(wd * t)
+        S_trig = decay * t * np.sinc(wd * t / np.pi)
+
+        # Overdamped: hyperbolic form with the exponentials combined to avoid overflow
+        wd_safe = np.where(oscillating, 1.0, wd)
+        fast = np.exp(-(wd + a) * t)
+        slow = np.exp((wd - a) * t)
+        C_hyp = 0.5 * (slow + fast)
+        S_hyp = np.where(wd * t < 1, fast * np.expm1(2 * wd * t), slow - fast) / (2 * wd_safe)
+
+    C = np.where(oscillating, C_trig, C_hyp)
+    S = np.where(oscillating, S_trig, S_hyp)
+    # dC/dt = -a*C - wd^2*S and dS/dt = C - a*S
+    y_vals = np.empty((C.shape[0], 2, C.shape[1]))
+    y_vals[:, 0] = x0 * C + (v0 + a * x0) * S
+    y_vals[:, 1] = v0 * C - (omega0 ** 2 * x0 + a * v0) * S
+    return y_vals
+
+
+# Function to solve many oscillators at once, returning an array of shape (batch, 2, num_points)
+def solve_harmonic_oscillator_batch(x0, v0, omega0, zeta, t_span, num_points=100, method='exact', substeps=10):
+    x0, v0, omega0, zeta = np.broadcast_arrays(*(np.atleast_1d(np.asarray(p, dtype=float))
+                                                 for p in (x0, v0, omega0, zeta)))
+    t_eval = np.linspace(t_span[0], t_span[1], num_points)
+
+    if method == 'exact':
+        return t_eval, damped_oscillator_exact(t_eval, x0, v0, omega0, zeta)
+
+    if method == 'expm':
+        # One step matrix per distinct (omega0, zeta); each group of oscillators is propagated as a block
+        y_vals = np.empty((x0.size, 2, num_points))
+        params, group = np.unique(np.stack([omega0, zeta], axis=1), axis=0, return_inverse=True)
+        for i, (omega0_i, zeta_i) in enumerate(params):
+            members = group.ravel() == i
+            y_vals[members] = harmonic_oscillator_lti(omega0_i, zeta_i).solve(
+                t_span, np.stack([x0[members], v0[members]], axis=1), num_points)[1]
+        return t_eval, y_vals
+
+    if method == 'rk4':
+        # Shared fixed-step RK4: every oscillator advances together, substeps per output interval
+        states = np.stack([x0, v0], axis=1)
+        y_vals = np.empty((states.shape[0], 2, num_points))
+        y_vals[:, :, 0] = states
+        for i in range(1, num_points):
+            h = (t_eval[i] - t_eval[i - 1]) / substeps
+            t = t_eval[i - 1]
+            for _ in range(substeps):
+                k1 = harmonic_oscillator_batch(t, states, omega0, zeta)
+                k2 = harmonic_oscillator_batch(t + h / 2, states + h / 2 * k1, omega0, zeta)
+                k3 = harmonic_oscillator_batch(t + h / 2, states + h / 2 * k2, omega0, zeta)
+                k4 = harmonic_oscillator_batch(t + h, states + h * k3, omega0, zeta)
+                states = states + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+                t += h
+            y_vals[:, :, i] = states
+        return t_eval, y_vals
+
+    # Otherwise use any solve_ivp method on the flattened stacked state (one shared adaptive step)
+    def stacked_rhs(t, flat_states):
+        return harmonic_oscillator_batch(t, flat_states.reshape(-1, 2), omega0, zeta).ravel()
+
+    initial_conditions = np.stack([x0, v0], axis=1).ravel()
+    solution = solve_ivp(stacked_rhs, t_span, initial_conditions, method=method, t_eval=t_eval)
+    return solution.t, solution.y.reshape(-1, 2, solution.t.size)
+
+
+# Energy amplitude sqrt(x^2 + (v/omega0)^2). For zeta >= 0 it never increases, so it falls below a given
+# epsilon exactly once.
+def oscillator_amplitude(x, v, omega0):
+    return np.sqrt(x ** 2 + (v / omega0) ** 2)
+
+
+# Solve only until the motion has died out: amplitude below epsilon or |d(x, v)/dt| below derivative_tol.
+# Returns (t_vals, y_vals, t_event) with num_points samples up to the event (t_event is None if none occurs).
+def solve_harmonic_oscillator_until(x0, v0, omega0, zeta, t_span, epsilon=None, derivative_tol=None, num_points=100,
+                                    method='RK45'):
+    system = harmonic_oscillator_system.with_params(omega0, zeta)
+    events = []
+    if epsilon is not None:
+        events.append(terminal(lambda t, y: oscillator_amplitude(y[0], y[1], omega0) - epsilon, -1))
+    if derivative_tol is not None:
+        events.append(derivative_norm_event(system, derivative_tol))
+    solution = system.solve(t_span, [x0, v0], method=method, events=events or None, dense_output=True)
+    t_vals = np.linspace(t_span[0], solution.t[-1], num_points)
+    return t_vals, solution.sol(t_vals), first_event_time(solution)
+
+
+# Batch settle times: when each oscillator's amplitude first drops to epsilon, without storing trajectories.
+# The amplitude is monotone, so all oscillators are bisected together on the closed form. NaN if an oscillator
+# is still above epsilon at t_max; t0 if it starts below.
+def harmonic_oscillator_settle_times(x0, v0, omega0, zeta, epsilon, t_max, t0=0.0, xtol=1e-9):
+    x0, v0, omega0, zeta, epsilon = np.broadcast_arrays(*(np.atleast_1d(np.asarray(p, dtype=float))
+                                                          for p in (x0, v0, omega0, zeta, epsilon)))
+
+    # Amplitude of every oscillator at its own elapsed time tau
+    def amplitude(tau):
+        y = damped_oscillator_exact([0.0], x0, v0, omega0, zeta, t0=-tau[:, np.newaxis])[:, :, 0]
+        return oscillator_amplitude(y[:, 0], y[:, 1], omega0)
+
+    lo = np.zeros(x0.size)
+    hi = np.full(x0.size, float(t_max - t0))
+    settled = amplitude(lo) <= epsilon
+    never = amplitude(hi) > epsilon
+    for _ in range(max(int(np.ceil(np.log2(max(t_max - t0, xtol) / xtol))), 1)):
+        mid = 0.5 * (lo + hi)
+        below = amplitude(mid) <= epsilon
+        hi = np.where(below, mid, hi)
+        lo = np.where(below, lo, mid)
+    return np.where(never, np.nan, t0 + np.where(settled, 0.0, hi))
+
+
 # Function to plot the solution
-def plot_harmonic_oscillator(t_vals, y_vals, title="Damped Harmonic Oscillator"):
+def plot_harmonic_oscillator(t_vals, y_vals, title="Damped Harmonic Oscillator", filename=None):
+    if filename is not None:
+        from FastPlot import render_solution
+        return render_solution(t_vals, y_vals, filename, style='harmonic_oscillator', title=title)
+    import matplotlib.pyplot as plt
     plt.plot(t_vals, y_vals[0], label='Displacement (x)', color='b')
     plt.plot(t_vals, y_vals[1], label='Velocity (v)', color='r', linestyle='--')
     plt.title(title)
@@ -36,12 +218,13 @@ def plot_harmonic_oscillator(t_vals, y_vals, title="Damped Harmonic Oscillator")
 
 
 # Example usage
-x0 = 1  # Initial displacement
-v0 = 0  # Initial velocity
-omega0 = 1  # Natural frequency
-zeta = 0.1  # Damping ratio
-t_span = (0, 20)  # Time range
-
-t_vals, y_vals = solve_harmonic_oscillator(x0, v0, omega0, zeta, t_span)
-plot_harmonic_oscillator(t_vals, y_vals, title="Damped Harmonic Oscillator")
+if __name__ == "__main__":
+    x0 = 1  # Initial displacement
+    v0 = 0  # Initial velocity
+    omega0 = 1  # Natural frequency
+    zeta = 0.1  # Damping ratio
+    t_span = (0, 20)  # Time range
+
+    t_vals, y_vals = solve_harmonic_oscillator(x0, v0, omega0, zeta, t_span)
+    plot_harmonic_oscillator(t_vals, y_vals, title="Damped Harmonic Oscillator")
 
@@ -0,0 +1,133 @@
+import collections
+import contextlib
+import logging
+import time
+import numpy as np
+from scipy import integrate
+
+# Opt-in solver instrumentation. The solver modules import solve_ivp / solve_bvp from here instead of scipy;
+# while instrumentation is disabled these call straight through to scipy after one global check per solve,
+# so there is no per-evaluation cost. Enabled, every solve emits one record (a dict) to the configured sinks.
+# Instrumentation is per process: solves run in worker pools are not recorded.
+SOLVER_CLASSES = {'RK23': integrate.RK23, 'RK45': integrate.RK45, 'DOP853': integrate.DOP853,
+                  'Radau': integrate.Radau, 'BDF': integrate.BDF, 'LSODA': integrate.LSODA}
+_sinks = None
+
+
+def enabled():
+    return _sinks is not None
+
+
+# Start recording. Records go to callback(record), to logger at INFO level (the record is attached as
+# record.solver_record) and/or to a ring buffer keeping the last buffer_size records, which is returned.
+def enable(callback=None, logger=None, buffer_size=1000):
+    global _sinks
+    buffer = collections.deque(maxlen=buffer_size) if buffer_size else None
+    _sinks = (callback, logger, buffer)
+    return buffer
+
+
+def disable():
+    global _sinks
+    _sinks = None
+
+
+@contextlib.contextmanager
+def instrumented(callback=None, logger=None, buffer_size=1000):
+    global _sinks
+    previous = _sinks
+    buffer = enable(callback, logger, buffer_size)
+    try:
+        yield buffer
+    finally:
+        _sinks = previous
+
+
+def emit(record):
+    if _sinks is None:
+        return
+    callback, logger, buffer = _sinks
+    if buffer is not None:
+        buffer.append(record)
+    if callback is not None:
+        callback(record)
+    if logger is not None:
+        logger.log(logging.INFO, "%s %s: nfev=%s status=%s wall_time=%.3gs", record['solver'],
+                   record.get('method', ''), record.get('nfev'), record.get('status'), record['wall_time'],
+                   extra={'solver_record': record})
+
+
+# Wrap fun so that every evaluation is counted and timed into stats
+def _counting(fun, stats):
+    def counted(*args):
+        start = time.perf_counter()
+        try:
+            return fun(*args)
+        finally:
+            stats['rhs_calls'] += 1
+            stats['rhs_time'] += time.perf_counter() - start
+    return counted
+
+
+# Subclass of a scipy stepper that logs (t, h) for every accepted step
+def _recording_method(method, history):
+    base = SOLVER_CLASSES[method] if isinstance(method, str) else method
+
+    class Recording(base):
+        def _step_impl(self):
+            t_old = self.t
+            success, message = super()._step_impl()
+            if success:
+                history.append((t_old, self.t - t_old))
+            return success, message
+
+    Recording.__name__ = base.__name__
+    return Recording
+
+
+# Step statistics for a record. Scipy's explicit RK steppers spend 2 evaluations getting started and
+# n_stages per attempted step, so rejected steps can be recovered from nfev.
+def _step_stats(history, method, nfev, dense_output):
+    steps = np.array([h for _, h in history])
+    stats = {'n_accepted': steps.size, 'step_times': np.array([t for t, _ in history]), 'steps': steps,
+             'h_min': float(np.abs(steps).min()) if steps.size else None,
+             'h_max': float(np.abs(steps).max()) if steps.size else None, 'n_rejected': None}
+    base = SOLVER_CLASSES.get(method, method)
+    if isinstance(base, type) and issubclass(base, integrate._ivp.rk.RungeKutta) and not (
+            dense_output and base is integrate.DOP853):  # DOP853 spends extra evaluations on dense output
+        stats['n_rejected'] = max(int(round((nfev - 2) / base.n_stages)) - steps.size, 0)
+    return stats
+
+
+def solve_ivp(fun, t_span, y0, method='RK45', **options):
+    if _sinks is None:
+        return integrate.solve_ivp(fun, t_span, y0, method=method, **options)
+
+    counters = {'rhs_calls': 0, 'rhs_time': 0.0}
+    history = []
+    start = time.perf_counter()
+    solution = integrate.solve_ivp(_counting(fun, counters), t_span, y0, method=_recording_method(method, history),
+                                   **options)
+    record = {'solver': 'solve_ivp', 'method': method if isinstance(method, str) else method.__name__,
+              't_span': (float(t_span[0]), float(t_span[1])), 'n_states': int(np.size(y0)),
+              'wall_time': time.perf_counter() - start, 'status': int(solution.status),
+              'message': solution.message, 'nfev': int(solution.nfev), 'njev': int(solution.njev),
+              'nlu': int(solution.nlu), **counters}
+    record.update(_step_stats(history, method, solution.nfev, options.get('dense_output', False)))
+    emit(record)
+    return solution
+
+
+def solve_bvp(fun, bc, x, y, **options):
+    if _sinks is None:
+        return integrate.solve_bvp(fun, bc, x, y, **options)
+
+    counters = {'rhs_calls': 0, 'rhs_time': 0.0}
+    start = time.perf_counter()
+    solution = integrate.solve_bvp(_counting(fun, counters), bc, x, y, **options)
+    emit({'solver': 'solve_bvp', 'method': 'collocation', 't_span': (float(x[0]), float(x[-1])),
+          'n_states': int(np.shape(y)[0]), 'wall_time': time.perf_counter() - start,
+          'status': int(solution.status), 'message': solution.message, 'nfev': counters['rhs_calls'],
+          'niter': int(solution.niter), 'n_nodes': int(solution.x.size),
+          'max_residual': float(np.max(solution.rms_residuals)), **counters})
+    return solution
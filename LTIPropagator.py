@@ -0,0 +1,134 @@
+import timeit
+import numpy as np
+from scipy.linalg import expm
+
+# Exact propagation of linear time-invariant systems y' = A y + b + sum_j (s_j sin(w_j t) + c_j cos(w_j t)).
+# On a uniform grid the step map is the same matrix expm(A_aug dt) for every step, so a whole block of initial
+# conditions advances with one matrix product per output point instead of one adaptive solve per condition.
+
+
+class LTISystem:
+    # sinusoids is a sequence of (omega, s, c) adding s sin(omega t) + c cos(omega t) to the forcing
+    def __init__(self, A, b=None, sinusoids=()):
+        self.A = np.atleast_2d(np.asarray(A, dtype=float))
+        self.dim = self.A.shape[0]
+        self.b = np.zeros(self.dim) if b is None else np.asarray(b, dtype=float).reshape(self.dim)
+        self.sinusoids = tuple((float(omega), np.asarray(s, dtype=float).reshape(self.dim),
+                                np.asarray(c, dtype=float).reshape(self.dim)) for omega, s, c in sinusoids)
+        self._propagators = {}
+
+    # dy/dt for one state (dim,) or a batch (dim, m), matching the solve_ivp convention
+    def __call__(self, t, y):
+        y = np.asarray(y, dtype=float)
+        forcing = self.b + sum(s * np.sin(omega * t) + c * np.cos(omega * t) for omega, s, c in self.sinusoids)
+        return self.A @ y + (forcing if y.ndim == 1 else forcing[:, None])
+
+    # The forcing is generated by extra states that are themselves linear: a constant 1 for b and
+    # (sin, cos) pairs with d/dt (sin, cos) = omega (cos, -sin). The result is a homogeneous system.
+    def augmented_matrix(self):
+        n_extra = 1 + 2 * len(self.sinusoids)
+        A_aug = np.zeros((self.dim + n_extra, self.dim + n_extra))
+        A_aug[:self.dim, :self.dim] = self.A
+        A_aug[:self.dim, self.dim] = self.b
+        for j, (omega, s, c) in enumerate(self.sinusoids):
+            i = self.dim + 1 + 2 * j
+            A_aug[:self.dim, i] = s
+            A_aug[:self.dim, i + 1] = c
+            A_aug[i, i + 1] = omega
+            A_aug[i + 1, i] = -omega
+        return A_aug
+
+    def _augmented_states(self, y0, t0):
+        extra = [1.0]
+        for omega, _, _ in self.sinusoids:
+            extra += [np.sin(omega * t0), np.cos(omega * t0)]
+        states = np.empty((y0.shape[0], self.dim + len(extra)))
+        states[:, :self.dim] = y0
+        states[:, self.dim:] = extra
+        return states
+
+    # expm(A_aug dt), computed once per step size
+    def propagator(self, dt):
+        dt = float(dt)
+        if dt not in self._propagators:
+            self._propagators[dt] = expm(self.augmented_matrix() * dt)
+        return self._propagators[dt]
+
+    # Solve on num_points uniform points of t_span. y0 is one state (dim,), giving (t_eval, y) with y of shape
+    # (dim, num_points) like solve_ivp, or a block (n_ics, dim), giving y of shape (n_ics, dim, num_points).
+    def solve(self, t_span, y0, num_points=100):
+        y0 = np.asarray(y0, dtype=float)
+        single = y0.ndim == 1
+        t_eval = np.linspace(t_span[0], t_span[1], num_points)
+        initial = self._augmented_states(np.atleast_2d(y0), t_span[0])
+        states = np.empty((num_points,) + initial.shape)
+        states[0] = initial
+        if num_points > 1:
+            step = self.propagator(t_eval[1] - t_eval[0]).T
+            for k in range(1, num_points):
+                np.matmul(states[k - 1], step, out=states[k])
+        y_vals = np.ascontiguousarray(states[:, :, :self.dim].transpose(1, 2, 0))
+        return t_eval, (y_vals[0] if single else y_vals)
+
+
+# method='expm' fills the uniform output grid only, so the solver wrappers reject it with dense or stream output
+def check_grid_output(dense=False, stream=False):
+    if dense or stream:
+        raise ValueError("method='expm' gives values on the uniform output grid only; it cannot be combined with "
+                         "dense=True or stream=True")
+
+
+# Probe fun(t, y, *args) for the LTI form: A from unit-vector responses at t_span[0], then A y + b(t) checked
+# against random states at several times, and b(t) = fun(t, 0) fitted as a constant plus sin/cos terms at the
+# given frequencies. Returns an LTISystem, or None when fun is not of that form (to rtol).
+def detect_lti(fun, dim, args=(), t_span=(0.0, 1.0), omegas=(), rtol=1e-9):
+    def f(t, y):
+        return np.asarray(fun(t, y, *args), dtype=float).reshape(dim)
+
+    rng = np.random.default_rng(0)
+    t0, t1 = float(t_span[0]), float(t_span[1])
+    t_probe = np.concatenate([[t0], t0 + (t1 - t0 if t1 != t0 else 1.0) * rng.random(3 + 4 * len(omegas))])
+    zero = np.zeros(dim)
+    try:
+        forcing = np.array([f(t, zero) for t in t_probe])
+        A = np.column_stack([f(t0, unit) - forcing[0] for unit in np.eye(dim)])
+        for t, b_t in zip(t_probe, forcing):
+            for y in rng.standard_normal((2, dim)):
+                expected = A @ y + b_t
+                if not np.allclose(f(t, y), expected, rtol=rtol, atol=rtol * (1 + np.abs(expected).max())):
+                    return None
+    except (TypeError, ValueError, ArithmeticError):  # fun rejected the probe states outright
+        return None
+
+    # Least-squares fit of the forcing samples on [1, sin(w t), cos(w t), ...]
+    basis = np.column_stack([np.ones_like(t_probe)] + [g(omega * t_probe) for omega in omegas
+                                                        for g in (np.sin, np.cos)])
+    coefficients = np.linalg.lstsq(basis, forcing, rcond=None)[0]
+    if not np.allclose(basis @ coefficients, forcing, rtol=rtol, atol=rtol * (1 + np.abs(forcing).max())):
+        return None
+    coefficients[np.abs(coefficients) < rtol * (1 + np.abs(forcing).max())] = 0.0
+    sinusoids = [(omega, coefficients[1 + 2 * j], coefficients[2 + 2 * j]) for j, omega in enumerate(omegas)]
+    return LTISystem(A, coefficients[0], sinusoids)
+
+
+# Time n_ics damped oscillators over num_points points: solve_ivp per initial condition (timed on the first
+# n_loop and scaled up), and one expm propagation of the whole block. Also reports the largest deviation of
+# the propagated block from the closed form.
+def benchmark_propagation(n_ics=10000, num_points=1000, n_loop=50):
+    from HarmonicOscillatorODE import damped_oscillator_exact, harmonic_oscillator_lti, solve_harmonic_oscillator
+
+    omega0, zeta, t_span = 2.0, 0.05, (0.0, 50.0)
+    y0 = np.random.default_rng(0).standard_normal((n_ics, 2))
+    system = harmonic_oscillator_lti(omega0, zeta)
+    loop = lambda: [solve_harmonic_oscillator(x0, v0, omega0, zeta, t_span, num_points) for x0, v0 in y0[:n_loop]]
+    results = {'solve_ivp_s': min(timeit.repeat(loop, number=1, repeat=3)) * n_ics / n_loop,
+               'expm_s': min(timeit.repeat(lambda: system.solve(t_span, y0, num_points), number=1, repeat=3))}
+    t_eval, y_vals = system.solve(t_span, y0, num_points)
+    exact = damped_oscillator_exact(t_eval, y0[:, 0], y0[:, 1], np.full(n_ics, omega0), np.full(n_ics, zeta))
+    results['max_abs_error'] = float(np.abs(y_vals - exact).max())
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in benchmark_propagation().items():
+        print(f"{name}: {value:.3g}")
@@ -1,19 +1,127 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import solve_ivp
+from Instrumentation import solve_ivp
+from DenseOutput import DenseSolution
+from Events import first_event_time, derivative_norm_event, terminal, threshold_event
 
 # Define the ODE based on Newton's Law of Cooling
 def cooling_ode(t, T, T_ambient, k):
     return -k * (T - T_ambient)
 
-# Function to solve the ODE
-def solve_newtons_cooling(T0, T_ambient, k, t_span, num_points=100):
+# Closed-form solution T(t) = T_ambient + (T0 - T_ambient) * exp(-k t), shape (n_objects, n_times)
+# T0 holds at t0, which defaults to the first time in t_vals
+def newtons_cooling_exact(T0, T_ambient, k, t_vals, t0=None):
+    t = np.asarray(t_vals, dtype=float)
+    T0, T_ambient, k = (np.asarray(p, dtype=float).reshape(-1, 1) for p in (T0, T_ambient, k))
+    return T_ambient + (T0 - T_ambient) * np.exp(-k * (t - (t.flat[0] if t0 is None else t0)))
+
+
+# Exact solution for a piecewise-constant ambient schedule
+# ambient_temps[i] holds on [switch_times[i-1], switch_times[i]), with ambient_temps[0] in effect from t_vals[0]
+def newtons_cooling_schedule(T0, k, t_vals, switch_times, ambient_temps):
+    t = np.asarray(t_vals, dtype=float)
+    switch_times = np.asarray(switch_times, dtype=float)
+    ambient_temps = np.asarray(ambient_temps, dtype=float)
+    if ambient_temps.size != switch_times.size + 1:
+        raise ValueError("ambient_temps must have exactly one more entry than switch_times")
+    T0, k = (np.asarray(p, dtype=float).reshape(-1, 1) for p in (T0, k))
+
+    # Temperature at the start of every segment, advanced segment by segment
+    segment_starts = np.concatenate([t[:1], np.maximum(switch_times, t[0])])
+    T_start = np.empty((np.broadcast(T0, k).shape[0], segment_starts.size))
+    T_start[:, 0] = np.broadcast_to(T0, (T_start.shape[0], 1))[:, 0]
+    for i in range(1, segment_starts.size):
+        dt = segment_starts[i] - segment_starts[i - 1]
+        Ta = ambient_temps[i - 1]
+        T_start[:, i] = Ta + (T_start[:, i - 1] - Ta) * np.exp(-k[:, 0] * dt)
+
+    # Evaluate every time point from the start of the segment it falls in
+    segment = np.searchsorted(switch_times, t, side='right')
+    Ta = ambient_temps[segment]
+    return Ta + (T_start[:, segment] - Ta) * np.exp(-k * (t - segment_starts[segment]))
+
+
+# Function to solve the ODE, using the closed form by default or solve_ivp as a cross-check
+def solve_newtons_cooling(T0, T_ambient, k, t_span, num_points=100, method='exact', dense=False):
+    if dense:
+        # Return a solution that can be evaluated anywhere in t_span without re-solving
+        if method == 'exact':
+            return DenseSolution(lambda t: newtons_cooling_exact(T0, T_ambient, k, t, t0=t_span[0]), t_span,
+                                 squeeze=True)
+        solution = solve_ivp(cooling_ode, t_span, [T0], args=(T_ambient, k), dense_output=True)
+        return DenseSolution(solution.sol, t_span, squeeze=True)
+
     t_eval = np.linspace(t_span[0], t_span[1], num_points)
-    solution = solve_ivp(cooling_ode, t_span, [T0], args=(T_ambient, k), t_eval=t_eval)
-    return solution.t, solution.y[0]
+    if method == 'exact':
+        return t_eval, newtons_cooling_exact(T0, T_ambient, k, t_eval)[0]
+    elif method == 'numeric':
+        solution = solve_ivp(cooling_ode, t_span, [T0], args=(T_ambient, k), t_eval=t_eval)
+        return solution.t, solution.y[0]
+    else:
+        raise ValueError("Invalid method. Choose 'exact' or 'numeric'")
+
+# Time at which T reaches T_threshold, vectorized over parameter sets: t0 + ln((T0 - Ta) / (T_threshold - Ta)) / k.
+# NaN where the threshold is never reached (it must lie between T0 and the ambient temperature).
+def cooling_threshold_time(T0, T_ambient, k, T_threshold, t0=0.0):
+    T0, T_ambient, k, T_threshold = np.broadcast_arrays(*(np.asarray(p, dtype=float)
+                                                          for p in (T0, T_ambient, k, T_threshold)))
+    with np.errstate(all='ignore'):
+        ratio = (T0 - T_ambient) / (T_threshold - T_ambient)
+        t = t0 + np.log(ratio) / k
+    return np.where((ratio >= 1) & (k > 0) & np.isfinite(t), t, np.nan)
+
+
+# Time at which the object settles: |T - Ta| <= tol, or |dT/dt| = k |T - Ta| <= derivative_tol.
+# Vectorized over parameter sets; t0 where it starts settled.
+def cooling_settle_time(T0, T_ambient, k, tol=None, derivative_tol=None, t0=0.0):
+    if (tol is None) == (derivative_tol is None):
+        raise ValueError("Give exactly one of tol and derivative_tol")
+    T0, T_ambient, k = np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in (T0, T_ambient, k)))
+    with np.errstate(all='ignore'):
+        # With k = 0 the derivative band is infinite: dT/dt is zero from the start
+        band = tol if tol is not None else np.where(k > 0, derivative_tol / np.where(k > 0, k, 1.0), np.inf)
+        t = t0 + np.maximum(np.log(np.abs(T0 - T_ambient) / band), 0.0) / k
+    return np.where(np.abs(T0 - T_ambient) <= band, t0, np.where(k > 0, t, np.nan))
+
+
+# Solve only until the first requested event: T reaches T_threshold, |T - Ta| <= tol or |dT/dt| <= derivative_tol.
+# Returns (t_vals, T_vals, t_event) with num_points samples up to the event (or the end of t_span when
+# no event occurs, in which case t_event is None).
+def solve_newtons_cooling_until(T0, T_ambient, k, t_span, T_threshold=None, tol=None, derivative_tol=None,
+                                num_points=100, method='exact'):
+    if method == 'exact':
+        times = []
+        if T_threshold is not None:
+            times.append(cooling_threshold_time(T0, T_ambient, k, T_threshold, t_span[0]))
+        if tol is not None:
+            times.append(cooling_settle_time(T0, T_ambient, k, tol=tol, t0=t_span[0]))
+        if derivative_tol is not None:
+            times.append(cooling_settle_time(T0, T_ambient, k, derivative_tol=derivative_tol, t0=t_span[0]))
+        times = [float(t) for t in times if t <= t_span[1]]  # Never-reached events are NaN and drop out
+        t_event = min(times) if times else None
+        t_vals = np.linspace(t_span[0], t_span[1] if t_event is None else t_event, num_points)
+        return t_vals, newtons_cooling_exact(T0, T_ambient, k, t_vals)[0], t_event
+    elif method == 'numeric':
+        events = []
+        if T_threshold is not None:
+            events.append(threshold_event(0, T_threshold))
+        if tol is not None:
+            events.append(terminal(lambda t, T, T_ambient, k: abs(T[0] - T_ambient) - tol, -1))
+        if derivative_tol is not None:
+            events.append(derivative_norm_event(cooling_ode, derivative_tol))
+        solution = solve_ivp(cooling_ode, t_span, [T0], args=(T_ambient, k), events=events or None,
+                             dense_output=True)
+        t_vals = np.linspace(t_span[0], solution.t[-1], num_points)
+        return t_vals, solution.sol(t_vals)[0], first_event_time(solution)
+    else:
+        raise ValueError("Invalid method. Choose 'exact' or 'numeric'")
+
 
 # Plot the solution
-def plot_solution(t_vals, T_vals, title="Newton's Law of Cooling"):
+def plot_solution(t_vals, T_vals, title="Newton's Law of Cooling", filename=None):
+    if filename is not None:
+        from FastPlot import render_solution
+        return render_solution(t_vals, T_vals, filename, style='newtons_cooling', title=title)
+    import matplotlib.pyplot as plt
     plt.plot(t_vals, T_vals, label="Temperature (T)", color='b')
     plt.title(title)
     plt.xlabel('Time (t)')
@@ -23,10 +131,12 @@ def plot_solution(t_vals, T_vals, title="Newton's Law of Cooling"):
     plt.show()
 
 # Example usage
-T0 = 100  # Initial temperature of the object
-T_ambient = 20  # Ambient temperature
-k = 0.1  # Cooling constant
-t_span = (0, 100)  # Time range
+if __name__ == "__main__":
+    T0 = 100  # Initial temperature of the object
+    T_ambient = 20  # Ambient temperature
+    k = 0.1  # Cooling constant
+    t_span = (0, 100)  # Time range
+
+    t_vals, T_vals = solve_newtons_cooling(T0, T_ambient, k, t_span)
+    plot_solution(t_vals, T_vals, title="Newton's Law of Cooling")
 
-t_vals, T_vals = solve_newtons_cooling(T0, T_ambient, k, t_span)
-plot_solution(t_vals, T_vals, title="Newton's Law of Cooling")
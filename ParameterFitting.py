@@ -0,0 +1,309 @@
+import functools
+import time
+import numpy as np
+import sympy as sp
+from scipy.optimize import least_squares
+from Instrumentation import solve_ivp
+
+# Least-squares fits of ODE parameters to measured traces using forward sensitivities: the system is integrated
+# together with S = dy/dtheta, S' = (df/dy) S + df/dp, so one solve gives both the residuals and their exact
+# Jacobian instead of one extra solve per parameter for finite differences.
+SENSITIVITY_OPTIONS = {'rtol': 1e-8, 'atol': 1e-10}
+
+
+# Trace fun(t, y, *params) with sympy and compile the augmented right-hand side for states y (n) and
+# sensitivities S (n x (n_params + len(fit_initial))). Columns for fitted initial values have no forcing term.
+# The compiled function takes arrays of shape (m,) per symbol, so m independent traces are evaluated at once.
+@functools.lru_cache(maxsize=64)
+def sensitivity_rhs(fun, n_states, n_params, fit_initial=()):
+    t = sp.Symbol('t')
+    y = sp.symbols(f'y0:{n_states}')
+    p = sp.symbols(f'p0:{n_params}')
+    n_theta = n_params + len(fit_initial)
+    S = sp.Matrix(n_states, n_theta, sp.symbols(f's0:{n_states * n_theta}'))
+    try:
+        rhs = fun(t, np.array(y, dtype=object), *p)
+        rhs = sp.Matrix([sp.sympify(value) for value in np.ravel(np.asarray(rhs, dtype=object))])
+    except (TypeError, AttributeError, sp.SympifyError):
+        raise ValueError("The right-hand side cannot be traced symbolically (it must use plain arithmetic "
+                         "and sympy-compatible functions)") from None
+    forcing = rhs.jacobian(p).row_join(sp.zeros(n_states, len(fit_initial)))
+    S_dot = rhs.jacobian(y) * S + forcing
+    compiled = sp.lambdify((t, y, p, list(S)), list(rhs) + list(S_dot), 'numpy')
+
+    # Y has shape (n_states * (1 + n_theta), m), params (n_params, m)
+    def augmented(t_val, Y, params):
+        if Y.shape[1] == 1:  # One trace: evaluating on Python floats avoids per-operation array overhead
+            values = compiled(t_val, Y[:n_states, 0].tolist(), params[:, 0].tolist(), Y[n_states:, 0].tolist())
+            return np.array(values, dtype=float).reshape(-1, 1)
+        out = np.empty(Y.shape)
+        for row, value in zip(out, compiled(t_val, Y[:n_states], params, Y[n_states:])):
+            row[...] = value  # Constant entries come back as scalars
+        return out
+
+    return augmented
+
+
+# Integrate m traces together over t_data. theta is (m, n_params + len(fit_initial)), y0 is (m, n_states).
+# Returns y (n_states, m, n_t) and S (n_states, n_theta, m, n_t).
+def _integrate_sensitivities(fun, t_data, theta, y0, n_params, fit_initial, options):
+    m, n_theta = theta.shape
+    n_states = y0.shape[1]
+    rhs = sensitivity_rhs(fun, n_states, n_params, tuple(fit_initial))
+    y0 = y0.copy()
+    for j, index in enumerate(fit_initial):
+        y0[:, index] = theta[:, n_params + j]
+    S0 = np.zeros((n_states, n_theta, m))
+    for j, index in enumerate(fit_initial):
+        S0[index, n_params + j] = 1.0
+    Y0 = np.concatenate([y0.T, S0.reshape(n_states * n_theta, m)])
+    params = theta[:, :n_params].T
+
+    def stacked(t, flat):
+        return rhs(t, flat.reshape(-1, m), params).ravel()
+
+    solution = solve_ivp(stacked, (t_data[0], t_data[-1]), Y0.ravel(), t_eval=t_data,
+                         **{**SENSITIVITY_OPTIONS, **options})
+    if not solution.success:
+        raise RuntimeError(f"Sensitivity integration failed: {solution.message}")
+    Y = solution.y.reshape(-1, m, t_data.size)
+    return Y[:n_states], Y[n_states:].reshape(n_states, n_theta, m, t_data.size)
+
+
+# Residuals (m, n_obs * n_t) and Jacobians (m, n_obs * n_t, n_theta) of observed components against data
+def _residuals(fun, t_data, y_data, theta, y0, observed, n_params, fit_initial, options):
+    y, S = _integrate_sensitivities(fun, t_data, theta, y0, n_params, fit_initial, options)
+    residuals = (y[list(observed)].transpose(1, 0, 2) - y_data).reshape(theta.shape[0], -1)
+    jacobians = S[list(observed)].transpose(2, 0, 3, 1).reshape(theta.shape[0], -1, theta.shape[1])
+    return residuals, jacobians
+
+
+def _as_traces(t_data, y_data, n_observed):
+    t_data = np.asarray(t_data, dtype=float)
+    y_data = np.asarray(y_data, dtype=float)
+    return t_data, y_data.reshape(-1, n_observed, t_data.size)
+
+
+# Fit the parameters of fun(t, y, *params) to one trace. y_data holds the observed components (indices into
+# the state, all by default) at t_data, shape (len(observed), n_t) or (n_t,) for one component. y0 is the state
+# at t_data[0]; components listed in fit_initial are fitted too, starting from y0. Extra options go to solve_ivp.
+# Returns a dict with the fitted parameters and initial_values, cost (half the sum of squared residuals),
+# n_solves, success and message.
+def fit_ode(fun, t_data, y_data, parameters, y0, observed=None, fit_initial=(), bounds=(-np.inf, np.inf),
+            **options):
+    y0 = np.atleast_1d(np.asarray(y0, dtype=float))
+    observed = tuple(range(y0.size)) if observed is None else tuple(observed)
+    fit_initial = tuple(fit_initial)
+    t_data, y_data = _as_traces(t_data, y_data, len(observed))
+    n_params = len(parameters)
+    theta0 = np.concatenate([np.asarray(parameters, dtype=float), y0[list(fit_initial)]])
+    cache = {}
+
+    # least_squares asks for the residuals and the Jacobian separately at the same point; one solve serves both
+    def evaluate(theta):
+        key = theta.tobytes()
+        if key not in cache:
+            cache.clear()
+            cache[key] = _residuals(fun, t_data, y_data, theta[None, :], y0[None, :], observed, n_params,
+                                    fit_initial, options)
+            evaluate.solves += 1
+        return cache[key]
+    evaluate.solves = 0
+
+    result = least_squares(lambda theta: evaluate(theta)[0][0], theta0, jac=lambda theta: evaluate(theta)[1][0],
+                           bounds=bounds)
+    initial_values = y0.copy()
+    initial_values[list(fit_initial)] = result.x[n_params:]
+    return {'parameters': result.x[:n_params], 'initial_values': initial_values, 'cost': float(result.cost),
+            'n_solves': evaluate.solves, 'success': bool(result.success), 'message': result.message}
+
+
+# Fit many independent traces sharing t_data at once with a batched Levenberg-Marquardt iteration: every
+# iteration integrates all unconverged traces as one stacked system and solves their small normal equations
+# together. y_data is (m, len(observed), n_t) or (m, n_t); parameters and y0 are per trace (m, ...) or shared.
+# A trace converges on an accepted step below xtol or gaining less than ftol, or when its residuals are orthogonal
+# to every Jacobian column to within gtol (MINPACK's cosine test). gtol is loose enough for the integration
+# error to pass it, since near the optimum that error can stop any step from lowering the cost.
+# Returns a dict of per-trace arrays: parameters, initial_values, cost, converged, stalled (the damping grew
+# without an acceptable step, so the trace stopped short of convergence), plus iterations and n_solves.
+def fit_batch(fun, t_data, y_data, parameters, y0, observed=None, fit_initial=(), max_iter=100, xtol=1e-10,
+              ftol=1e-12, gtol=1e-5, **options):
+    fit_initial = tuple(fit_initial)
+    y_data = np.asarray(y_data, dtype=float)
+    n_params = np.shape(parameters)[-1]
+    n_states = np.shape(y0)[-1]
+    observed = tuple(range(n_states)) if observed is None else tuple(observed)
+    t_data, y_data = _as_traces(t_data, y_data, len(observed))
+    m = y_data.shape[0]
+    y0 = np.array(np.broadcast_to(np.asarray(y0, dtype=float), (m, n_states)))
+    theta = np.concatenate([np.broadcast_to(np.asarray(parameters, dtype=float), (m, n_params)),
+                            y0[:, list(fit_initial)]], axis=1)
+    n_theta = theta.shape[1]
+
+    def evaluate(rows, theta_rows):
+        return _residuals(fun, t_data, y_data[rows], theta_rows, y0[rows], observed, n_params, fit_initial,
+                          options)
+
+    residuals, jacobians = evaluate(np.arange(m), theta)
+    cost = 0.5 * (residuals ** 2).sum(axis=1)
+    damping = np.full(m, 1e-3)
+    converged = np.zeros(m, dtype=bool)
+    stalled = np.zeros(m, dtype=bool)
+    n_solves, iterations = 1, 0
+    while iterations < max_iter and not (converged | stalled).all():
+        iterations += 1
+        active = np.flatnonzero(~(converged | stalled))
+        J, r = jacobians[active], residuals[active]
+        A = np.einsum('mri,mrj->mij', J, J)
+        g = np.einsum('mri,mr->mi', J, r)
+        scale = np.einsum('mii->mi', A)
+        with np.errstate(all='ignore'):
+            cosine = np.abs(g) / np.sqrt(scale * (2 * cost[active, None]))
+        optimal = np.nan_to_num(cosine, nan=0.0).max(axis=1) <= gtol  # nan: a zero column or zero residuals
+        step = -np.linalg.solve(A + damping[active, None, None] * np.einsum('mi,ij->mij', np.maximum(scale, 1e-12),
+                                                                          np.eye(n_theta)), g[..., None])[..., 0]
+        trial = theta[active] + step
+        failed = np.zeros(active.size, dtype=bool)
+        try:
+            trial_residuals, trial_jacobians = evaluate(active, trial)
+            n_solves += 1
+        except RuntimeError:
+            # A step wandered where the model cannot be integrated: solve the traces one at a time and reject
+            # the step only for those that fail
+            trial_residuals, trial_jacobians = r.copy(), J.copy()
+            for i in range(active.size):
+                try:
+                    trace_residuals, trace_jacobians = evaluate(active[i:i + 1], trial[i:i + 1])
+                    trial_residuals[i], trial_jacobians[i] = trace_residuals[0], trace_jacobians[0]
+                except RuntimeError:
+                    failed[i] = True
+            n_solves += 1 + active.size
+        trial_cost = np.where(failed, np.inf, 0.5 * (trial_residuals ** 2).sum(axis=1))
+
+        better = trial_cost < cost[active]
+        accepted = active[better]
+        small_step = np.linalg.norm(step, axis=1) <= xtol * (np.linalg.norm(theta[active], axis=1) + xtol)
+        small_gain = (cost[active] - trial_cost) <= ftol * cost[active]
+        theta[accepted] = trial[better]
+        residuals[accepted] = trial_residuals[better]
+        jacobians[accepted] = trial_jacobians[better]
+        cost[accepted] = trial_cost[better]
+        damping[accepted] /= 10
+        damping[active[~better]] *= 10
+        converged[active[(better & (small_step | small_gain)) | optimal]] = True
+        stalled[active[~converged[active] & (damping[active] > 1e12)]] = True
+
+    initial_values = y0.copy()
+    initial_values[:, list(fit_initial)] = theta[:, n_params:]
+    return {'parameters': theta[:, :n_params], 'initial_values': initial_values, 'cost': cost,
+            'converged': converged, 'stalled': stalled, 'iterations': iterations, 'n_solves': n_solves}
+
+
+# Add the fitted parameters to a fit_ode / fit_batch result under their names (per trace for a batch)
+def _named(result, names):
+    for i, name in enumerate(names):
+        result[name] = result['parameters'][..., i]
+    return result
+
+
+# Newton cooling: fit k and T_ambient (and T0 unless fit_T0 is False) to measured temperatures.
+# A 2-D T_data (m, n_t) fits m traces at once with fit_batch. The result has 'k' and 'T_ambient' entries;
+# 'parameters' holds them in cooling_ode's order, (T_ambient, k).
+def fit_newtons_cooling(t_data, T_data, k, T_ambient, T0=None, fit_T0=True, **options):
+    from NewtonCoolingLaw import cooling_ode
+    T_data = np.asarray(T_data, dtype=float)
+    T0 = T_data[..., :1] if T0 is None else np.asarray(T0, dtype=float).reshape(-1, 1)
+    fit_initial = (0,) if fit_T0 else ()
+    if T_data.ndim == 2:
+        return _named(fit_batch(cooling_ode, t_data, T_data, np.stack(np.broadcast_arrays(T_ambient, k), axis=-1),
+                                T0, fit_initial=fit_initial, **options), ('T_ambient', 'k'))
+    return _named(fit_ode(cooling_ode, t_data, T_data, [T_ambient, k], T0[0], fit_initial=fit_initial, **options),
+                  ('T_ambient', 'k'))
+
+
+# Damped oscillator: fit omega0 and zeta (and x0, v0 unless fit_initial is False) to measured displacements
+# x_data, shape (n_t,) or (m, n_t) for a batch. The result has 'omega0' and 'zeta' entries as well.
+def fit_harmonic_oscillator(t_data, x_data, omega0, zeta, x0=None, v0=0.0, fit_initial=True, **options):
+    from HarmonicOscillatorODE import harmonic_oscillator
+    x_data = np.asarray(x_data, dtype=float)
+    x0 = x_data[..., 0] if x0 is None else x0
+    y0 = np.stack(np.broadcast_arrays(np.asarray(x0, dtype=float), np.asarray(v0, dtype=float)), axis=-1)
+    fit_initial = (0, 1) if fit_initial else ()
+    if x_data.ndim == 2:
+        return _named(fit_batch(harmonic_oscillator, t_data, x_data,
+                                np.stack(np.broadcast_arrays(omega0, zeta), axis=-1), y0, observed=(0,),
+                                fit_initial=fit_initial, **options), ('omega0', 'zeta'))
+    return _named(fit_ode(harmonic_oscillator, t_data, x_data, [omega0, zeta], y0, observed=(0,),
+                          fit_initial=fit_initial, **options), ('omega0', 'zeta'))
+
+
+# Timings against least_squares with finite differences over solve_harmonic_oscillator / solve_newtons_cooling
+# (the numeric paths, at their default tolerances) and over solve_ivp at the tolerances used here, on noisy
+# synthetic traces. The one-off symbolic derivation is timed separately.
+def benchmark_fitting(n_traces=100, num_points=200, noise=0.01):
+    from HarmonicOscillatorODE import damped_oscillator_exact, harmonic_oscillator, solve_harmonic_oscillator
+    from NewtonCoolingLaw import cooling_ode, newtons_cooling_exact, solve_newtons_cooling
+
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    sensitivity_rhs(harmonic_oscillator, 2, 2)
+    sensitivity_rhs(cooling_ode, 1, 2)
+    results = {'symbolic_setup': {'time': time.perf_counter() - start}}
+
+    # One oscillator trace: omega0 and zeta
+    t_span = (0.0, 20.0)
+    t_data = np.linspace(*t_span, num_points)
+    x_data = damped_oscillator_exact(t_data, 1.0, 0.0, 2.0, 0.1)[0, 0] + noise * rng.standard_normal(num_points)
+    solves = [0]
+
+    def fd_residuals(theta):
+        solves[0] += 1
+        return solve_harmonic_oscillator(1.0, 0.0, theta[0], theta[1], t_span, num_points)[1][0] - x_data
+
+    start = time.perf_counter()
+    fd = least_squares(fd_residuals, [1.8, 0.2], jac='2-point')
+    results['oscillator_fd'] = {'time': time.perf_counter() - start, 'n_solves': solves[0],
+                                'parameters': fd.x.tolist()}
+    solves[0] = 0
+
+    def fd_matched_residuals(theta):
+        solves[0] += 1
+        return solve_ivp(harmonic_oscillator, t_span, [1.0, 0.0], t_eval=t_data, args=tuple(theta),
+                         **SENSITIVITY_OPTIONS).y[0] - x_data
+
+    start = time.perf_counter()
+    fd = least_squares(fd_matched_residuals, [1.8, 0.2], jac='2-point')
+    results['oscillator_fd_matched_tol'] = {'time': time.perf_counter() - start, 'n_solves': solves[0],
+                                            'parameters': fd.x.tolist()}
+    start = time.perf_counter()
+    fit = fit_harmonic_oscillator(t_data, x_data, 1.8, 0.2, x0=1.0, v0=0.0, fit_initial=False)
+    results['oscillator_sensitivity'] = {'time': time.perf_counter() - start, 'n_solves': fit['n_solves'],
+                                         'parameters': fit['parameters'].tolist()}
+
+    # Many cooling traces: T_ambient and k (T0 fixed), looped with finite differences vs one batched fit
+    t_span = (0.0, 50.0)
+    t_data = np.linspace(*t_span, num_points)
+    k_true = rng.uniform(0.05, 0.2, n_traces)
+    Ta_true = rng.uniform(15, 25, n_traces)
+    T_data = newtons_cooling_exact(100.0, Ta_true, k_true, t_data) + noise * rng.standard_normal((n_traces,
+                                                                                               num_points))
+    solves[0] = 0
+    start = time.perf_counter()
+    fd_fits = []
+    for i in range(n_traces):
+        def residuals(theta, i=i):
+            solves[0] += 1
+            return solve_newtons_cooling(100.0, theta[0], theta[1], t_span, num_points, method='numeric')[1] - T_data[i]
+        fd_fits.append(least_squares(residuals, [20.0, 0.1], jac='2-point').x)
+    results['cooling_fd_loop'] = {'time': time.perf_counter() - start, 'n_solves': solves[0],
+                                  'max_k_error': float(np.abs(np.array(fd_fits)[:, 1] - k_true).max())}
+    start = time.perf_counter()
+    batch = fit_newtons_cooling(t_data, T_data, 0.1, 20.0, T0=100.0, fit_T0=False)
+    results['cooling_batch_sensitivity'] = {'time': time.perf_counter() - start, 'n_solves': batch['n_solves'],
+                                            'max_k_error': float(np.abs(batch['k'] - k_true).max())}
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in benchmark_fitting().items():
+        print(name, result)
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+import zipfile
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Solutions are stored row-wise: one row per point, columns [t, y1, y2, ...]
+CHUNK_ROWS = 65536
+FORMATS = {'.npy': 'npy', '.bin': 'raw', '.raw': 'raw', '.npz': 'npz', '.parquet': 'parquet',
+           '.csv': 'csv', '.txt': 'csv'}
+_NPY_HEADER_BYTES = 128
+
+
+# Turn full (t, Y) arrays or an iterable of (t_chunk, Y_chunk) pairs into (rows, 1 + n_components) blocks
+def _row_blocks(t_vals, y_vals, chunks):
+    if chunks is None:
+        chunks = [(t_vals, y_vals)]
+    for t_chunk, y_chunk in chunks:
+        t_chunk = np.asarray(t_chunk, dtype=float)
+        y_chunk = np.asarray(y_chunk, dtype=float).reshape(-1, t_chunk.size)  # Same (n_components, n) as solve_ivp
+        for start in range(0, t_chunk.size, CHUNK_ROWS):
+            stop = start + CHUNK_ROWS
+            block = np.empty((min(stop, t_chunk.size) - start, 1 + y_chunk.shape[0]))
+            block[:, 0] = t_chunk[start:stop]
+            block[:, 1:] = y_chunk[:, start:stop].T
+            yield block
+
+
+# A fixed-size .npy header, so the row count can be filled in once streaming has finished
+def _npy_header(rows, columns):
+    header = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d, %d), }" % (rows, columns)
+    header = header.ljust(_NPY_HEADER_BYTES - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+def _write_npy(filename, blocks):
+    rows, columns = 0, 1
+    with open(filename, "wb") as file:
+        file.write(_npy_header(0, 1))
+        for block in blocks:
+            file.write(block.astype("<f8", copy=False).tobytes())
+            rows, columns = rows + block.shape[0], block.shape[1]
+        file.seek(0)
+        file.write(_npy_header(rows, columns))
+
+
+# Raw little-endian float64 rows plus a small JSON sidecar describing the shape
+def _write_raw(filename, blocks):
+    rows, columns = 0, 1
+    with open(filename, "wb") as file:
+        for block in blocks:
+            file.write(block.astype("<f8", copy=False).tobytes())
+            rows, columns = rows + block.shape[0], block.shape[1]
+    with open(filename + ".json", "w") as file:
+        json.dump({"dtype": "<f8", "rows": rows, "columns": columns}, file)
+
+
+# Compressed archives need the final shape up front, so stream to a temporary .npy and compress that
+def _write_npz(filename, blocks):
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(filename))) as tmp:
+        npy_path = os.path.join(tmp, "data.npy")
+        _write_npy(npy_path, blocks)
+        with zipfile.ZipFile(filename, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            archive.write(npy_path, "data.npy")
+
+
+def _write_parquet(filename, blocks):
+    if pyarrow is None:
+        raise ImportError("Writing Parquet files requires pyarrow")
+    writer = None
+    try:
+        for block in blocks:
+            names = ["t"] + [f"y{i + 1}" for i in range(block.shape[1] - 1)]
+            table = pyarrow.table({name: block[:, i] for i, name in enumerate(names)})
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(filename, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# Each block is formatted with a single %-operation instead of np.savetxt's per-row loop
+def _write_csv(filename, blocks):
+    with open(filename, "w") as file:
+        for block in blocks:
+            row_format = ", ".join(["%.17g"] * block.shape[1]) + "\n"
+            file.write((row_format * block.shape[0]) % tuple(block.ravel().tolist()))
+
+
+_WRITERS = {'npy': _write_npy, 'raw': _write_raw, 'npz': _write_npz, 'parquet': _write_parquet, 'csv': _write_csv}
+
+
+def _format_for(filename, format):
+    if format is None:
+        format = FORMATS.get(os.path.splitext(filename)[1].lower())
+    if format not in _WRITERS:
+        raise ValueError(f"Unknown format for '{filename}'. Choose one of {sorted(_WRITERS)}")
+    return format
+
+
+# Write a whole solution (t_vals, y_vals) or a generator of chunks to a single file
+def write_solution(filename, t_vals=None, y_vals=None, chunks=None, format=None):
+    if chunks is None and (t_vals is None or y_vals is None):
+        raise ValueError("Provide either t_vals and y_vals, or chunks")
+    _WRITERS[_format_for(filename, format)](filename, _row_blocks(t_vals, y_vals, chunks))
+    return filename
+
+
+# Load a solution written by write_solution; .npy and raw files are memory-mapped rather than read
+def load_solution(filename, mmap=True, format=None):
+    format = _format_for(filename, format)
+    if format == 'npy':
+        data = np.load(filename, mmap_mode='r' if mmap else None)
+    elif format == 'raw':
+        with open(filename + ".json") as file:
+            meta = json.load(file)
+        shape = (meta["rows"], meta["columns"])
+        if mmap:
+            data = np.memmap(filename, dtype=meta["dtype"], mode='r', shape=shape)
+        else:
+            data = np.fromfile(filename, dtype=meta["dtype"]).reshape(shape)
+    elif format == 'npz':
+        with np.load(filename) as archive:
+            data = archive["data"]
+    elif format == 'parquet':
+        if pyarrow is None:
+            raise ImportError("Reading Parquet files requires pyarrow")
+        table = pyarrow.parquet.read_table(filename)
+        data = np.column_stack([column.to_numpy() for column in table.columns])
+    else:
+        data = np.loadtxt(filename, delimiter=",", ndmin=2)
+
+    # Return (t, y) shaped like the solvers: y is 1-D for a single component, (n_components, n) otherwise
+    y_vals = data[:, 1:].T
+    return data[:, 0], (y_vals[0] if y_vals.shape[0] == 1 else y_vals)
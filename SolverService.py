@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import concurrent.futures
+import io
+import ipaddress
+import json
+import numbers
+import os
+import sys
+import numpy as np
+import DiffEqAPI
+
+# An asyncio front end for DiffEqAPI.solve. Specs are the same plain dicts, e.g.
+# {'problem': 'harmonic_oscillator', 'x0': 1, 'v0': 0, 'omega0': 1, 'zeta': 0.1, 't_span': [0, 20]}.
+# Solves run in a process pool, identical in-flight specs share one computation, and a bounded queue
+# makes callers wait (or get refused) when the pool falls behind.
+DEFAULT_QUEUE_SIZE = 64
+MAX_BODY_BYTES = 1 << 20
+_META_KEY = '__meta__'
+# Problems a service accepts by default: the numeric solvers, whose specs hold numbers and names from
+# DiffEqAPI.NAMED_FUNCTIONS. The symbolic problems sympify their equation strings, which evaluates them as
+# Python, so they are left out; pass problems=DiffEqAPI.PROBLEMS to serve them to trusted callers.
+SERVICE_PROBLEMS = frozenset({
+    'single_first_order', 'system_first_order', 'second_order', 'harmonic_oscillator', 'harmonic_oscillator_batch',
+    'harmonic_oscillator_until', 'newtons_cooling', 'newtons_cooling_until', 'beam_bvp', 'ensemble',
+    'fit_newtons_cooling', 'fit_harmonic_oscillator',
+})
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+# Split a solver result into named float/int arrays and JSON metadata for everything else.
+# Tuples and lists become name.0, name.1, ..., dicts name.key; sympy expressions and other objects are
+# kept as their string form.
+def _flatten(result, name, arrays, meta):
+    if isinstance(result, dict):
+        for key, value in result.items():
+            _flatten(value, f"{name}.{key}", arrays, meta)
+    elif isinstance(result, np.ndarray) and result.dtype.kind in 'biuf':
+        arrays[name] = result
+    elif isinstance(result, (bool, str)) or result is None:
+        meta[name] = result
+    elif isinstance(result, numbers.Real):
+        arrays[name] = np.asarray(float(result))
+    elif isinstance(result, (tuple, list)):
+        try:
+            values = np.asarray(result, dtype=float)
+        except (TypeError, ValueError):
+            values = None
+        if values is not None and isinstance(result, list):
+            arrays[name] = values
+        else:
+            for i, value in enumerate(result):
+                _flatten(value, f"{name}.{i}", arrays, meta)
+    else:
+        meta[name] = str(result)
+
+
+# Runs in a pool worker: solve and return only arrays and strings, so no solver objects cross processes
+def _solve_flat(spec):
+    arrays, meta = {}, {}
+    _flatten(DiffEqAPI.solve(spec), 'result', arrays, meta)
+    return arrays, meta
+
+
+# Arrays as an uncompressed .npz archive, with the metadata stored as a JSON string array
+def encode_result(arrays, meta):
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays, **{_META_KEY: np.array(json.dumps(meta))})
+    return buffer.getvalue()
+
+
+# Inverse of encode_result: (arrays, meta)
+def decode_result(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+        arrays = {name: archive[name] for name in archive.files if name != _META_KEY}
+        meta = json.loads(str(archive[_META_KEY]))
+    return arrays, meta
+
+
+# Identical specs map to the same key regardless of key order or tuple-vs-list spelling
+def _spec_key(spec):
+    return json.dumps(spec, sort_keys=True, default=repr)
+
+
+class SolverService:
+    def __init__(self, workers=None, max_queue=DEFAULT_QUEUE_SIZE, executor=None, problems=SERVICE_PROBLEMS):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.problems = frozenset(problems)
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._queue = None
+        self._dispatchers = []
+        self._in_flight = {}
+        self.stats = {'submitted': 0, 'coalesced': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+
+    async def start(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        self._queue = asyncio.Queue(self.max_queue)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        return self
+
+    # Stop the dispatchers and fail every request still queued or running, so no caller waits forever
+    async def close(self):
+        pending = list(self._in_flight.values())
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait()[2])
+        self._in_flight.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("The service was closed"))
+        self._queue = None
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # One dispatcher per worker, so at most `workers` solves are handed to the pool at a time
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            key, spec, future = await self._queue.get()
+            try:
+                result = await loop.run_in_executor(self._executor, _solve_flat, spec)
+            except Exception as exc:
+                self.stats['failed'] += 1
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                self.stats['completed'] += 1
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._in_flight.pop(key, None)
+                self._queue.task_done()
+
+    # Solve a spec and return (arrays, meta). A spec already queued or running is not solved again.
+    # When the queue is full this waits for room, or raises ServiceBusy if wait is False.
+    async def solve(self, spec, wait=True):
+        if self._queue is None:
+            raise RuntimeError("The service has not been started")
+        if spec.get('problem') not in self.problems:
+            raise ValueError(f"Problem '{spec.get('problem')}' is not served. Choose one of {sorted(self.problems)}")
+        key = _spec_key(spec)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            item = (key, dict(spec), future)
+            if wait:
+                self._in_flight[key] = future
+                try:
+                    await self._queue.put(item)
+                except BaseException:
+                    self._in_flight.pop(key, None)
+                    future.cancel()  # Never queued, so callers that joined it would wait forever
+                    raise
+            else:
+                try:
+                    self._queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    self.stats['rejected'] += 1
+                    raise ServiceBusy(f"The queue is full ({self.max_queue} requests waiting)")
+                self._in_flight[key] = future
+            self.stats['submitted'] += 1
+        # A cancelled caller must not cancel the computation other callers are waiting on
+        return await asyncio.shield(future)
+
+    # The same, encoded with encode_result
+    async def solve_encoded(self, spec, wait=True):
+        return encode_result(*await self.solve(spec, wait))
+
+    def status(self):
+        return dict(self.stats, queued=self._queue.qsize() if self._queue else 0, in_flight=len(self._in_flight),
+                    workers=self.workers, max_queue=self.max_queue)
+
+
+# Minimal HTTP/1.1 on asyncio streams, one request per connection:
+#   POST /solve   JSON spec -> 200 application/octet-stream (encode_result), 400 bad spec/solve error, 503 busy
+#   GET /status   -> 200 JSON counters
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+            503: 'Service Unavailable'}
+
+
+async def _respond(writer, status, body, content_type='application/json'):
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode()
+    head = (f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n")
+    writer.write(head.encode('latin1') + body)
+    await writer.drain()
+
+
+async def _handle_http(service, reader, writer):
+    try:
+        request_line = (await reader.readline()).decode('latin1').split()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if len(request_line) < 2:
+            return await _respond(writer, 400, {'error': "Malformed request line"})
+        method, path = request_line[0], request_line[1]
+
+        if path == '/status':
+            return await _respond(writer, 200, service.status())
+        if path != '/solve':
+            return await _respond(writer, 404, {'error': f"Unknown path '{path}'"})
+        if method != 'POST':
+            return await _respond(writer, 405, {'error': "Use POST /solve"})
+        length = headers.get('content-length', '0')
+        if not length.isdigit():  # Also rejects negative lengths
+            return await _respond(writer, 400, {'error': f"Invalid Content-Length '{length}'"})
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            return await _respond(writer, 413, {'error': f"Request body exceeds {MAX_BODY_BYTES} bytes"})
+        try:
+            spec = json.loads(await reader.readexactly(length))
+            if not isinstance(spec, dict):
+                raise ValueError("The spec must be a JSON object")
+            body = await service.solve_encoded(spec, wait=False)
+        except ServiceBusy as exc:
+            return await _respond(writer, 503, {'error': str(exc)})
+        except Exception as exc:
+            return await _respond(writer, 400, {'error': f"{type(exc).__name__}: {exc}"})
+        await _respond(writer, 200, body, 'application/octet-stream')
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+# The HTTP interface has no authentication, so it only binds to loopback addresses
+def _check_local(host):
+    try:
+        local = host == 'localhost' or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        local = False
+    if not local:
+        raise ValueError(f"Refusing to serve on '{host}': only localhost and loopback addresses are allowed")
+
+
+# Serve the HTTP interface for service on host:port; returns the asyncio server (port 0 picks a free port)
+async def start_http_server(service, host='127.0.0.1', port=8765):
+    _check_local(host)
+    return await asyncio.start_server(lambda reader, writer: _handle_http(service, reader, writer), host, port)
+
+
+# Blocking client for the HTTP interface: returns (arrays, meta), or raises RuntimeError with the server's error
+def request_solve(spec, host='127.0.0.1', port=8765, timeout=None):
+    import urllib.error
+    import urllib.request
+    request = urllib.request.Request(f"http://{host}:{port}/solve", data=json.dumps(spec).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return decode_result(response.read())
+    except urllib.error.HTTPError as exc:
+        raise RuntimeError(f"{exc.code}: {json.loads(exc.read()).get('error')}") from None
+
+
+async def _serve(host, port, workers, max_queue):
+    async with SolverService(workers, max_queue) as service:
+        server = await start_http_server(service, host, port)
+        print(f"Serving on http://{host}:{server.sockets[0].getsockname()[1]}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the solvers over local HTTP")
+    parser.add_argument('--host', default='127.0.0.1', help="a loopback address; other hosts are refused")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_QUEUE_SIZE)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args.host, args.port, args.workers, args.max_queue))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import functools
+import numpy as np
+from Instrumentation import solve_ivp
+
+IMPLICIT_METHODS = ('Radau', 'BDF', 'LSODA')
+# An explicit method needs roughly (fastest decay rate) * (span) steps just to stay stable
+STIFFNESS_THRESHOLD = 500.0
+
+
+# Trace fun(t, y, *args) with sympy symbols and differentiate; returns a compiled jac(t, y) or None
+# when the right-hand side cannot be traced (e.g. it calls NumPy ufuncs on its inputs)
+def symbolic_jacobian(fun, n_states, args=()):
+    try:
+        return _symbolic_jacobian(fun, n_states, tuple(args))
+    except TypeError:  # Unhashable args: skip the cache
+        return _symbolic_jacobian.__wrapped__(fun, n_states, tuple(args))
+
+
+@functools.lru_cache(maxsize=64)
+def _symbolic_jacobian(fun, n_states, args):
+    import sympy as sp  # Imported here so loading the solver modules stays cheap
+    t = sp.Symbol('t')
+    y = sp.symbols(f'y0:{n_states}')
+    try:
+        rhs = fun(t, np.array(y, dtype=object), *args)
+        rhs = sp.Matrix([sp.sympify(value) for value in np.ravel(np.asarray(rhs, dtype=object))])
+    except (TypeError, AttributeError, sp.SympifyError):
+        return None
+    jacobian = sp.lambdify((t, y), rhs.jacobian(y), 'numpy')
+
+    def jac(t_val, y_vals, *unused_args):
+        return np.asarray(jacobian(t_val, y_vals), dtype=float).reshape(n_states, n_states)
+
+    return jac
+
+
+# Forward-difference Jacobian, used for the stiffness estimate when no analytic Jacobian is available
+def numerical_jacobian(fun, t, y, args=()):
+    y = np.asarray(y, dtype=float)
+    f0 = np.asarray(fun(t, y, *args), dtype=float)
+    J = np.empty((f0.size, y.size))
+    for i in range(y.size):
+        step = np.sqrt(np.finfo(float).eps) * max(1.0, abs(y[i]))
+        y_step = y.copy()
+        y_step[i] += step
+        J[:, i] = (np.asarray(fun(t, y_step, *args), dtype=float) - f0) / step
+    return J
+
+
+# Stiffness estimate from the Jacobian eigenvalues at t0: fastest decay rate times the span length
+def estimate_stiffness(J, t_span):
+    decay_rates = -np.linalg.eigvals(np.atleast_2d(J)).real
+    return max(decay_rates.max(), 0.0) * abs(t_span[1] - t_span[0])
+
+
+# Resolve method='auto' by the stiffness estimate and find an analytic Jacobian for implicit methods.
+# Returns (method, jac); jac is None for explicit methods or when none could be traced.
+def choose_method(fun, t_span, y0, method='RK45', args=(), jac=None, stiff_method='Radau'):
+    if method == 'auto' or method in IMPLICIT_METHODS:
+        if jac is None:
+            jac = symbolic_jacobian(fun, y0.size, args)
+        if method == 'auto':
+            J = jac(t_span[0], y0, *args) if jac is not None else numerical_jacobian(fun, t_span[0], y0, args)
+            method = stiff_method if estimate_stiffness(J, t_span) > STIFFNESS_THRESHOLD else 'RK45'
+    return method, (jac if method in IMPLICIT_METHODS else None)
+
+
+# solve_ivp with an optional analytic Jacobian and method='auto' stiffness detection.
+# Explicit methods go straight to solve_ivp; the chosen method is recorded on the result.
+def solve_ivp_auto(fun, t_span, y0, method='RK45', args=(), jac=None, stiff_method='Radau', **options):
+    y0 = np.atleast_1d(np.asarray(y0, dtype=float))
+    method, jac = choose_method(fun, t_span, y0, method, args, jac, stiff_method)
+    if jac is not None:
+        options['jac'] = jac
+
+    solution = solve_ivp(fun, t_span, y0, method=method, args=args or None, **options)
+    solution.method = method
+    return solution
+
+
+# Summary of the work a solve did
+def solver_report(solution):
+    return {'method': getattr(solution, 'method', None), 'nfev': int(solution.nfev), 'njev': int(solution.njev),
+            'nlu': int(solution.nlu), 'status': int(solution.status)}
@@ -0,0 +1,95 @@
+import time
+import numpy as np
+import Instrumentation
+from SolutionIO import CHUNK_ROWS
+from StiffSolver import choose_method
+
+# Integration that hands the trajectory out in fixed-size chunks as it is computed, so memory stays constant
+# however long the span. The chunks fit SolutionIO.write_solution(filename, chunks=...) directly.
+
+
+# Generator of (t_chunk, y_chunk) for fun(t, y, *args) over t_span, with y_chunk of shape (n_states, rows) like
+# solve_ivp's solution.y. With num_points the output is the uniform grid of np.linspace(t_span[0], t_span[1],
+# num_points), filled from each step's dense output; with num_points=None it is every accepted step.
+# The chunks are views of one buffer that is overwritten by the next chunk: pass copy=True to keep them.
+# method is any scipy stepper name or class, or 'auto'; other options (rtol, atol, max_step, ...) go to the stepper.
+def stream_solution(fun, t_span, y0, num_points=None, chunk_size=CHUNK_ROWS, method='RK45', args=(), jac=None,
+                    copy=False, **options):
+    t0, t1 = float(t_span[0]), float(t_span[1])
+    y0 = np.atleast_1d(np.asarray(y0, dtype=float))
+    method, jac = choose_method(fun, t_span, y0, method, args, jac)
+    rhs = (lambda t, y: fun(t, y, *args)) if args else fun
+    if jac is not None:
+        options['jac'] = (lambda t, y: jac(t, y, *args)) if args and callable(jac) else jac
+    solver_class = Instrumentation.SOLVER_CLASSES[method] if isinstance(method, str) else method
+    solver = solver_class(rhs, t0, y0, t1, **options)
+
+    t_buffer = np.empty(chunk_size)
+    y_buffer = np.empty((y0.size, chunk_size))
+    filled = 0
+    busy, resumed = 0.0, time.perf_counter()  # Time spent here, not in the consumer
+    n_points = 0
+
+    # (t, y) blocks of at most chunk_size points for everything up to the solver's current time
+    grid_step = (t1 - t0) / (num_points - 1) if num_points and num_points > 1 else 0.0
+    next_index = 0
+
+    def blocks():
+        nonlocal next_index
+        if solver.status == 'failed':  # Nothing new since the last accepted step
+            return
+        if num_points is None:
+            yield np.array([solver.t]), solver.y[:, None]
+            return
+        if solver.status == 'finished':
+            last = num_points
+        else:
+            last = min(int(np.floor((solver.t - t0) / grid_step)) + 1, num_points - 1) if grid_step else num_points
+        interpolant = solver.dense_output() if next_index < last and solver.t != t0 else None
+        while next_index < last:
+            stop = min(next_index + chunk_size, last)
+            ts = t0 + np.arange(next_index, stop) * grid_step
+            if stop == num_points > 1:
+                ts[-1] = t1  # As np.linspace, end exactly on t_span[1]
+            if interpolant is None:
+                yield ts, np.repeat(y0[:, None], ts.size, axis=1)
+            else:
+                yield ts, interpolant(ts).reshape(y0.size, ts.size)
+            next_index = stop
+
+    message = None
+    while True:
+        for ts, ys in blocks():
+            position = 0
+            while position < ts.size:
+                rows = min(chunk_size - filled, ts.size - position)
+                t_buffer[filled:filled + rows] = ts[position:position + rows]
+                y_buffer[:, filled:filled + rows] = ys[:, position:position + rows]
+                filled += rows
+                position += rows
+                if filled == chunk_size:
+                    n_points += filled
+                    busy += time.perf_counter() - resumed
+                    yield (t_buffer.copy(), y_buffer.copy()) if copy else (t_buffer, y_buffer)
+                    resumed = time.perf_counter()
+                    filled = 0
+        if solver.status != 'running':
+            break
+        message = solver.step()
+
+    if filled:
+        n_points += filled
+        busy += time.perf_counter() - resumed
+        yield (t_buffer[:filled].copy(), y_buffer[:, :filled].copy()) if copy else (t_buffer[:filled],
+                                                                                  y_buffer[:, :filled])
+        resumed = time.perf_counter()
+    busy += time.perf_counter() - resumed
+
+    failed = solver.status == 'failed'
+    if Instrumentation.enabled():
+        Instrumentation.emit({'solver': 'stream_solution', 'method': solver_class.__name__, 't_span': (t0, t1),
+                              'n_states': int(y0.size), 'wall_time': busy, 'status': -1 if failed else 0,
+                              'message': message, 'nfev': int(solver.nfev), 'njev': int(solver.njev),
+                              'nlu': int(solver.nlu), 'n_points': n_points})
+    if failed:
+        raise RuntimeError(f"Integration failed at t={solver.t}: {message}")
@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import pickle
+import threading
+
+
+# Worker process: run (func, args) tasks from the pipe until it is closed
+def _worker_loop(connection):
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        func, args = task
+        try:
+            result = (True, func(*args))
+        except Exception as exc:
+            result = (False, exc)
+        try:
+            connection.send(result)
+        except Exception as exc:  # Unpicklable result or exception
+            connection.send((False, RuntimeError(repr(exc))))
+
+
+# A pool of warm worker processes where a single task can be abandoned: when a task overruns its timeout the
+# worker running it is killed and replaced, which ProcessPoolExecutor cannot do. Workers start on demand.
+class KillablePool:
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count() or 1
+        self._context = multiprocessing.get_context()
+        self._idle = []  # Most recently used last
+        # Guards _idle and _started; notified whenever a worker goes idle or a slot frees up
+        self._available = threading.Condition()
+        self._started = 0
+
+    def _spawn(self):
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=_worker_loop, args=(child,), daemon=True)
+        process.start()
+        child.close()
+        return process, parent
+
+    # An idle worker, a new one while below the limit, or whichever comes first of a worker going idle and a
+    # discarded worker's slot freeing up
+    def _acquire(self):
+        with self._available:
+            while not self._idle and self._started >= self.processes:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+        try:
+            return self._spawn()
+        except BaseException:
+            self._free_slot()
+            raise
+
+    def _release(self, worker):
+        with self._available:
+            self._idle.append(worker)
+            self._available.notify()
+
+    def _free_slot(self):
+        with self._available:
+            self._started -= 1
+            self._available.notify()
+
+    def _discard(self, worker):
+        process, connection = worker
+        process.kill()
+        process.join()
+        connection.close()
+        self._free_slot()
+
+    # Run func(*args) in a worker. Raises TimeoutError (after killing the worker) when it takes longer than
+    # timeout seconds, and re-raises any exception the task raised.
+    def run(self, func, args=(), timeout=None):
+        worker = self._acquire()
+        process, connection = worker
+        try:
+            # The task is pickled whole before anything is written, so a failure here leaves the worker usable
+            connection.send((func, args))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            self._release(worker)
+            raise
+        except (EOFError, OSError):  # The worker died
+            self._discard(worker)
+            raise RuntimeError("Worker process exited unexpectedly")
+        try:
+            finished = connection.poll(timeout)
+            if finished:
+                ok, value = connection.recv()
+        except (EOFError, OSError):  # The worker died
+            self._discard(worker)
+            raise RuntimeError("Worker process exited unexpectedly")
+        if not finished:
+            self._discard(worker)
+            raise TimeoutError(f"Task did not finish within {timeout} s")
+        self._release(worker)
+        if not ok:
+            raise value
+        return value
+
+    def close(self):
+        while True:
+            with self._available:
+                if not self._idle:
+                    break
+                process, connection = self._idle.pop()
+            connection.send(None)
+            process.join()
+            connection.close()
+            self._free_slot()
+
+
+_pool = None
+
+
+# Process-wide pool shared by the budgeted solvers
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = KillablePool()
+    return _pool
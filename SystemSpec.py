@@ -0,0 +1,97 @@
+import functools
+import timeit
+import numpy as np
+from StiffSolver import IMPLICIT_METHODS, solve_ivp_auto, symbolic_jacobian
+from Streaming import stream_solution
+
+
+# An ODE system defined by rhs_into(t, y, params, out), which writes dy/dt into out instead of returning a list.
+# Written with y[i] / out[i] indexing, the same function handles one state of shape (dim,) and a batch of
+# states of shape (dim, m), so it also serves scipy's vectorized=True mode.
+class ODESystem:
+    def __init__(self, rhs_into, dim, params=(), state_names=None, param_names=None):
+        self.rhs_into = rhs_into
+        self.dim = dim
+        self.params = tuple(float(p) for p in params)
+        self.state_names = tuple(state_names or (f"y{i + 1}" for i in range(dim)))
+        self.param_names = tuple(param_names or (f"p{i + 1}" for i in range(len(self.params))))
+
+    def with_params(self, *params):
+        return ODESystem(self.rhs_into, self.dim, params, self.state_names, self.param_names)
+
+    # Evaluate for one state or a (dim, m) batch of states
+    def __call__(self, t, y):
+        y = np.asarray(y, dtype=float)
+        out = np.empty_like(y)
+        self.rhs_into(t, y, self.params, out)
+        return out
+
+    # fun(t, y) for solve_ivp. Single states are written into one reusable buffer; the result is copied
+    # on return because scipy's RK steppers keep the returned array across a rejected step.
+    def scipy_rhs(self, vectorized=False):
+        rhs_into, params = self.rhs_into, self.params
+        if vectorized:
+            def fun(t, y):
+                out = np.empty_like(y)
+                rhs_into(t, y, params, out)
+                return out
+        else:
+            buffer = np.empty(self.dim)
+
+            def fun(t, y):
+                rhs_into(t, y, params, buffer)
+                return buffer.copy()
+        return fun
+
+    # Analytic Jacobian traced from rhs_into with sympy, or None if it cannot be traced
+    def symbolic_jacobian(self):
+        return symbolic_jacobian(_traceable(self.rhs_into, self.dim), self.dim, self.params)
+
+    def solve(self, t_span, y0, method='RK45', vectorized=False, **options):
+        jac = self.symbolic_jacobian() if method == 'auto' or method in IMPLICIT_METHODS else None
+        return solve_ivp_auto(self.scipy_rhs(vectorized), t_span, y0, method=method, jac=jac,
+                              vectorized=vectorized, **options)
+
+    # Generator of (t, y) chunks, see Streaming.stream_solution
+    def stream(self, t_span, y0, num_points=None, method='RK45', **options):
+        jac = self.symbolic_jacobian() if method == 'auto' or method in IMPLICIT_METHODS else None
+        return stream_solution(self.scipy_rhs(), t_span, y0, num_points, method=method, jac=jac, **options)
+
+
+# fun(t, y, *params) returning an object array, so rhs_into can be traced with sympy symbols
+@functools.lru_cache(maxsize=None)
+def _traceable(rhs_into, dim):
+    def fun(t, y, *params):
+        out = np.empty(dim, dtype=object)
+        rhs_into(t, y, params, out)
+        return out
+    return fun
+
+
+# Microbenchmark of per-call RHS overhead: list-returning harmonic_oscillator against the ODESystem adapter,
+# and one vectorized call against a Python loop over n_states states
+def benchmark_rhs_overhead(n_calls=100000, n_states=1000):
+    from HarmonicOscillatorODE import harmonic_oscillator, harmonic_oscillator_system
+
+    y = np.array([1.0, 0.5])
+    omega0, zeta = 1.0, 0.1
+    system = harmonic_oscillator_system.with_params(omega0, zeta)
+    list_fun = lambda t, y: np.asarray(harmonic_oscillator(t, y, omega0, zeta))  # What solve_ivp does
+    spec_fun = system.scipy_rhs()
+    results = {
+        'list_rhs_us': min(timeit.repeat(lambda: list_fun(0.0, y), number=n_calls, repeat=3)) / n_calls * 1e6,
+        'spec_rhs_us': min(timeit.repeat(lambda: spec_fun(0.0, y), number=n_calls, repeat=3)) / n_calls * 1e6,
+    }
+
+    states = np.random.default_rng(0).random((2, n_states))
+    vector_fun = system.scipy_rhs(vectorized=True)
+    loop = lambda: [list_fun(0.0, states[:, i]) for i in range(n_states)]
+    results['loop_batch_ms'] = min(timeit.repeat(loop, number=10, repeat=3)) / 10 * 1e3
+    results['vectorized_batch_ms'] = min(timeit.repeat(lambda: vector_fun(0.0, states), number=100,
+                                                       repeat=3)) / 100 * 1e3
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in benchmark_rhs_overhead().items():
+        print(f"{name}: {value:.3f}")
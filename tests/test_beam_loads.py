@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+import BoundaryValueProblem
+from BoundaryValueProblem import (PiecewiseLoad, TabulatedLoad, exact_beam_deflection, register_load,
+                                  resolve_load, solve_beam_bvp)
+
+
+def test_constant_load_closed_form():
+    x_vals, y_vals = solve_beam_bvp(4.0, 'constant', num_points=21, method='exact')
+    np.testing.assert_allclose(y_vals, -x_vals ** 2 * (4.0 - x_vals) ** 2 / 24, atol=1e-12)
+
+
+@pytest.mark.parametrize("load_type", BoundaryValueProblem.LOAD_TYPES)
+def test_numeric_matches_exact(load_type):
+    x_exact, y_exact = solve_beam_bvp(10.0, load_type, method='exact')
+    x_numeric, y_numeric = solve_beam_bvp(10.0, load_type, method='numeric')
+    np.testing.assert_allclose(np.interp(x_exact, x_numeric, y_numeric), y_exact,
+                               atol=1e-3 * np.abs(y_exact).max())
+
+
+def test_loads_are_vectorized():
+    x = np.linspace(0, 2, 5)
+    np.testing.assert_allclose(TabulatedLoad([0, 2], [1, 3])(x), 1 + x)
+    np.testing.assert_allclose(PiecewiseLoad([1.0], [2.0, np.cos])(x), np.where(x < 1, 2.0, np.cos(x)))
+    with pytest.raises(ValueError):
+        resolve_load('no such load')
+
+
+def test_registered_load(monkeypatch):
+    monkeypatch.setattr(BoundaryValueProblem, 'LOADS', dict(BoundaryValueProblem.LOADS))
+    monkeypatch.setattr(BoundaryValueProblem, 'SYMBOLIC_LOADS', dict(BoundaryValueProblem.SYMBOLIC_LOADS))
+    register_load('double', lambda x: np.full_like(x, 2.0), symbolic=lambda x: 2)
+    x_vals, y_vals = solve_beam_bvp(4.0, 'double', num_points=21)  # 'auto' picks the closed form
+    np.testing.assert_allclose(y_vals, 2 * exact_beam_deflection(x_vals, 4.0, 'constant'), atol=1e-12)
+    _, y_numeric = solve_beam_bvp(4.0, 'double', num_points=21, method='numeric')
+    assert np.abs(y_numeric).max() == pytest.approx(np.abs(y_vals).max(), rel=1e-3)
+    register_load('double', lambda x: np.full_like(x, 2.0))
+    with pytest.raises(ValueError, match="No closed form"):
+        solve_beam_bvp(4.0, 'double', method='exact')
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+from BoundaryValueProblem import exact_beam_deflection, solve_beam_sweep
+
+
+@pytest.mark.parametrize("continuation", [True, False])
+def test_sweep_matches_closed_form(continuation):
+    lengths = [8.0, 2.0, 5.0]
+    sweep = solve_beam_sweep(lengths, load_types=('constant', 'sin'), num_points=50, processes=1,
+                             continuation=continuation, tol=1e-6)
+    assert sweep['y'].shape == (2, 3, 50) and sweep['x'].shape == (3, 50)
+    for i, load_type in enumerate(sweep['load_types']):
+        for j, L in enumerate(lengths):
+            exact = exact_beam_deflection(sweep['x'][j], L, load_type)
+            np.testing.assert_allclose(sweep['y'][i, j], exact, atol=1e-6 * (1 + np.abs(exact).max()))
+
+
+def test_continuation_saves_iterations():
+    lengths = np.linspace(2.0, 6.0, 5)
+    cold = solve_beam_sweep(lengths, load_types=('constant',), processes=1, continuation=False)
+    warm = solve_beam_sweep(lengths, load_types=('constant',), processes=1, continuation=True)
+    assert warm['niter'][0, 1:].sum() <= cold['niter'][0, 1:].sum()
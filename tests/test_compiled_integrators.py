@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+from CompiledIntegrators import solve_compiled
+
+
+def decay(t, y):
+    return [-2 * y[0] + t]
+
+
+def test_rk45_matches_scipy():
+    t_eval = np.linspace(0, 5, 50)
+    t_vals, y_vals = solve_compiled(decay, (0, 5), [1.0], t_eval, rtol=1e-8, atol=1e-10)
+    reference = solve_ivp(decay, (0, 5), [1.0], t_eval=t_eval, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(t_vals, reference.t)
+    np.testing.assert_allclose(y_vals, reference.y, atol=1e-6)
+
+
+def test_rk4_matches_closed_form():
+    t_eval = np.linspace(0, 2, 21)
+    _, y_vals = solve_compiled(lambda t, y: [-y[0]], (0, 2), [1.0], t_eval, method='rk4')
+    np.testing.assert_allclose(y_vals[0], np.exp(-t_eval), rtol=1e-8)
+
+
+def test_failure_returns_partial_output():
+    t_eval = np.linspace(0, 2, 11)
+    t_vals, y_vals, status, message = solve_compiled(lambda t, y: [np.sqrt(1.0 - t)], (0, 2), [0.0], t_eval,
+                                                     full_output=True)
+    assert status == -1
+    assert "step size" in message
+    assert t_vals[-1] <= 1.0 and y_vals.shape == (1, t_vals.size)
+    np.testing.assert_allclose(y_vals[0], 2 / 3 * (1 - (1 - t_vals) ** 1.5), atol=1e-3)
+
+
+def test_uncompilable_rhs_falls_back():
+    _, y_vals = solve_compiled(lambda t, y: [-float(str(y[0]))], (0, 1), [1.0], rtol=1e-8, atol=1e-10)
+    assert abs(y_vals[0, -1] - np.exp(-1)) < 1e-6
+
+
+def test_closures_are_not_shared():
+    make = lambda a: (lambda t, y: [-a * y[0]])
+    ends = [solve_compiled(make(a), (0, 1), [1.0], rtol=1e-8, atol=1e-10)[1][0, -1] for a in (1.0, 2.0)]
+    np.testing.assert_allclose(ends, np.exp([-1.0, -2.0]), rtol=1e-6)
+
+
+@pytest.mark.parametrize('method', ['RK45', 'rk4'])
+def test_t_eval_starting_after_t_span(method):
+    t_eval = np.array([1.0, 1.5, 2.0])
+    _, y_vals = solve_compiled(lambda t, y: [-y[0]], (0, 2), [1.0], t_eval, method=method, rtol=1e-8, atol=1e-10)
+    reference = solve_ivp(lambda t, y: [-y[0]], (0, 2), [1.0], t_eval=t_eval, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(y_vals, reference.y, rtol=1e-6)
+
+
+def test_t_eval_outside_t_span():
+    with pytest.raises(ValueError):
+        solve_compiled(decay, (0, 1), [1.0], [0.5, 2.0])
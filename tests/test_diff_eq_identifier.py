@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import sympy as sp
+from DiffEqIdentifier import get_ode_type, solve_ode
+
+
+@pytest.mark.parametrize('expr, order, kind, route', [
+    ("y(x).diff(x) + 2*x*y(x) - x", 1, 'first_order_linear', 'first_order_linear'),
+    ("y(x).diff(x) - x*y(x)**2", 1, 'separable', 'separable'),
+    ("2*x*y(x) + y(x)**2 + (x**2 + 2*x*y(x))*y(x).diff(x)", 1, 'exact', 'exact'),
+    ("y(x).diff(x) - (x**2 + y(x)**2)/(x*y(x))", 1, 'homogeneous', 'dsolve'),
+    ("y(x).diff(x, 2) + 3*y(x).diff(x) + 2*y(x) - sin(x)", 2, 'second_order_constant', 'second_order_nonhomogeneous'),
+    ("y(x).diff(x) - sin(y(x)) - x", 1, 'nonlinear', 'numeric'),
+])
+def test_classifies_each_type(expr, order, kind, route):
+    info = get_ode_type(expr)
+    assert (info['order'], info['type'], info['route']) == (order, kind, route)
+
+
+def test_third_order_is_not_labelled_second_order():
+    info = get_ode_type("Derivative(y(x), x, 3) - y(x)")
+    assert info['order'] == 3 and info['type'] == 'constant_coefficient'
+    assert 'second_order_constant' not in info['types']
+
+
+def test_linear_and_separable_returns_particular_solution():
+    assert set(get_ode_type("y(x).diff(x) + 2*x*y(x) - x")['types']) == {'first_order_linear', 'separable'}
+    solution = solve_ode("y(x).diff(x) + 2*x*y(x) - x", (0, 1), [1])
+    x = sp.symbols('x')
+    assert abs(float(solution.rhs.subs(x, 0.7)) - (0.5 + 0.5 * np.exp(-0.49))) < 1e-12
+
+
+def test_numeric_route_matches_closed_form():
+    x_vals, y_vals = solve_ode("y(x).diff(x, 2) + y(x)", (0, 3), [1, 0], numeric=True)
+    np.testing.assert_allclose(y_vals[0], np.cos(x_vals), atol=1e-2)
@@ -0,0 +1,34 @@
+import pickle
+import sqlite3
+import sympy as sp
+from DsolveCache import DsolveCache
+
+
+def test_lookups_only_read_and_counters_are_flushed(tmp_path):
+    cache = DsolveCache(str(tmp_path))
+    x = sp.symbols('x')
+    y = sp.Function('y')
+    ode = sp.Eq(y(x).diff(x), y(x))
+    first = cache.dsolve(ode, y(x))
+    # Another process holding the write lock does not block a lookup
+    other = sqlite3.connect(cache.path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        assert cache.dsolve(ode, y(x)) == first
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert (stats["total_hits"], stats["total_misses"]) == (1, 1)
+
+
+def test_eviction_keeps_recently_read_entries(tmp_path):
+    cache = DsolveCache(str(tmp_path))
+    cache.put("old", "a" * 100)
+    cache.put("new", "b" * 100)
+    assert cache.get("old") == "a" * 100
+    cache.max_bytes = 2 * len(pickle.dumps("c" * 100))
+    cache.put("third", "c" * 100)
+    assert cache.get("new") is None
+    assert cache.get("old") == "a" * 100
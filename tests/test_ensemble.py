@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from Ensemble import QuantileSketch, RunningStats, run_ensemble, sample_batches
+from NewtonCoolingLaw import newtons_cooling_exact
+
+PARAMETERS = {'T0': 100.0, 'T_ambient': ('normal', 20.0, 2.0), 'k': ('uniform', 0.05, 0.15)}
+
+
+def test_running_stats_merge_matches_numpy():
+    values = np.random.default_rng(0).standard_normal((1000, 3)) * [1.0, 10.0, 0.1] + 5.0
+    moments = RunningStats(3)
+    for batch in np.array_split(values, 7):
+        moments.update(batch)
+    np.testing.assert_allclose(moments.mean, values.mean(axis=0))
+    np.testing.assert_allclose(moments.variance(), values.var(axis=0, ddof=1))
+    np.testing.assert_array_equal(moments.max, values.max(axis=0))
+
+
+def test_quantile_sketch_is_close_to_numpy():
+    values = np.random.default_rng(1).lognormal(size=(20000, 2))
+    sketch = QuantileSketch((2,), compression=100)
+    for batch in np.array_split(values, 10):
+        sketch.update(batch)
+    assert sketch.means.shape[1] <= 100
+    levels = [0.0, 0.01, 0.5, 0.99, 1.0]
+    expected = np.quantile(values, levels, axis=0)
+    np.testing.assert_allclose(sketch.quantile(levels), expected, rtol=0.02)
+
+
+def test_ensemble_matches_direct_evaluation():
+    t_vals = np.linspace(0, 30, 16)
+    result = run_ensemble('newtons_cooling', PARAMETERS, 5000, t_vals, batch_size=512, processes=0)
+    params = [np.concatenate(column) for column in zip(*sample_batches('newtons_cooling', PARAMETERS, 5000, 512))]
+    values = newtons_cooling_exact(*params, t_vals)
+    assert result['n_samples'] == 5000
+    np.testing.assert_allclose(result['mean'], values.mean(axis=0))
+    np.testing.assert_allclose(result['std'], values.std(axis=0, ddof=1))
+    np.testing.assert_allclose(result['quantiles'], np.quantile(values, result['quantile_levels'], axis=0),
+                               rtol=1e-2)
+
+
+def test_sobol_batches_and_missing_parameters():
+    batches = list(sample_batches('newtons_cooling', PARAMETERS, 1000, batch_size=300, sampler='sobol'))
+    assert [batch[0].size for batch in batches] == [512, 488]
+    assert all(np.all((0.05 <= batch[2]) & (batch[2] < 0.15)) for batch in batches)
+    with pytest.raises(ValueError, match="Missing parameters"):
+        next(sample_batches('newtons_cooling', {'T0': 100.0}, 10))
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from Events import first_event_time, threshold_event
+from HarmonicOscillatorODE import (damped_oscillator_exact, harmonic_oscillator_settle_times, oscillator_amplitude,
+                                   solve_harmonic_oscillator_until)
+from Instrumentation import solve_ivp
+from NewtonCoolingLaw import cooling_threshold_time, solve_newtons_cooling_until
+
+
+def test_threshold_event_stops_the_solve():
+    solution = solve_ivp(lambda t, y: -y, (0, 10), [1.0], events=threshold_event(0, 0.5, -1), rtol=1e-10)
+    assert first_event_time(solution) == pytest.approx(np.log(2), rel=1e-6)
+    assert solution.t[-1] == pytest.approx(np.log(2), rel=1e-6)
+
+
+def test_numeric_cooling_stops_at_the_threshold():
+    t_vals, T_vals, t_event = solve_newtons_cooling_until(90, 20, 0.1, (0, 100), T_threshold=40, method='numeric')
+    assert t_event == pytest.approx(cooling_threshold_time(90, 20, 0.1, 40), rel=1e-3)
+    assert t_vals[-1] == pytest.approx(t_event) and T_vals[-1] == pytest.approx(40, rel=1e-3)
+
+
+def test_oscillator_settle_times_agree_with_the_event():
+    omega0, zeta = np.array([2.0, 1.0, 3.0]), np.array([0.1, 1.0, 0.05])
+    times = harmonic_oscillator_settle_times(1.0, 0.0, omega0, zeta, 1e-2, t_max=100.0)
+    y = damped_oscillator_exact([0.0], 1.0, 0.0, omega0, zeta, t0=-times[:, None])[:, :, 0]
+    np.testing.assert_allclose(oscillator_amplitude(y[:, 0], y[:, 1], omega0), 1e-2, rtol=1e-6)
+    _, _, t_event = solve_harmonic_oscillator_until(1.0, 0.0, 2.0, 0.1, (0, 100), epsilon=1e-2, method='DOP853')
+    assert t_event == pytest.approx(times[0], rel=1e-3)
+
+
+def test_settle_times_edge_cases():
+    times = harmonic_oscillator_settle_times([1e-3, 1.0], 0.0, 2.0, [0.1, 0.0], 1e-2, t_max=10.0, t0=5.0)
+    assert times[0] == 5.0 and np.isnan(times[1])
@@ -0,0 +1,40 @@
+import numpy as np
+from FastPlot import FastPlotter, decimate, render_batch
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+def test_decimate_keeps_the_extremes_of_every_bucket():
+    x_vals = np.linspace(0, 1, 10001)
+    y_vals = np.sin(40 * x_vals) + np.random.default_rng(0).standard_normal(x_vals.size)
+    x_small, y_small = decimate(x_vals, y_vals, 100)
+    assert x_small.size <= 2 * 100 + 2
+    assert (x_small[0], x_small[-1]) == (x_vals[0], x_vals[-1]) and np.all(np.diff(x_small) > 0)
+    assert y_small.min() == y_vals.min() and y_small.max() == y_vals.max()
+    size = -(-x_vals.size // 100)
+    for start in range(0, x_vals.size, size):
+        bucket = np.arange(start, min(start + size, x_vals.size))
+        inside = (x_small >= x_vals[bucket[0]]) & (x_small <= x_vals[bucket[-1]])
+        assert y_vals[bucket].max() in y_small[inside] and y_vals[bucket].min() in y_small[inside]
+    short = np.arange(10.0)
+    assert decimate(short, short, 100)[0].size == 10
+
+
+def test_reused_figure_hides_surplus_lines():
+    plotter = FastPlotter()
+    x_vals = np.linspace(0, 1, 50)
+    assert plotter.render(x_vals, np.vstack([x_vals, x_vals ** 2]), style='second_order').startswith(PNG_MAGIC)
+    plotter.draw(x_vals, x_vals ** 3)
+    assert [line.get_visible() for line in plotter.lines] == [True, False]
+    assert [text.get_text() for text in plotter.axes.get_legend().get_texts()] == ['y(x)']
+
+
+def test_render_batch_writes_pngs(tmp_path):
+    x_vals = np.linspace(0, 1, 1000)
+    jobs = [{'x_vals': x_vals, 'y_vals': np.sin(i * x_vals), 'filename': str(tmp_path / f"plot_{i}.png")}
+            for i in range(3)]
+    filenames = render_batch(jobs, processes=0)
+    assert filenames == [job['filename'] for job in jobs]
+    for filename in filenames:
+        with open(filename, "rb") as file:
+            assert file.read(8) == PNG_MAGIC
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from HarmonicOscillatorODE import damped_oscillator_exact, solve_harmonic_oscillator, solve_harmonic_oscillator_batch
+
+# Under-, critically and overdamped oscillators sharing one of the omega0 values
+X0, V0 = [1.0, 0.5, -1.0, 2.0], [0.0, 1.0, 0.5, -1.0]
+OMEGA0, ZETA = [2.0, 2.0, 1.0, 3.0], [0.1, 1.0, 2.5, 0.1]
+
+
+@pytest.mark.parametrize("method, atol", [('expm', 1e-10), ('rk4', 1e-6), ('RK45', 1e-2)])
+def test_batch_methods_match_closed_form(method, atol):
+    t_vals, y_vals = solve_harmonic_oscillator_batch(X0, V0, OMEGA0, ZETA, (0, 10), num_points=201, method=method)
+    assert y_vals.shape == (4, 2, 201)
+    np.testing.assert_allclose(y_vals, damped_oscillator_exact(t_vals, X0, V0, OMEGA0, ZETA), atol=atol)
+
+
+def test_batch_matches_single_solves():
+    t_vals, y_vals = solve_harmonic_oscillator_batch(X0, V0, OMEGA0, ZETA, (0, 10), num_points=50)
+    for i in range(len(X0)):
+        t_single, y_single = solve_harmonic_oscillator(X0[i], V0[i], OMEGA0[i], ZETA[i], (0, 10), 50,
+                                                       method='DOP853')
+        np.testing.assert_allclose(t_single, t_vals)
+        np.testing.assert_allclose(y_single, y_vals[i], atol=5e-3)
+
+
+def test_critical_damping_is_finite():
+    y_vals = damped_oscillator_exact(np.linspace(0, 5, 11), 1.0, 0.0, 2.0, 1.0)[0, 0]
+    t = np.linspace(0, 5, 11)
+    np.testing.assert_allclose(y_vals, (1 + 2 * t) * np.exp(-2 * t), atol=1e-12)
@@ -0,0 +1,65 @@
+import contextlib
+import io
+from unittest import mock
+import numpy as np
+import pytest
+import sympy as sp
+from EnhancedDiffEqSolver import exact_solution, separable_solution
+from ImplicitSolutions import ImplicitCurve, solve_implicit
+
+
+def test_separable_matches_closed_form_in_any_order():
+    # dy/dx = x y through (0, 1) is y = exp(x^2 / 2)
+    x_vals = np.random.default_rng(0).uniform(-3, 3, (40, 50))
+    y_vals, branch_ends = solve_implicit(separable_solution('y', 'x'), 0, 1, x_vals)
+    assert branch_ends == []
+    np.testing.assert_allclose(y_vals, np.exp(x_vals ** 2 / 2), rtol=1e-10)
+
+
+def test_circle_ends_at_its_turning_points():
+    # x dx + y dy = 0 through (0.3, -0.5) is the lower half of a circle of radius sqrt(0.34)
+    x_vals = np.linspace(-1, 1, 1001)
+    y_vals, branch_ends = solve_implicit(exact_solution('x', 'y'), 0.3, -0.5, x_vals)
+    radius = np.sqrt(0.34)
+    inside = np.abs(x_vals) < radius
+    np.testing.assert_allclose(y_vals[inside], -np.sqrt(radius ** 2 - x_vals[inside] ** 2), atol=1e-6)
+    assert np.isnan(y_vals[~inside]).all()
+    ends = sorted(x_end for x_end, _ in branch_ends)
+    assert ends[0] == pytest.approx(-radius, abs=2e-3) and ends[1] == pytest.approx(radius, abs=2e-3)
+
+
+def test_stays_on_the_starting_branch():
+    # y^2 = x has two branches; a coarse grid must not hop onto y < 0
+    x_vals = np.linspace(0.25, 50, 7)
+    y_vals, branch_ends = solve_implicit('y**2 - x', 1, 1, x_vals)
+    assert branch_ends == []
+    np.testing.assert_allclose(y_vals, np.sqrt(x_vals), rtol=1e-10)
+
+
+def test_coarse_exact_grid():
+    curve = ImplicitCurve(exact_solution('2*x*y + y**2', 'x**2 + 2*x*y'), 1, 1)
+    x_vals = np.linspace(0.2, 50, 30)
+    y_vals = curve(x_vals)
+    np.testing.assert_allclose(curve._F(x_vals, y_vals), curve.C, atol=1e-9)
+
+
+def test_rejects_points_off_the_solution_set():
+    with pytest.raises(ValueError):
+        ImplicitCurve(separable_solution('y', 'x'), 0, 0)
+    with pytest.raises(ValueError):
+        ImplicitCurve(exact_solution('x', 'y'), 1, 0)
+
+
+@pytest.mark.parametrize("name, answers", [
+    ('solve_separable_ode', ['y', 'sin(x)', '0', '1']),
+    ('solve_exact_ode', ['2*x*y + y**2', 'x**2 + 2*x*y', '1', '1']),
+])
+def test_interactive_solvers_return_the_curve(name, answers):
+    import EnhancedDiffEqSolver
+    with mock.patch('builtins.input', side_effect=answers), contextlib.redirect_stdout(io.StringIO()):
+        relation, curve = getattr(EnhancedDiffEqSolver, name)(compiled=True)
+    x_vals = np.linspace(float(answers[2]), float(answers[2]) + 0.5, 20)
+    y_vals = curve(x_vals)
+    assert y_vals[0] == pytest.approx(float(answers[3]))
+    F = sp.lambdify(sp.symbols('x y'), curve.residual)
+    np.testing.assert_allclose(F(x_vals, y_vals), curve.C, atol=1e-9)
@@ -0,0 +1,31 @@
+import importlib
+import numpy as np
+import pytest
+from HarmonicOscillatorODE import damped_oscillator_exact, solve_harmonic_oscillator
+from LTIPropagator import LTISystem, detect_lti
+
+
+def test_expm_matches_closed_form():
+    t_vals, y_vals = solve_harmonic_oscillator(1.0, 0.5, 2.0, 0.1, (0, 20), num_points=400, method='expm')
+    exact = damped_oscillator_exact(t_vals, 1.0, 0.5, 2.0, 0.1)[0]
+    np.testing.assert_allclose(y_vals, exact, atol=1e-12)
+
+
+def test_forced_system_matches_closed_form():
+    # y' = -y + sin(t), y(0) = 0 has y = (sin t - cos t + e^-t) / 2
+    t_vals, y_vals = LTISystem([[-1.0]], sinusoids=[(1.0, [1.0], [0.0])]).solve((0, 10), [0.0], 200)
+    np.testing.assert_allclose(y_vals[0], (np.sin(t_vals) - np.cos(t_vals) + np.exp(-t_vals)) / 2, atol=1e-12)
+
+
+def test_detect_lti():
+    system = detect_lti(lambda t, y: [y[1], -4 * y[0] + 3 + 2 * np.cos(5 * t)], 2, omegas=(5.0,))
+    np.testing.assert_allclose(system.A, [[0, 1], [-4, 0]], atol=1e-9)
+    assert detect_lti(lambda t, y: [y[0] ** 2], 1) is None
+
+
+@pytest.mark.parametrize('option', ['dense', 'stream'])
+def test_expm_rejects_dense_and_stream(option):
+    with pytest.raises(ValueError, match="expm"):
+        solve_harmonic_oscillator(1.0, 0.0, 1.0, 0.1, (0, 10), method='expm', **{option: True})
+    with pytest.raises(ValueError, match="expm"):
+        importlib.import_module('2ndODE').solve_second_order_ode((0, 10), 1.0, 0.0, method='expm', **{option: True})
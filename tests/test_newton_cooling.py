@@ -0,0 +1,30 @@
+import warnings
+import numpy as np
+import pytest
+from NewtonCoolingLaw import (cooling_settle_time, cooling_threshold_time, newtons_cooling_exact,
+                              solve_newtons_cooling, solve_newtons_cooling_until)
+
+
+def test_exact_engine_matches_numeric():
+    t_exact, T_exact = solve_newtons_cooling(90, 20, 0.1, (0, 60), 200, method='exact')
+    t_numeric, T_numeric = solve_newtons_cooling(90, 20, 0.1, (0, 60), 200, method='numeric')
+    np.testing.assert_allclose(t_exact, t_numeric)
+    np.testing.assert_allclose(T_exact, T_numeric, rtol=1e-3)
+    np.testing.assert_allclose(T_exact, newtons_cooling_exact(90, 20, 0.1, t_exact)[0], rtol=1e-12)
+
+
+def test_event_times_against_the_closed_form():
+    t_event = cooling_threshold_time(90, 20, 0.1, 40)
+    assert newtons_cooling_exact(90, 20, 0.1, [t_event], t0=0)[0, 0] == pytest.approx(40)
+    t_settle = cooling_settle_time(90, 20, 0.1, tol=0.5)
+    assert newtons_cooling_exact(90, 20, 0.1, [t_settle], t0=0)[0, 0] - 20 == pytest.approx(0.5)
+    t_vals, T_vals, t_stop = solve_newtons_cooling_until(90, 20, 0.1, (0, 100), T_threshold=40, tol=0.5)
+    assert t_stop == pytest.approx(t_event) and t_vals[-1] == pytest.approx(t_event)
+
+
+def test_settle_time_without_cooling():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        times = cooling_settle_time(90, 20, [0.0, 0.0, 0.1], derivative_tol=[1.0, 1.0, 1e3])
+        assert np.isnan(cooling_settle_time(90, 20, 0.0, tol=0.5))
+    np.testing.assert_array_equal(times, [0.0, 0.0, 0.0])
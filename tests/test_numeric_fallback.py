@@ -0,0 +1,28 @@
+import numpy as np
+from EnhancedDiffEqSolver import numeric_solution, solve_with_budget
+
+
+def test_matches_closed_form():
+    x_vals, y_vals = numeric_solution('second_order_linear', ('1', '0', '1'), 0, 1, dy0=0, x_end=5)
+    np.testing.assert_allclose(y_vals, np.cos(x_vals), atol=1e-2)
+
+
+def test_blow_up_returns_values_up_to_the_breakdown():
+    # y' = y^2 from y(0) = 1 is 1 / (1 - x), which blows up at x = 1
+    x_vals, y_vals, message = numeric_solution('separable', ('y**2', '1'), 0, 1, x_end=2, full_output=True)
+    assert message is not None
+    assert 0 < x_vals[-1] < 1 and len(x_vals) == len(y_vals)
+    np.testing.assert_allclose(y_vals, 1 / (1 - x_vals), rtol=1e-2)
+
+
+def test_overflowing_input_is_reported():
+    x_vals, y_vals, message = numeric_solution('separable', ('9**9**9**9', '1'), 0, 1, full_output=True)
+    assert "cannot be evaluated" in message
+    assert list(x_vals) == [0.0] and list(y_vals) == [1.0]
+
+
+def test_budget_report_records_numeric_failure():
+    report = solve_with_budget('exact', ('y', '2*x'), 0, 1, budget=5)
+    assert report['path'] == 'numeric'
+    assert "not exact" in report['error'] and "numeric solve stopped" in report['error']
+    assert list(report['solution'][0]) == [0.0]
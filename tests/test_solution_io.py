@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import SolutionIO
+from SolutionIO import load_solution, write_solution
+
+FORMATS = ['npy', 'raw', 'npz', 'csv'] + (['parquet'] if SolutionIO.pyarrow is not None else [])
+EXTENSIONS = {'npy': '.npy', 'raw': '.bin', 'npz': '.npz', 'csv': '.csv', 'parquet': '.parquet'}
+
+
+@pytest.mark.parametrize("format", FORMATS)
+def test_chunked_round_trip(tmp_path, format, monkeypatch):
+    monkeypatch.setattr(SolutionIO, 'CHUNK_ROWS', 7)  # Split every chunk into several blocks
+    t_vals = np.linspace(0, 1, 50)
+    y_vals = np.vstack([np.sin(t_vals), np.cos(t_vals)])
+    chunks = [(t_vals[i:i + 20], y_vals[:, i:i + 20]) for i in range(0, 50, 20)]
+    filename = write_solution(str(tmp_path / f"solution{EXTENSIONS[format]}"), chunks=chunks)
+    t_loaded, y_loaded = load_solution(filename)
+    np.testing.assert_array_equal(t_loaded, t_vals)
+    np.testing.assert_array_equal(y_loaded, y_vals)
+
+
+def test_npy_header_is_standard(tmp_path):
+    t_vals = np.arange(5.0)
+    filename = write_solution(str(tmp_path / "solution.npy"), t_vals, t_vals ** 2)
+    with open(filename, "rb") as file:
+        assert np.lib.format.read_magic(file) == (1, 0)
+        assert np.lib.format.read_array_header_1_0(file) == ((5, 2), False, np.dtype('<f8'))
+        assert file.tell() == SolutionIO._NPY_HEADER_BYTES
+    t_loaded, y_loaded = load_solution(filename, mmap=False)
+    np.testing.assert_array_equal(y_loaded, t_vals ** 2)
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="Unknown format"):
+        write_solution(str(tmp_path / "solution.xyz"), [0.0], [1.0])
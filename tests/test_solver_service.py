@@ -0,0 +1,69 @@
+import asyncio
+import concurrent.futures
+import numpy as np
+import pytest
+import DiffEqAPI
+from SolverService import SolverService, start_http_server
+
+SPEC = {'problem': 'harmonic_oscillator', 'x0': 1, 'v0': 0, 'omega0': 1, 'zeta': 0.1, 't_span': [0, 5]}
+
+
+def _run(spec, **options):
+    async def main():
+        async with SolverService(1, executor=concurrent.futures.ThreadPoolExecutor(1), **options) as service:
+            return await service.solve(spec)
+    return asyncio.run(main())
+
+
+def test_solves_numeric_problem():
+    arrays, _ = _run(SPEC)
+    np.testing.assert_allclose(arrays['result.1'], DiffEqAPI.solve(SPEC)[1])
+
+
+@pytest.mark.parametrize('spec', [
+    {'problem': 'separable', 'g_y': 'y', 'h_x': 'x'},
+    {'problem': 'single_first_order', 'eq_func': 'main', 'y0': 1, 'x_span': [0, 1]},
+])
+def test_rejects_expressions_and_unlisted_functions(spec):
+    with pytest.raises(ValueError):
+        _run(spec)
+
+
+def test_trusted_callers_can_opt_in():
+    _, meta = _run({'problem': 'separable', 'g_y': 'y', 'h_x': 'x'}, problems=DiffEqAPI.PROBLEMS)
+    assert 'log(y)' in meta['result']
+
+
+def test_http_binds_to_loopback_only():
+    async def main():
+        with pytest.raises(ValueError):
+            await start_http_server(None, host='0.0.0.0', port=0)
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize('length', ['abc', '-5'])
+def test_bad_content_length_gets_400(length):
+    async def main():
+        async with SolverService(1, executor=concurrent.futures.ThreadPoolExecutor(1)) as service:
+            server = await start_http_server(service, port=0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f"POST /solve HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+            await writer.drain()
+            reply = await reader.read()
+            writer.close()
+            server.close()
+            return reply
+    assert asyncio.run(main()).startswith(b"HTTP/1.1 400")
+
+
+def test_close_fails_pending_requests():
+    async def main():
+        service = await SolverService(1, executor=concurrent.futures.ThreadPoolExecutor(1)).start()
+        specs = [dict(SPEC, num_points=100 + i) for i in range(5)]
+        requests = [asyncio.ensure_future(service.solve(spec)) for spec in specs]
+        await asyncio.sleep(0)  # Let every request reach the queue
+        await service.close()
+        return await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 5)
+    results = asyncio.run(main())
+    assert any(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from StiffSolver import symbolic_jacobian
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_solver_modules_do_not_import_sympy():
+    for module in ('HarmonicOscillatorODE', '1stODE'):
+        code = f"import importlib, sys; importlib.import_module('{module}'); print('sympy' in sys.modules)"
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        assert output.stdout.strip() == 'False', module
+
+
+def test_symbolic_jacobian():
+    jac = symbolic_jacobian(lambda t, y, k: [y[1], -k * y[0] * y[1]], 2, (3.0,))
+    np.testing.assert_allclose(jac(0.0, np.array([2.0, 5.0])), [[0.0, 1.0], [-15.0, -6.0]])
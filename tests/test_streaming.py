@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from HarmonicOscillatorODE import harmonic_oscillator, solve_harmonic_oscillator
+from Instrumentation import solve_ivp
+from SolutionIO import load_solution, write_solution
+from Streaming import stream_solution
+
+ARGS = (2.0, 0.1)
+
+
+def _joined(chunks):
+    chunks = list(chunks)
+    return np.concatenate([t for t, _ in chunks]), np.concatenate([y for _, y in chunks], axis=1)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000])
+def test_grid_stream_equals_solve_ivp(chunk_size):
+    t_eval = np.linspace(0, 10, 101)
+    reference = solve_ivp(harmonic_oscillator, (0, 10), [1.0, 0.0], args=ARGS, t_eval=t_eval)
+    t_vals, y_vals = _joined(stream_solution(harmonic_oscillator, (0, 10), [1.0, 0.0], 101, chunk_size=chunk_size,
+                                             args=ARGS, copy=True))
+    np.testing.assert_array_equal(t_vals, t_eval)
+    np.testing.assert_allclose(y_vals, reference.y, rtol=1e-12, atol=1e-12)
+
+
+def test_step_stream_equals_solve_ivp_steps():
+    reference = solve_ivp(harmonic_oscillator, (0, 10), [1.0, 0.0], args=ARGS)
+    t_vals, y_vals = _joined(stream_solution(harmonic_oscillator, (0, 10), [1.0, 0.0], chunk_size=5, args=ARGS,
+                                             copy=True))
+    np.testing.assert_allclose(t_vals, reference.t)
+    np.testing.assert_allclose(y_vals, reference.y)
+
+
+def test_stream_to_file(tmp_path):
+    chunks = solve_harmonic_oscillator(1.0, 0.0, *ARGS, (0, 10), num_points=500, stream=True)
+    filename = write_solution(str(tmp_path / "solution.npy"), chunks=chunks)
+    t_vals, y_vals = load_solution(filename)
+    t_ref, y_ref = solve_harmonic_oscillator(1.0, 0.0, *ARGS, (0, 10), num_points=500)
+    np.testing.assert_allclose(t_vals, t_ref)
+    np.testing.assert_allclose(y_vals, y_ref, rtol=1e-12, atol=1e-12)
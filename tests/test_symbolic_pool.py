@@ -0,0 +1,39 @@
+import pickle
+import threading
+import time
+import pytest
+from SymbolicPool import KillablePool
+
+
+def test_waiter_gets_a_worker_after_a_timeout():
+    pool = KillablePool(processes=1)
+    results = []
+    try:
+        overrun = threading.Thread(target=lambda: results.append(_timed_out(pool)), daemon=True)
+        overrun.start()
+        time.sleep(0.5)  # Let the slow task take the only worker
+        waiter = threading.Thread(target=lambda: results.append(pool.run(sum, ([1, 2],), timeout=30)), daemon=True)
+        waiter.start()
+        overrun.join(30)
+        waiter.join(30)
+        assert not waiter.is_alive()
+        assert sorted(results, key=str) == [3, 'timeout']
+    finally:
+        pool.close()
+
+
+def _timed_out(pool):
+    try:
+        pool.run(time.sleep, (60,), timeout=1)
+    except TimeoutError:
+        return 'timeout'
+
+
+def test_unpicklable_task_releases_the_worker():
+    pool = KillablePool(processes=1)
+    try:
+        with pytest.raises((pickle.PicklingError, TypeError, AttributeError)):
+            pool.run(sum, ([lambda: None],), timeout=30)
+        assert pool.run(sum, ([1, 2],), timeout=30) == 3
+    finally:
+        pool.close()
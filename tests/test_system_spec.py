@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from HarmonicOscillatorODE import harmonic_oscillator, harmonic_oscillator_system
+from Instrumentation import solve_ivp
+
+SYSTEM = harmonic_oscillator_system.with_params(2.0, 0.1)
+
+
+def test_single_and_batch_states_match_list_rhs():
+    states = np.random.default_rng(0).random((2, 5))
+    batch = SYSTEM(0.0, states)
+    for i in range(5):
+        np.testing.assert_allclose(batch[:, i], harmonic_oscillator(0.0, states[:, i], 2.0, 0.1))
+        np.testing.assert_allclose(SYSTEM.scipy_rhs()(0.0, states[:, i]), batch[:, i])
+    np.testing.assert_allclose(SYSTEM.scipy_rhs(vectorized=True)(0.0, states), batch)
+
+
+def test_reused_buffer_is_not_shared_between_calls():
+    fun = SYSTEM.scipy_rhs()
+    first = fun(0.0, np.array([1.0, 0.0]))
+    fun(0.0, np.array([0.0, 1.0]))
+    np.testing.assert_allclose(first, [0.0, -4.0])
+
+
+@pytest.mark.parametrize("method, vectorized", [('RK45', False), ('Radau', True), ('auto', False)])
+def test_solve_matches_list_rhs(method, vectorized):
+    t_eval = np.linspace(0, 10, 50)
+    solution = SYSTEM.solve((0, 10), [1.0, 0.0], method=method, vectorized=vectorized, t_eval=t_eval,
+                            rtol=1e-8, atol=1e-10)
+    reference = solve_ivp(harmonic_oscillator, (0, 10), [1.0, 0.0], args=(2.0, 0.1), t_eval=t_eval, rtol=1e-8,
+                          atol=1e-10)
+    np.testing.assert_allclose(solution.y, reference.y, atol=1e-6)
+
+
+def test_symbolic_jacobian():
+    jac = SYSTEM.symbolic_jacobian()
+    np.testing.assert_allclose(jac(0.0, np.array([1.0, 0.5])), [[0.0, 1.0], [-4.0, -0.4]])